@@ -0,0 +1,61 @@
+from pathlib import Path
+from pitch_volume_analysis.core import decoder
+from pitch_volume_analysis.core.analyzer import Analyzer
+import argparse
+import time
+
+
+def main():
+    """Compares the per-message cost of the string parsing path against the byte level decoder."""
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    DATASET_PATH: Path = Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", type=Path, default=DATASET_PATH, help="Dataset to decode")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Passes over the dataset")
+    args = parser.parse_args()
+
+    with open(args.file, "rb") as file:
+        records: list[bytes] = file.read().splitlines()
+    lines: list[str] = [record.decode() + "\n" for record in records]
+
+    before: float = min(time_pass(parse_lines, lines) for _ in range(args.repeat))
+    after: float = min(time_pass(decode_records, records) for _ in range(args.repeat))
+
+    print(f"Messages: {len(records)}")
+    print(f"parse_order_message: {before / len(records) * 1e9:8.1f} ns/message")
+    print(f"decoder.decode:      {after / len(records) * 1e9:8.1f} ns/message")
+    print(f"Speedup:             {before / after:8.2f}x")
+
+
+def time_pass(function, data: list) -> float:
+    """Returns the wall time in seconds of a single pass of function over data."""
+    start: float = time.perf_counter()
+    function(data)
+    return time.perf_counter() - start
+
+
+def parse_lines(lines: list[str]) -> None:
+    """The original per-line path used by Analyzer.read_file."""
+    my_analyzer = Analyzer(None)
+    for line in lines:
+        entry: str = line.strip()
+        message_type: str = my_analyzer.get_message_type(entry)
+        message: list[str] = my_analyzer.parse_order_message(entry, message_type)
+        try:
+            my_analyzer.get_message_symbol(message, message_type)
+        except IndexError:
+            continue
+        int(message[3] if message_type in ("E", "X") else message[4])
+
+
+def decode_records(records: list[bytes]) -> None:
+    """The table driven byte level path."""
+    decode = decoder.decode
+    for record in records:
+        decode(record)
+
+
+if __name__ == "__main__":
+    main()
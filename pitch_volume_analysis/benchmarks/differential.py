@@ -0,0 +1,65 @@
+from pathlib import Path
+from pitch_volume_analysis.benchmarks.streams import random_stream
+from pitch_volume_analysis.core.engines import (
+    ENGINES,
+    REFERENCE,
+    compare_engines,
+    engine_available,
+)
+import argparse
+import sys
+import tempfile
+
+
+def main():
+    """Checks that every registered engine computes the same symbol_book as the reference."""
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    RAW_PATH: Path = Path(PROJECT_ROOT, "data", "raw")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f",
+        "--files",
+        type=Path,
+        nargs="*",
+        default=sorted(RAW_PATH.iterdir()),
+        help="Datasets to compare engines on, defaults to the sample data",
+    )
+    parser.add_argument(
+        "-r", "--rounds", type=int, default=20, help="Number of randomized streams to generate"
+    )
+    parser.add_argument(
+        "-n", "--messages", type=int, default=50_000, help="Messages per randomized stream"
+    )
+    parser.add_argument(
+        "-e", "--engines", nargs="+", choices=list(ENGINES), help="Engines to compare"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=4, help="Workers of the parallel engine"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first random stream")
+    args = parser.parse_args()
+    engines: list[str] = args.engines or [name for name in ENGINES if engine_available(name)]
+
+    failures: int = 0
+    with tempfile.TemporaryDirectory() as directory:
+        paths: list[Path] = [path for path in args.files if path.is_file()]
+        for seed in range(args.seed, args.seed + args.rounds):
+            paths.append(random_stream(Path(directory, f"stream-{seed}"), args.messages, seed))
+        for path in paths:
+            mismatches: dict[str, list[str]] = compare_engines(path, engines, args.workers)
+            name: str = path.name if path.parent == RAW_PATH else f"{path.name} (random)"
+            if mismatches:
+                failures += 1
+                for engine, symbols in mismatches.items():
+                    print(f"{name}: {engine} differs from {REFERENCE} on {', '.join(symbols)}")
+            else:
+                print(f"{name}: {', '.join(engines)} agree")
+    print(f"\n{len(paths) - failures} of {len(paths)} datasets agree")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+from collections import deque
+from pathlib import Path
+from pitch_volume_analysis.core.ledger import format_order_id
+import argparse
+import heapq
+import itertools
+import json
+import random
+import string
+
+# Message mix used when none is given, as fractions of all generated messages.
+DEFAULT_MIX: dict[str, float] = {
+    "add": 0.40,
+    "execute": 0.22,
+    "cancel": 0.26,
+    "trade": 0.06,
+    "other": 0.06,
+    "break": 0.0,
+}
+
+# Timestamps are spread over the regular session, 8:00 to 16:00, in milliseconds since midnight.
+SESSION_START: int = 8 * 60 * 60 * 1000
+SESSION_LENGTH: int = 8 * 60 * 60 * 1000
+
+# Order ids start high enough to be full width base36 strings, like the ones in the sample data.
+FIRST_ORDER_ID: int = 36**11
+# Random choices are drawn in batches, which is much faster than one call per message.
+BATCH: int = 65536
+# Trade breaks pick one of this many most recent executions and trades.
+BREAKABLE: int = 1000
+
+
+def main():
+    """Writes a synthetic PITCH dataset and its ground-truth volumes."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Dataset to write")
+    parser.add_argument("-n", "--messages", type=int, default=1_000_000, help="Messages to write")
+    parser.add_argument("--symbols", type=int, default=500, help="Number of distinct symbols")
+    parser.add_argument(
+        "--skew", type=float, default=1.1, help="Zipf exponent of symbol popularity, 0 is uniform"
+    )
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=DEFAULT_MIX,
+        help="Message mix such as add=0.4,execute=0.22,cancel=0.26,trade=0.06,other=0.06,break=0",
+    )
+    parser.add_argument(
+        "--lifetime",
+        type=float,
+        default=2000,
+        help="Mean number of messages an order rests before its next event",
+    )
+    parser.add_argument(
+        "--partial-fill-rate",
+        type=float,
+        default=0.3,
+        help="Chance an execution only fills part of an order",
+    )
+    parser.add_argument(
+        "--long-form-rate",
+        type=float,
+        default=0.1,
+        help="Chance an add or trade uses a long form message",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    generate(
+        args.output,
+        args.messages,
+        args.symbols,
+        args.skew,
+        args.mix,
+        args.lifetime,
+        args.partial_fill_rate,
+        args.long_form_rate,
+        args.seed,
+    )
+    print(f"Wrote {args.messages} messages to {args.output}")
+    print(f"Ground truth: {truth_path(args.output)}")
+
+
+def generate(
+    path: Path,
+    messages: int,
+    symbols: int = 500,
+    skew: float = 1.1,
+    mix: dict[str, float] = DEFAULT_MIX,
+    lifetime: float = 2000,
+    partial_fill_rate: float = 0.3,
+    long_form_rate: float = 0.1,
+    seed: int = 0,
+) -> dict:
+    """Writes messages PITCH records to path, and their ground truth next to it as JSON.
+
+    The ground truth holds the volume of every symbol in order of first appearance, the number of
+    messages of each type and the parameters.
+    """
+    stream = PitchGenerator(symbols, skew, mix, lifetime, partial_fill_rate, long_form_rate, seed)
+    with open(path, "w", newline="\n") as file:
+        for start in range(0, messages, BATCH):
+            file.write("\n".join(stream.records(start, min(BATCH, messages - start), messages)))
+            file.write("\n")
+
+    truth: dict = {
+        "messages": messages,
+        "counts": stream.counts,
+        "parameters": {
+            "symbols": symbols,
+            "skew": skew,
+            "mix": mix,
+            "lifetime": lifetime,
+            "partial_fill_rate": partial_fill_rate,
+            "long_form_rate": long_form_rate,
+            "seed": seed,
+        },
+        "volumes": stream.volumes,
+    }
+    truth_path(path).write_text(json.dumps(truth, indent=2))
+    return truth
+
+
+class PitchGenerator:
+    """Generates a realistic stream of PITCH records and tracks the volume they trade.
+
+    Symbols are picked with Zipf weights, so a few symbols carry most of the volume. Every add
+    draws an exponential lifetime, and executions and cancels always pick the resting order whose
+    lifetime runs out first. An execution fills part of the order with partial_fill_rate, after
+    which the order draws a new lifetime. Trade breaks reverse one of the recent executions and
+    trades. When no order is resting, or nothing is left to break, an add is generated instead.
+    """
+
+    def __init__(
+        self,
+        symbols: int,
+        skew: float,
+        mix: dict[str, float],
+        lifetime: float,
+        partial_fill_rate: float,
+        long_form_rate: float,
+        seed: int,
+    ):
+        self.generator = random.Random(seed)
+        self.names: list[str] = symbol_names(symbols, self.generator)
+        self.symbol_weights: list[float] = list(
+            itertools.accumulate(1 / (rank + 1) ** skew for rank in range(symbols))
+        )
+        self.kinds: list[str] = list(mix)
+        self.kind_weights: list[float] = list(itertools.accumulate(mix.values()))
+        self.lifetime = lifetime
+        self.partial_fill_rate = partial_fill_rate
+        self.long_form_rate = long_form_rate
+        self.volumes: dict[str, int] = {}
+        self.counts: dict[str, int] = dict.fromkeys(DEFAULT_MIX, 0)
+        # (expiry, order id, remaining shares, symbol) of every resting order.
+        self.resting: list[tuple[float, int, int, str]] = []
+        self.next_order_id: int = FIRST_ORDER_ID
+        self.next_execution_id: int = 1
+        # (execution id, shares, symbol) of the most recent executions and trades not broken yet.
+        self.breakable: deque[tuple[int, int, str]] = deque(maxlen=BREAKABLE)
+
+    def records(self, start: int, count: int, messages: int) -> list[str]:
+        """Returns the records numbered start to start + count of a stream of messages records."""
+        generator = self.generator
+        kinds: list[str] = generator.choices(self.kinds, cum_weights=self.kind_weights, k=count)
+        symbols: list[str] = generator.choices(
+            self.names, cum_weights=self.symbol_weights, k=count
+        )
+        records: list[str] = []
+        for index, kind, symbol in zip(range(start, start + count), kinds, symbols):
+            time_stamp: int = SESSION_START + index * SESSION_LENGTH // messages
+            if kind in ("execute", "cancel") and not self.resting:
+                kind = "add"
+            if kind == "break" and not self.breakable:
+                kind = "add"
+            self.counts[kind] += 1
+            match kind:
+                case "add":
+                    records.append(self.add(index, time_stamp, symbol))
+                case "execute":
+                    records.append(self.execute(index, time_stamp))
+                case "cancel":
+                    _, order_id, shares, _ = heapq.heappop(self.resting)
+                    records.append(cancel_record(time_stamp, order_id, shares))
+                case "trade":
+                    records.append(self.trade(time_stamp, symbol))
+                case "break":
+                    records.append(self.break_trade(time_stamp))
+                case _:
+                    records.append(status_record(time_stamp, symbol))
+        return records
+
+    def add(self, index: int, time_stamp: int, symbol: str) -> str:
+        """Enters a new resting order."""
+        shares: int = lot_size(self.generator)
+        order_id: int = self.next_order_id
+        self.next_order_id += 1
+        self.volumes.setdefault(symbol, 0)
+        expiry: float = index + self.generator.expovariate(1 / self.lifetime)
+        heapq.heappush(self.resting, (expiry, order_id, shares, symbol))
+        long_form: bool = self.generator.random() < self.long_form_rate
+        return add_record(time_stamp, order_id, shares, symbol, price(self.generator), long_form)
+
+    def execute(self, index: int, time_stamp: int) -> str:
+        """Executes all or part of the resting order whose lifetime runs out first."""
+        _, order_id, shares, symbol = heapq.heappop(self.resting)
+        executed: int = shares
+        if shares > 1 and self.generator.random() < self.partial_fill_rate:
+            executed = self.generator.randrange(1, shares)
+            expiry: float = index + self.generator.expovariate(1 / self.lifetime)
+            heapq.heappush(self.resting, (expiry, order_id, shares - executed, symbol))
+        self.volumes[symbol] += executed
+        self.next_execution_id += 1
+        self.breakable.append((self.next_execution_id - 1, executed, symbol))
+        return execute_record(time_stamp, order_id, executed, self.next_execution_id - 1)
+
+    def trade(self, time_stamp: int, symbol: str) -> str:
+        """Trades against an order that was never displayed."""
+        shares: int = lot_size(self.generator)
+        self.volumes[symbol] = self.volumes.get(symbol, 0) + shares
+        self.next_order_id += 1
+        self.next_execution_id += 1
+        self.breakable.append((self.next_execution_id - 1, shares, symbol))
+        long_form: bool = self.generator.random() < self.long_form_rate
+        return trade_record(
+            time_stamp,
+            self.next_order_id - 1,
+            shares,
+            symbol,
+            price(self.generator),
+            self.next_execution_id - 1,
+            long_form,
+        )
+
+    def break_trade(self, time_stamp: int) -> str:
+        """Breaks one of the recent executions and trades, taking its shares off the volume."""
+        index: int = self.generator.randrange(len(self.breakable))
+        execution_id, shares, symbol = self.breakable[index]
+        del self.breakable[index]
+        self.volumes[symbol] -= shares
+        return break_record(time_stamp, execution_id)
+
+
+def truth_path(path: Path) -> Path:
+    """Ground truth of a generated dataset is kept next to it."""
+    return Path(f"{path}.truth.json")
+
+
+def load_truth(path: Path) -> dict:
+    """Reads the ground truth of a generated dataset."""
+    return json.loads(truth_path(path).read_text())
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    """Parses a message mix such as "add=0.4,execute=0.3,cancel=0.3". Missing kinds get 0."""
+    mix: dict[str, float] = dict.fromkeys(DEFAULT_MIX, 0.0)
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in mix:
+            raise ValueError(f"Unknown message kind {kind}")
+        mix[kind] = float(weight)
+    if mix["add"] <= 0 or any(weight < 0 for weight in mix.values()):
+        raise ValueError(text)
+    return mix
+
+
+def symbol_names(count: int, generator: random.Random) -> list[str]:
+    """Returns count distinct tickers of one to five capital letters."""
+    names: set[str] = set()
+    ordered: list[str] = []
+    while len(ordered) < count:
+        name: str = "".join(generator.choices(string.ascii_uppercase, k=generator.randint(1, 5)))
+        if name not in names:
+            names.add(name)
+            ordered.append(name)
+    return ordered
+
+
+def lot_size(generator: random.Random) -> int:
+    """Mostly round lots of 100 to 1000 shares, with some odd lots."""
+    if generator.random() < 0.1:
+        return generator.randrange(1, 100)
+    return generator.randrange(1, 11) * 100
+
+
+def price(generator: random.Random) -> int:
+    """A price in fixed-point with 4 implied decimals, between $1 and $500."""
+    return generator.randrange(1_0000, 500_0000, 100)
+
+
+def add_record(
+    time_stamp: int, order_id: int, shares: int, symbol: str, price: int, long_form: bool = False
+) -> str:
+    """Add Order, short form "A" or one of the long forms, "1" or "d" for odd order ids."""
+    if not long_form:
+        header: str = f"S{time_stamp:08d}A{format_order_id(order_id)}B"
+        return f"{header}{shares:06d}{symbol:<6}{price:010d}Y"
+    if order_id % 2:
+        header = f"S{time_stamp:08d}d{format_order_id(order_id)}B"
+        return f"{header}{shares:06d}{symbol:<8}{price:010d}Y"
+    header = f"S{time_stamp:08d}1{format_order_id(order_id)}B"
+    return f"{header}{shares:06d}{symbol:<8}{price:014d}YCBOE "
+
+
+def execute_record(time_stamp: int, order_id: int, shares: int, execution_id: int) -> str:
+    """Order Executed "E"."""
+    return (
+        f"S{time_stamp:08d}E{format_order_id(order_id)}{shares:06d}"
+        f"{format_order_id(execution_id)}"
+    )
+
+
+def cancel_record(time_stamp: int, order_id: int, shares: int) -> str:
+    """Order Cancel "X"."""
+    return f"S{time_stamp:08d}X{format_order_id(order_id)}{shares:06d}"
+
+
+def trade_record(
+    time_stamp: int,
+    order_id: int,
+    shares: int,
+    symbol: str,
+    price: int,
+    execution_id: int,
+    long_form: bool = False,
+) -> str:
+    """Trade, short form "P" or long form "r", an execution against an order that was never
+    displayed.
+    """
+    if long_form:
+        return (
+            f"S{time_stamp:08d}r{format_order_id(order_id)}B{shares:06d}{symbol:<8}"
+            f"{price:010d}{format_order_id(execution_id)}"
+        )
+    return (
+        f"S{time_stamp:08d}P{format_order_id(order_id)}B{shares:06d}{symbol:<6}{price:010d}"
+        f"{format_order_id(execution_id)}"
+    )
+
+
+def break_record(time_stamp: int, execution_id: int) -> str:
+    """Trade Break "B", reverses an earlier execution or trade."""
+    return f"S{time_stamp:08d}B{format_order_id(execution_id)}"
+
+
+def status_record(time_stamp: int, symbol: str) -> str:
+    """Trading Status "H", one of the message types that don't affect volume."""
+    return f"S{time_stamp:08d}H{symbol:<8}T0  "
+
+
+if __name__ == "__main__":
+    main()
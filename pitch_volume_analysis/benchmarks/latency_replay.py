@@ -0,0 +1,250 @@
+from array import array
+from pathlib import Path
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.decoder import TIME_STAMP, iter_records
+from pitch_volume_analysis.core.reader import read_blocks
+import argparse
+import bisect
+import json
+import math
+import time
+
+PERCENTILES: list[float] = [50, 99, 99.9]
+
+# Most messages drained and computed at once. A message counts as applied once its batch is,
+# so this bounds how far a latency can overstate the time the message itself took.
+BATCH: int = 64
+# Waits shorter than this are spun rather than slept, sleep overshoots by about this much.
+SPIN_SECONDS: float = 0.0005
+
+
+def main():
+    """Replays a dataset on its own timestamps and reports how long messages wait to be applied."""
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    DATASET_PATH: Path = Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", type=Path, default=DATASET_PATH, help="Dataset to replay")
+    parser.add_argument(
+        "-x",
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Replay speed, 1 is real time, 10 is ten times faster and 0 is as fast as possible",
+    )
+    parser.add_argument("-n", "--messages", type=int, help="Replays only the first N messages")
+    parser.add_argument(
+        "-b", "--batch", type=int, default=BATCH, help="Most messages computed at once"
+    )
+    parser.add_argument(
+        "--behind-ms",
+        type=float,
+        default=1.0,
+        help="Wait in milliseconds after which the analyzer counts as falling behind",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds of feed time per point of the backlog series",
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Also writes the report as JSON")
+    args = parser.parse_args()
+
+    records, time_stamps = load_records(args.file, args.messages)
+    if not records:
+        print("No messages to replay.")
+        return
+    feed_seconds: float = (time_stamps[-1] - time_stamps[0]) / 1000
+    if args.speed:
+        seconds: float = feed_seconds / args.speed
+        print(f"Replaying {len(records)} messages at {args.speed:g}x, taking {seconds:.1f}s")
+    else:
+        print(f"Replaying {len(records)} messages as fast as possible")
+
+    report: dict = replay(
+        Analyzer(args.file),
+        records,
+        time_stamps,
+        args.speed,
+        args.batch,
+        args.behind_ms / 1000,
+        round(args.interval * 1000),
+    )
+    print_report(report)
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nReport written to {args.output}")
+
+
+def load_records(path: Path, limit: int | None = None) -> tuple[list[bytes], array]:
+    """Reads every record of a dataset and its timestamp, in milliseconds since midnight."""
+    records: list[bytes] = []
+    for block in read_blocks(path):
+        records.extend(record for record in iter_records(block) if len(record) > TIME_STAMP.stop)
+        if limit is not None and len(records) >= limit:
+            del records[limit:]
+            break
+    return records, array("q", [int(record[TIME_STAMP]) for record in records])
+
+
+def replay(
+    analyzer: Analyzer,
+    records: list[bytes],
+    time_stamps: array,
+    speed: float = 1.0,
+    batch: int = BATCH,
+    behind: float = 0.001,
+    interval: int = 1000,
+) -> dict:
+    """Feeds records to the analyzer as they arrive and measures each message's latency.
+
+    Message i arrives (time_stamps[i] - time_stamps[0]) / speed after the start, and at once for
+    a speed of 0. Like a consumer draining its socket, the analyzer computes every message that
+    has arrived, at most batch at a time, and a message's latency runs from its arrival until its
+    batch is computed. Timestamps must be in order, as they are in a PITCH session.
+
+    The backlog, messages that have arrived but are not computed yet, is kept as its largest
+    value in every interval milliseconds of feed time. The analyzer falls behind at the first
+    message that waits longer than behind seconds before it starts being computed.
+    """
+    clock = time.perf_counter
+    compute_records = analyzer.compute_records
+    count: int = len(records)
+    first: int = time_stamps[0]
+    # Seconds of wall time per millisecond of feed time.
+    scale: float = 1 / (1000 * speed) if speed else 0.0
+    # End and finish time of every computed batch.
+    batch_ends: array = array("q")
+    batch_finishes: array = array("d")
+    backlog: list[tuple[int, int]] = []
+    # Points cover whole intervals of the session clock.
+    point_end: int = (first // interval + 1) * interval
+    point_backlog: int = 0
+    fell_behind: dict | None = None
+    processed: int = 0
+    arrived: int = 0
+
+    start: float = clock()
+    while processed < count:
+        now: float = clock()
+        arrival: float = start + (time_stamps[processed] - first) * scale
+        if now < arrival:
+            wait_until(arrival)
+            now = clock()
+        if not scale:
+            arrived = count
+        else:
+            feed_now: float = first + (now - start) / scale
+            arrived = bisect.bisect_right(time_stamps, feed_now, arrived)
+        arrived = max(arrived, processed + 1)
+
+        waiting: int = arrived - processed
+        if fell_behind is None and now - arrival > behind:
+            fell_behind = {
+                "message": processed,
+                "time_stamp": format_time_stamp(time_stamps[processed]),
+                "wait_seconds": now - arrival,
+                "backlog": waiting,
+            }
+        time_stamp: int = time_stamps[processed]
+        if time_stamp >= point_end:
+            backlog.append((point_end - interval, point_backlog))
+            point_end += (time_stamp - point_end) // interval * interval + interval
+            point_backlog = 0
+        point_backlog = max(point_backlog, waiting)
+
+        end: int = min(arrived, processed + batch)
+        compute_records(records[processed:end])
+        batch_finishes.append(clock())
+        batch_ends.append(end)
+        processed = end
+    wall_seconds: float = clock() - start
+    backlog.append((point_end - interval, point_backlog))
+
+    latencies: array = array("d")
+    processed = 0
+    for end, finish in zip(batch_ends, batch_finishes):
+        latencies.extend(
+            finish - start - (time_stamps[index] - first) * scale
+            for index in range(processed, end)
+        )
+        processed = end
+    ordered: list[float] = sorted(latencies)
+
+    return {
+        "speed": speed,
+        "messages": count,
+        "batch": batch,
+        "wall_seconds": wall_seconds,
+        "feed_seconds": (time_stamps[-1] - first) / 1000,
+        "messages_per_second": count / wall_seconds if wall_seconds else 0.0,
+        "latency_seconds": {
+            **{
+                f"p{percentile:g}": nearest_rank(ordered, percentile) for percentile in PERCENTILES
+            },
+            "max": ordered[-1],
+        },
+        "max_backlog": max(waiting for _, waiting in backlog),
+        "fell_behind": fell_behind,
+        "backlog": [
+            {"time_stamp": format_time_stamp(time_stamp), "backlog": waiting}
+            for time_stamp, waiting in backlog
+        ],
+    }
+
+
+def wait_until(deadline: float) -> None:
+    """Sleeps, then spins for the last moment, until perf_counter reaches deadline."""
+    remaining: float = deadline - time.perf_counter()
+    if remaining > SPIN_SECONDS:
+        time.sleep(remaining - SPIN_SECONDS)
+    while time.perf_counter() < deadline:
+        pass
+
+
+def nearest_rank(ordered: list[float], percentile: float) -> float:
+    """Percentile of sorted values by the nearest rank method."""
+    # Rounding first keeps float error from pushing an exact rank up by one.
+    rank: int = math.ceil(round(percentile / 100 * len(ordered), 9))
+    return ordered[max(rank - 1, 0)]
+
+
+def format_time_stamp(time_stamp: int) -> str:
+    """Formats milliseconds since midnight as HH:MM:SS.mmm."""
+    seconds, milliseconds = divmod(time_stamp, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def print_report(report: dict, rows: int = 20) -> None:
+    """Prints latency percentiles, where the analyzer fell behind and the backlog over time."""
+    print(f"\n{report['messages']} messages in {report['wall_seconds']:.3f}s", end="")
+    print(f" ({report['messages_per_second']:,.0f} msgs/sec)")
+    for name, seconds in report["latency_seconds"].items():
+        print(f"{name:>8}{seconds * 1e6:14,.1f} us")
+
+    fell_behind: dict | None = report["fell_behind"]
+    if fell_behind is None:
+        print("\nKept up with the feed.")
+    else:
+        print(
+            f"\nFell behind at message {fell_behind['message']} ({fell_behind['time_stamp']}),"
+            f" waiting {fell_behind['wait_seconds'] * 1e3:.3f} ms"
+            f" with {fell_behind['backlog']} messages backlogged."
+        )
+
+    # Long series are shown as the largest backlog of evenly sized groups of points.
+    series: list[dict] = report["backlog"]
+    step: int = math.ceil(len(series) / rows)
+    print(f"\nMax backlog {report['max_backlog']} messages")
+    for index in range(0, len(series), step):
+        group: list[dict] = series[index : index + step]
+        print(f"{group[0]['time_stamp']:>14}{max(point['backlog'] for point in group):10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from functools import partial
+from pitch_volume_analysis.core.ledger import OrderLedger, decode_order_id, format_order_id
+from pitch_volume_analysis.core.spill import SpillingLedger
+import argparse
+import time
+import tracemalloc
+
+
+def main():
+    """Compares the memory held by resting orders in a dict of parsed messages, in OrderLedger and
+    in a SpillingLedger bounded to --resident orders.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--orders", type=int, default=1_000_000, help="Resting orders")
+    parser.add_argument(
+        "-r",
+        "--resident",
+        type=int,
+        default=65535,
+        help="Orders the SpillingLedger keeps in memory, the rest spill to disk",
+    )
+    args = parser.parse_args()
+
+    order_ids: list[str] = [format_order_id(36**8 + index * 7919) for index in range(args.orders)]
+
+    print(f"Resting orders: {args.orders}")
+    print(f"{'':18}{'held':>10}{'peak':>10}{'time':>9}")
+    results: list[tuple[int, int]] = []
+    ledgers: list = [
+        ("dict of messages", fill_message_ledger),
+        ("OrderLedger", fill_order_ledger),
+        ("SpillingLedger", partial(fill_spilling_ledger, args.resident)),
+    ]
+    for name, function in ledgers:
+        held, peak = measure_memory(function, order_ids)
+        elapsed: float = measure_time(function, order_ids)
+        results.append((held, peak))
+        print(f"{name:18}{held / args.orders:10.1f}{peak / args.orders:10.1f}{elapsed:8.2f}s")
+    print(f"Held bytes/order reduction: {results[0][0] / results[1][0]:.2f}x")
+    print(f"Peak bytes/order reduction: {results[0][1] / results[1][1]:.2f}x")
+    # SQLite allocates its page cache outside of tracemalloc, it is capped at CACHE_KIB.
+    print(f"SpillingLedger held bytes, page cache aside: {results[2][0]}")
+
+
+def measure_memory(function, order_ids: list[str]) -> tuple[int, int]:
+    """Returns the traced bytes held by a finished ledger and the peak while building it."""
+    tracemalloc.start()
+    ledger = function(order_ids)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del ledger
+    return held, peak
+
+
+def measure_time(function, order_ids: list[str]) -> float:
+    """Returns the wall time of building a ledger without tracing overhead."""
+    start: float = time.perf_counter()
+    function(order_ids)
+    return time.perf_counter() - start
+
+
+def fill_message_ledger(order_ids: list[str]) -> dict:
+    """The original ledger, which kept every parsed add order message."""
+    ledger: dict = {}
+    for order_id in order_ids:
+        entry: str = f"S28800011A{order_id}S000100SH    0000619200Y"
+        ledger[entry[10:22]] = [
+            entry[1:9],
+            entry[9],
+            entry[10:22],
+            entry[22],
+            entry[23:29],
+            entry[29:35].strip(),
+            entry[35:45],
+            entry[45],
+        ]
+    return ledger
+
+
+def fill_order_ledger(order_ids: list[str]) -> OrderLedger:
+    """The compact ledger, keyed by int order id and storing shares and a symbol id."""
+    ledger = OrderLedger()
+    for order_id in order_ids:
+        ledger.add(decode_order_id(order_id), 100, 0)
+    return ledger
+
+
+def fill_spilling_ledger(max_resident: int, order_ids: list[str]) -> SpillingLedger:
+    """The bounded ledger, which spills the longest resting orders to disk."""
+    ledger = SpillingLedger(max_resident)
+    for order_id in order_ids:
+        ledger.add(decode_order_id(order_id), 100, 0)
+    ledger.close()
+    return ledger
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+from pathlib import Path
+from pitch_volume_analysis.benchmarks import generator
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.publish import VolumePublisher, VolumeReader
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+
+def main():
+    """Measures what publishing volumes to shared memory costs the analyzer, with and without
+    processes reading snapshots of them.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f", "--file", type=Path, help="Generated dataset to use, written by generator.py"
+    )
+    parser.add_argument(
+        "-n", "--messages", type=int, default=1_000_000, help="Messages to generate without -f"
+    )
+    parser.add_argument(
+        "--readers", type=int, default=2, help="Processes reading snapshots during the run"
+    )
+    parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=0.001,
+        help="Seconds each reader waits between snapshots, 0 reads them back to back",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_path: Path = args.file or Path(directory, "generated.txt")
+        if args.file is None:
+            print(f"Generating {args.messages} messages...")
+            generator.generate(dataset_path, args.messages)
+        truth: dict = generator.load_truth(dataset_path)
+        name: str = f"pva-benchmark-{os.getpid()}"
+
+        baseline: float = min(run(dataset_path) for _ in range(args.repeat))
+        published: float = min(run(dataset_path, name) for _ in range(args.repeat))
+        readers: list[dict] = []
+        read: float = float("inf")
+        for _ in range(args.repeat):
+            seconds, readers = run_with_readers(
+                dataset_path, name, args.readers, args.interval, truth
+            )
+            read = min(read, seconds)
+        publish_seconds, symbols = time_publish(dataset_path, name)
+
+    messages: int = truth["messages"]
+    # Readers share the cores with the analyzer, on a single core they slow it down by the time
+    # they take to copy their snapshots.
+    print(f"Messages: {messages}, symbols: {symbols}, cores: {os.cpu_count()}")
+    print(f"{'':28}{'msgs/s':>12}{'overhead':>10}")
+    for label, seconds in [
+        ("no publisher", baseline),
+        ("publisher", published),
+        (f"publisher, {args.readers} readers", read),
+    ]:
+        overhead: float = (seconds / baseline - 1) * 100
+        print(f"{label:28}{messages / seconds:12,.0f}{overhead:9.1f}%")
+    print(f"One publish of {symbols} symbols: {publish_seconds * 1e6:.1f} us")
+    for index, reader in enumerate(readers):
+        print(
+            f"Reader {index}: {reader['snapshots'] / reader['seconds']:,.0f} snapshots/s, "
+            f"{reader['retries']} retries, final snapshot correct: {reader['correct']}"
+        )
+
+
+def run(dataset_path: Path, name: str | None = None) -> float:
+    """Returns the wall time of the python engine, publishing to name when one is given."""
+    my_analyzer = Analyzer(dataset_path)
+    if name is not None:
+        my_analyzer.publisher = VolumePublisher(name)
+    start: float = time.perf_counter()
+    my_analyzer.read_file()
+    elapsed: float = time.perf_counter() - start
+    if name is not None:
+        my_analyzer.publisher.close()
+    return elapsed
+
+
+def run_with_readers(
+    dataset_path: Path, name: str, count: int, interval: float, truth: dict
+) -> tuple[float, list[dict]]:
+    """Runs the python engine while count processes read snapshots until it finishes."""
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.publisher = VolumePublisher(name)
+    results = multiprocessing.Queue()
+    started = multiprocessing.Barrier(count + 1)
+    processes: list = [
+        multiprocessing.Process(
+            target=read_snapshots, args=(name, interval, truth["volumes"], started, results)
+        )
+        for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    started.wait()
+    start: float = time.perf_counter()
+    my_analyzer.read_file()
+    elapsed: float = time.perf_counter() - start
+    my_analyzer.publisher.publish(my_analyzer, finished=True)
+    readers: list[dict] = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    my_analyzer.publisher.close()
+    return elapsed, readers
+
+
+def read_snapshots(name: str, interval: float, volumes: dict[str, int], started, results) -> None:
+    """Reads a snapshot every interval seconds until the publisher finishes, then reports how
+    it went.
+    """
+    with VolumeReader(name) as reader:
+        started.wait()
+        start: float = time.perf_counter()
+        # The publisher may have finished before the reader attached.
+        snapshot: dict[str, int] = reader.snapshot()
+        snapshots: int = 1
+        while not reader.finished:
+            if interval:
+                time.sleep(interval)
+            snapshot = reader.snapshot()
+            snapshots += 1
+        results.put(
+            {
+                "snapshots": snapshots,
+                "seconds": time.perf_counter() - start,
+                "retries": reader.retries,
+                "correct": list(snapshot.items()) == list(volumes.items()),
+            }
+        )
+
+
+def time_publish(dataset_path: Path, name: str, repeat: int = 1000) -> tuple[float, int]:
+    """Returns the time of one publish of the dataset's final volumes and its symbol count."""
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.read_file()
+    publisher = VolumePublisher(name)
+    start: float = time.perf_counter()
+    for _ in range(repeat):
+        publisher.publish(my_analyzer)
+    elapsed: float = (time.perf_counter() - start) / repeat
+    publisher.close()
+    return elapsed, len(my_analyzer.symbols)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+from pathlib import Path
+from pitch_volume_analysis.core.decoder import (
+    ADD_ORDER,
+    EXECUTION_IDS,
+    LAYOUTS,
+    MESSAGE_TYPE,
+    ORDER_ID,
+    TRADE_BREAK_TYPE,
+)
+from pitch_volume_analysis.core.feed import parse_address
+import argparse
+import asyncio
+import functools
+import socket
+import zlib
+
+# Paced units send one batch of records every TICK seconds.
+TICK: float = 0.01
+
+
+def main():
+    """Serves a PITCH dataset as one or more live feed units over TCP or Unix sockets."""
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    DATASET_PATH: Path = Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-f", "--file", type=Path, default=DATASET_PATH, help="Dataset to serve")
+    parser.add_argument(
+        "-l",
+        "--listen",
+        nargs="+",
+        default=["127.0.0.1:9000"],
+        help="host:port or unix:path of every feed unit, the dataset is split across them",
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        default=0,
+        help="Messages per second sent by each unit, 0 sends as fast as the client reads",
+    )
+    parser.add_argument(
+        "--once", action="store_true", help="Exits after every unit has served one client"
+    )
+    args = parser.parse_args()
+
+    units: list[bytes] = split_units(args.file.read_bytes(), len(args.listen))
+    try:
+        asyncio.run(serve(units, args.listen, args.rate, args.once, print_addresses))
+    except KeyboardInterrupt:
+        pass
+
+
+def print_addresses(addresses: list[str]) -> None:
+    for address in addresses:
+        print(f"Serving feed unit on {address}", flush=True)
+
+
+async def serve(
+    units: list[bytes], addresses: list[str], rate: float = 0, once: bool = False, ready=None
+) -> None:
+    """Serves each unit on its address. Every client of a unit gets the unit from its start.
+
+    ready is called with the bound addresses once every unit listens, port 0 picks a free port.
+    With once, serving stops after every unit has been sent to one client.
+    """
+    finished: list[asyncio.Event] = [asyncio.Event() for _ in units]
+    servers: list[asyncio.AbstractServer] = []
+    try:
+        for data, address, done in zip(units, addresses, finished):
+            handler = functools.partial(send_unit, data, rate, done)
+            family, target = parse_address(address)
+            if family == socket.AF_UNIX:
+                servers.append(await asyncio.start_unix_server(handler, target))
+            else:
+                servers.append(await asyncio.start_server(handler, *target))
+        if ready is not None:
+            ready([bound_address(server) for server in servers])
+        if once:
+            for done in finished:
+                await done.wait()
+        else:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+    finally:
+        for server in servers:
+            server.close()
+
+
+def bound_address(server: asyncio.AbstractServer) -> str:
+    """Address a client connects to, in the form parse_address reads."""
+    name = server.sockets[0].getsockname()
+    if isinstance(name, str):
+        return f"unix:{name}"
+    return f"{name[0]}:{name[1]}"
+
+
+async def send_unit(
+    data: bytes,
+    rate: float,
+    done: asyncio.Event,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+) -> None:
+    """Sends a unit to one client and closes the connection, which ends the client's feed."""
+    try:
+        await send(writer, data, rate)
+        writer.close()
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+    finally:
+        done.set()
+
+
+async def send(writer: asyncio.StreamWriter, data: bytes, rate: float) -> None:
+    """Writes the records of data at rate messages per second, or all at once for a rate of 0.
+
+    Batches are scheduled against the start of the unit, so slow ticks are caught up on.
+    """
+    view: memoryview = memoryview(data)
+    if not rate:
+        writer.write(view)
+        await writer.drain()
+        return
+    loop = asyncio.get_running_loop()
+    batch: int = max(1, round(rate * TICK))
+    deadline: float = loop.time()
+    start: int = 0
+    while start < len(data):
+        end: int = start
+        for _ in range(batch):
+            end = data.find(b"\n", end) + 1
+            if not end:
+                end = len(data)
+                break
+        writer.write(view[start:end])
+        await writer.drain()
+        start = end
+        deadline += batch / rate
+        delay: float = deadline - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def split_units(data: bytes, count: int) -> list[bytes]:
+    """Splits a dataset into count feed units, partitioned by symbol like exchange units are.
+
+    Adds and trades go to the unit of their symbol, and executions and cancels follow their order
+    to the unit it was added on. Trade breaks follow the execution they break. Other messages,
+    and messages for orders that were never added, are dealt out in turn. Each unit keeps the
+    order of the dataset, so every order's messages arrive in order and the units add up to the
+    dataset's volumes.
+    """
+    if count == 1:
+        return [data]
+    units: list[list[bytes]] = [[] for _ in range(count)]
+    order_units: dict[bytes, int] = {}
+    execution_units: dict[bytes, int] = {}
+    for index, record in enumerate(data.split(b"\n")):
+        if not record:
+            continue
+        layout: tuple | None = LAYOUTS.get(record[MESSAGE_TYPE])
+        if layout is None:
+            unit: int | None = index % count
+            if record[MESSAGE_TYPE] == TRADE_BREAK_TYPE:
+                unit = execution_units.get(record[ORDER_ID].upper(), unit)
+            units[unit].append(record)
+            continue
+        kind, _, symbol_field = layout
+        # Order ids are base 36, so they are matched regardless of case.
+        order_id: bytes = record[ORDER_ID].upper()
+        unit = order_units.get(order_id)
+        if unit is None:
+            if symbol_field is None:
+                unit = index % count
+            else:
+                unit = zlib.crc32(record[symbol_field].rstrip()) % count
+            if kind == ADD_ORDER:
+                order_units[order_id] = unit
+        execution_field: slice | None = EXECUTION_IDS.get(record[MESSAGE_TYPE])
+        if execution_field is not None:
+            execution_units[record[execution_field].upper()] = unit
+        units[unit].append(record)
+    return [b"\n".join(records) + b"\n" if records else b"" for records in units]
+
+
+if __name__ == "__main__":
+    main()
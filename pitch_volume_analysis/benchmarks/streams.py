@@ -0,0 +1,45 @@
+from pathlib import Path
+from pitch_volume_analysis.benchmarks import generator
+import random
+
+# Streams shared by differential.py and the tests that compare engines.
+
+
+def random_stream(path: Path, messages: int, seed: int) -> Path:
+    """Writes a generated stream with random parameters, then disorders it.
+
+    Some records are dropped, so executions and cancels reference orders that were never added,
+    some adds are repeated, including while the order still rests, and some neighbouring records
+    are swapped, so an order can be executed before it is added. Some executions and trades are
+    broken, a dropped execution leaves its break with nothing to reverse.
+    """
+    rng = random.Random(seed)
+    mix: dict[str, float] = {kind: rng.random() for kind in generator.DEFAULT_MIX}
+    mix["add"] += 0.1
+    mix["break"] *= 0.05
+    generator.generate(
+        path,
+        messages,
+        symbols=rng.randint(1, 300),
+        skew=rng.uniform(0, 1.5),
+        mix=mix,
+        lifetime=rng.uniform(1, 5000),
+        partial_fill_rate=rng.random(),
+        long_form_rate=rng.random(),
+        seed=seed,
+    )
+
+    records: list[bytes] = path.read_bytes().splitlines(keepends=True)
+    disorder: float = rng.uniform(0, 0.05)
+    shuffled: list[bytes] = []
+    for record in records:
+        chance: float = rng.random()
+        if chance < disorder:
+            continue
+        shuffled.append(record)
+        if chance < 2 * disorder and record[9:10] in (b"A", b"1", b"d"):
+            shuffled.insert(rng.randint(0, len(shuffled)), record)
+        elif chance < 3 * disorder and len(shuffled) > 1:
+            shuffled[-2], shuffled[-1] = shuffled[-1], shuffled[-2]
+    path.write_bytes(b"".join(shuffled))
+    return path
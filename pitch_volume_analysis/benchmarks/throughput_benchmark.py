@@ -0,0 +1,261 @@
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from pitch_volume_analysis.benchmarks import generator
+from pitch_volume_analysis.core import engines as registry
+from pitch_volume_analysis.core.symbol_analyzer import SymbolAnalyzer
+from pitch_volume_analysis.core.vectorized import numpy
+import argparse
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Every registered engine, and SymbolAnalyzer computing a single symbol.
+ENGINES: list[str] = [*registry.ENGINES, "symbol"]
+
+# Message types measure_types reports a cost for.
+PHASES: list[str] = ["add", "execute", "cancel", "trade", "other"]
+
+
+def main():
+    """Measures messages/sec, peak RSS and per-message-type cost of every engine."""
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    RESULTS_PATH: Path = Path(PROJECT_ROOT, "data", "logs", "throughput.json")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-f", "--file", type=Path, help="Generated dataset to use, written by generator.py"
+    )
+    parser.add_argument(
+        "-n", "--messages", type=int, default=1_000_000, help="Messages to generate without -f"
+    )
+    parser.add_argument(
+        "-e", "--engines", nargs="+", choices=ENGINES, default=ENGINES, help="Engines to measure"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=os.cpu_count(), help="Workers of the parallel engine"
+    )
+    parser.add_argument(
+        "--type-messages",
+        type=int,
+        default=200_000,
+        help="Messages per dataset used to measure the cost of each message type, 0 skips it",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("-o", "--output", type=Path, default=RESULTS_PATH, help="Results file")
+    parser.add_argument(
+        "-b", "--baseline", type=Path, help="Earlier results file to compare messages/sec with"
+    )
+    args = parser.parse_args()
+    engines: list[str] = [
+        engine
+        for engine in args.engines
+        if engine == "symbol" or registry.engine_available(engine)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        dataset_path: Path = args.file or Path(directory, "generated.txt")
+        if args.file is None:
+            print(f"Generating {args.messages} messages...")
+            generator.generate(dataset_path, args.messages)
+        truth: dict = generator.load_truth(dataset_path)
+        dataset_bytes: int = os.path.getsize(dataset_path)
+        phase_paths: dict[str, Path] = {}
+        if args.type_messages:
+            phase_paths = write_phase_datasets(Path(directory), args.type_messages)
+
+        results: list[dict] = []
+        for engine in engines:
+            print(f"Measuring {engine}...")
+            result: dict = measure(engine, dataset_path, truth, args.workers, args.repeat)
+            if phase_paths:
+                result["per_type_ns"] = measure_types(
+                    engine, phase_paths, args.type_messages, args.workers, args.repeat
+                )
+            results.append(result)
+
+    report: dict = {
+        "commit": current_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__ if numpy else None,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "dataset": {
+            "path": str(args.file) if args.file else None,
+            "messages": truth["messages"],
+            "bytes": dataset_bytes,
+            "parameters": truth["parameters"],
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+
+    print_report(results)
+    if args.baseline is not None:
+        print_comparison(results, json.loads(args.baseline.read_text())["results"])
+    print(f"\nResults written to {args.output}")
+
+
+def measure(engine: str, dataset_path: Path, truth: dict, workers: int, repeat: int) -> dict:
+    """Runs an engine over the dataset repeat times, each in a fresh process."""
+    symbol: str = next(iter(truth["volumes"]))
+    runs: list[dict] = [run_isolated(engine, dataset_path, workers, symbol) for _ in range(repeat)]
+    seconds: float = min(run["seconds"] for run in runs)
+    volumes: dict[str, int] = runs[0]["volumes"]
+    if engine == "symbol":
+        correct: bool = volumes == {symbol: truth["volumes"][symbol]}
+    else:
+        correct = list(volumes.items()) == list(truth["volumes"].items())
+    return {
+        "engine": engine,
+        "seconds": seconds,
+        "messages_per_second": truth["messages"] / seconds,
+        "peak_rss_bytes": max(run["peak_rss_bytes"] for run in runs),
+        "correct": correct,
+    }
+
+
+def measure_types(
+    engine: str, phase_paths: dict[str, Path], count: int, workers: int, repeat: int
+) -> dict[str, float]:
+    """Returns the nanoseconds an engine spends on each message type.
+
+    Adds, trades and skipped messages are timed on datasets holding only that type. Executions
+    and cancels need resting orders, so their cost is the time of a dataset of adds followed by
+    one full execution or cancel of each, minus the time of the adds alone.
+    """
+    seconds: dict[str, float] = {}
+    for phase, path in phase_paths.items():
+        seconds[phase] = min(
+            run_isolated(engine, path, workers, "AAPL")["seconds"] for _ in range(repeat)
+        )
+    return {
+        "add": seconds["add"] / count * 1e9,
+        "execute": (seconds["execute"] - seconds["add"]) / count * 1e9,
+        "cancel": (seconds["cancel"] - seconds["add"]) / count * 1e9,
+        "trade": seconds["trade"] / count * 1e9,
+        "other": seconds["other"] / count * 1e9,
+    }
+
+
+def write_phase_datasets(directory: Path, count: int) -> dict[str, Path]:
+    """Writes the single message type datasets measure_types times."""
+    time_stamp: int = generator.SESSION_START
+    first_id: int = generator.FIRST_ORDER_ID
+    order_ids: range = range(first_id, first_id + count)
+    adds: list[str] = [
+        generator.add_record(time_stamp, order_id, 100, "AAPL", 1_000_000)
+        for order_id in order_ids
+    ]
+    records: dict[str, list[str]] = {
+        "add": adds,
+        "execute": adds
+        + [
+            generator.execute_record(time_stamp, order_id, 100, order_id - first_id + 1)
+            for order_id in order_ids
+        ],
+        "cancel": adds
+        + [generator.cancel_record(time_stamp, order_id, 100) for order_id in order_ids],
+        "trade": [
+            generator.trade_record(
+                time_stamp, order_id, 100, "AAPL", 1_000_000, order_id - first_id + 1
+            )
+            for order_id in order_ids
+        ],
+        "other": [generator.status_record(time_stamp, "AAPL")] * count,
+    }
+    paths: dict[str, Path] = {}
+    for phase, lines in records.items():
+        paths[phase] = Path(directory, f"{phase}.txt")
+        paths[phase].write_text("\n".join(lines) + "\n")
+    return paths
+
+
+def run_isolated(engine: str, dataset_path: Path, workers: int, symbol: str) -> dict:
+    """Runs an engine in a freshly spawned process, so peak RSS only counts that run."""
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(run_engine, engine, dataset_path, workers, symbol).result()
+
+
+def run_engine(engine: str, dataset_path: Path, workers: int, symbol: str) -> dict:
+    """Times a single run of an engine. Runs inside the process spawned by run_isolated."""
+    if engine == "symbol":
+        # SymbolAnalyzer prints every event of its symbol.
+        my_analyzer = SymbolAnalyzer(symbol, dataset_path)
+    else:
+        my_analyzer = registry.create_engine(engine, dataset_path, workers)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start: float = time.perf_counter()
+        my_analyzer.read_file()
+        seconds: float = time.perf_counter() - start
+
+    if engine == "symbol":
+        volumes: dict[str, int] = {symbol: my_analyzer.stock_volume}
+    else:
+        volumes = my_analyzer.symbol_book
+    return {"seconds": seconds, "volumes": volumes, "peak_rss_bytes": peak_rss()}
+
+
+def peak_rss() -> int:
+    """Returns the peak resident set size of this process and its finished children in bytes."""
+    peak: int = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_commit() -> str | None:
+    """Returns the commit the benchmark ran on, so results can be compared between commits."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: list[dict]) -> None:
+    """Prints the results as a table."""
+    print(f"\n{'engine':10}{'msgs/sec':>12}{'peak RSS':>12}{'correct':>9}", end="")
+    print("".join(f"{phase + ' ns':>12}" for phase in PHASES))
+    for result in results:
+        print(
+            f"{result['engine']:10}{result['messages_per_second']:12,.0f}"
+            f"{result['peak_rss_bytes'] / 2**20:10.1f}MB{str(result['correct']):>9}",
+            end="",
+        )
+        per_type: dict = result.get("per_type_ns", {})
+        print("".join(f"{per_type[phase]:12.1f}" if per_type else "" for phase in PHASES))
+
+
+def print_comparison(results: list[dict], baseline: list[dict]) -> None:
+    """Prints the messages/sec of each engine relative to an earlier results file."""
+    before: dict[str, float] = {
+        result["engine"]: result["messages_per_second"] for result in baseline
+    }
+    print("\nCompared to baseline:")
+    for result in results:
+        if result["engine"] in before:
+            ratio: float = result["messages_per_second"] / before[result["engine"]]
+            print(f"{result['engine']:10}{ratio:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,96 @@
-import operator
 import sys
+import time
 import traceback
+from array import array
+from pathlib import Path
+from typing import Iterable
+
+from pitch_volume_analysis.core.cache import ColumnCache, load_or_build_cache
+from pitch_volume_analysis.core.decoder import (
+    ADD_ORDER,
+    EXECUTION_IDS,
+    LAYOUTS,
+    ORDER_EXECUTED,
+    TRADE,
+    TRADE_BREAK,
+    TRADE_BREAK_TYPE,
+    get_message_symbol,
+    get_message_type,
+    iter_records,
+    parse_order_message,
+)
+from pitch_volume_analysis.core.executions import ExecutionIndex
+from pitch_volume_analysis.core.ledger import (
+    EMPTY,
+    HASH_MULTIPLIER,
+    TOMBSTONE,
+    OrderLedger,
+    decode_order_id,
+    format_order_id,
+)
+from pitch_volume_analysis.core.metrics import Metrics
+from pitch_volume_analysis.core.reader import complete_end, read_blocks
+from pitch_volume_analysis.core.symbols import SymbolTable
 
 
 class Analyzer:
     """Analyzer class computes all stock symbols. Scans order messages and computes stock volume.
     Provides a function to display the top ten stock symbols based on volume.
+
+    Analyzer is the reference engine. Faster engines subclass it and are registered in
+    engines.py, and their symbol_book must match its own exactly.
     """
 
     dataset_path: str = None
-    ledger: dict = {}
-    symbol_book: dict = {}
+    ledger: OrderLedger = None
+    # Recent executions that counted volume, reversed by trade breaks.
+    executions: ExecutionIndex = None
+    symbols: SymbolTable = None
+    metrics: Metrics = None
+    stop_requested: bool = False
+    # Byte offset of the dataset up to which records are computed.
+    offset: int = 0
+    # Optional checkpoint writer checked after every block, see checkpoint.py.
+    checkpointer = None
+    # Optional shared memory publisher of the volumes updated after every block, see publish.py.
+    publisher = None
+    # Optional observer called with every decoded message before it is applied, see tracer.py.
+    tracer = None
 
-    def __init__(self, dataset_path: str):
+    def __init__(self, dataset_path):
+        """dataset_path is a path or an open binary stream such as sys.stdin.buffer."""
         self.dataset_path = dataset_path
+        self.ledger = OrderLedger()
+        self.executions = ExecutionIndex()
+        self.symbols = SymbolTable()
+        self.metrics = Metrics()
 
-    def read_file(self) -> None:
-        """Main event loop. Reads data file and preforms operations to determine stock volume."""
-        try:
-            with open(self.dataset_path, "r") as file:
-                for line in file:
-                    entry: str = line.strip()
-                    message_type: str = self.get_message_type(entry)
-                    message: list[str] = self.parse_order_message(entry, message_type)
-                    try:
-                        message_symbol: str = self.get_message_symbol(message, message_type)
-                    except:
-                        print("Unrecognized message format! Skipping...")
-                        continue
+    @property
+    def symbol_book(self) -> dict[str, int]:
+        """Snapshot of symbol -> volume in order of first appearance."""
+        return dict(self.symbols.items())
 
-                    # "X" and "E" messages do not have stock symbols.
-                    if message_type != "X" and message_type != "E":
-                        self.track_symbol(message)
+    def read_file(self, use_mmap: bool = True, stop: int | None = None) -> None:
+        """Main event loop. Reads data file and preforms operations to determine stock volume.
 
-                    self.compute_message(message, message_type, message_symbol)
+        The file is memory mapped and consumed in large blocks of complete records.
+        Set use_mmap to False to read the file through a reused readinto buffer instead.
+        Reading starts at offset and ends at stop, or at the end of the file.
+        """
+        metrics: Metrics = self.metrics
+        checkpointer = self.checkpointer
+        try:
+            blocks = read_blocks(
+                self.dataset_path, use_mmap=use_mmap, start=self.offset, stop=stop
+            )
+            for block in metrics.timed_blocks(blocks):
+                self.process_batch(block)
+                self.offset += len(block)
+                if checkpointer is not None:
+                    checkpointer.check(self)
+                if self.stop_requested:
+                    break
+            metrics.finish()
 
         except FileNotFoundError:
             raise FileNotFoundError(f"File {self.dataset_path} not found")
@@ -50,193 +107,435 @@ class Analyzer:
             traceback.print_exc()
             sys.exit(1)
 
+    def follow(self, poll_seconds: float = 1.0, on_update=None) -> None:
+        """Computes records as they are appended to the dataset until a stop is requested.
+
+        Only complete records are read, a record still being written waits for the next poll.
+        on_update is called after every read that found new records. Following ends when the
+        file gets shorter than what was read, as it does when it is truncated or rotated.
+        """
+        while not self.stop_requested:
+            end: int = complete_end(self.dataset_path, self.offset)
+            if end < self.offset:
+                print("The dataset got shorter, it was truncated or replaced. Stopped following.")
+                return
+            if end == self.offset:
+                time.sleep(poll_seconds)
+                continue
+            self.read_file(stop=end)
+            if on_update is not None:
+                on_update()
+
+    def restore(self, state: dict) -> None:
+        """Continues a fresh analyzer from a checkpoint read by checkpoint.load_checkpoint."""
+        symbol_ids: list[int] = [self.symbols.intern(name.encode()) for name in state["symbols"]]
+        volumes: array = self.symbols.volumes
+        for symbol_id, volume in zip(symbol_ids, state["volumes"]):
+            volumes[symbol_id] = volume
+        # Other ledgers, such as a spilling one, are kept and filled in place.
+        if type(self.ledger) is OrderLedger:
+            self.ledger = OrderLedger(max(1024, 2 * len(state["order_ids"])))
+        add = self.ledger.add
+        for order_id, shares, symbol_id in zip(
+            state["order_ids"], state["shares"], state["symbol_ids"]
+        ):
+            add(order_id, shares, symbol_ids[symbol_id])
+        # Executions keep their positions in the ring, so they expire as if never interrupted.
+        self.executions.count = state["execution_count"] - len(state["execution_ids"])
+        self.executions.extend(
+            state["execution_ids"],
+            state["execution_shares"],
+            array("i", [symbol_ids[symbol_id] for symbol_id in state["execution_symbol_ids"]]),
+        )
+        self.offset = state["offset"]
+
+    def set_execution_window(self, window: int) -> None:
+        """Keeps the window most recent executions for trade breaks, set before reading."""
+        self.executions = type(self.executions)(window)
+
+    def spill_ledger(self, max_resident: int, directory=None) -> None:
+        """Bounds the ledger to max_resident orders in memory, spilling the rest to directory.
+
+        Orders already resting move into the new ledger. Volumes come out the same, see spill.py.
+        """
+        from pitch_volume_analysis.core.spill import SpillingLedger
+
+        ledger = SpillingLedger(max_resident, directory)
+        for order_id, shares, symbol_id in self.ledger.items():
+            ledger.add(order_id, shares, symbol_id)
+        self.ledger = ledger
+        self.metrics.spilling_ledger = ledger
+
+    def read_feeds(self, sockets: list) -> None:
+        """Computes stock volume from live feed units, received concurrently on one event loop.
+
+        Each socket is a connected feed unit, see feed.connect. A single unit can also be passed
+        to the constructor and read with read_file. Units are read until they all close or a stop
+        is requested.
+        """
+        # asyncio is only imported by runs that read feeds, it takes longer to import than a
+        # small file takes to compute.
+        import asyncio
+        from pitch_volume_analysis.core.feed import consume_feeds
+
+        try:
+            asyncio.run(consume_feeds(self, sockets))
+            self.metrics.finish()
+
+        except IndexError:
+            print("Error: Incorrect file format or unrecognized order message")
+            sys.exit(1)
+        except ValueError:
+            print("Value calculation error detected!")
+            print(
+                "Check the dataset for following proper PITCH transaction rules and/or correctness of math operations within code."
+            )
+            sys.exit(1)
+
+    def read_cached(self, cache_root) -> None:
+        """Computes stock volume from the columnar cache of the dataset, building it on first use.
+
+        Repeat runs over an unchanged dataset map the cached columns and skip text parsing.
+        """
+        if not Path(self.dataset_path).exists():
+            raise FileNotFoundError(f"File {self.dataset_path} not found")
+        columns: ColumnCache = load_or_build_cache(self.dataset_path, cache_root)
+        try:
+            self.compute_columns(columns)
+        finally:
+            columns.close()
+        # Cached columns only hold the messages used for volume, their types are not counted.
+        self.metrics.messages += len(columns)
+        self.metrics.track_ledger(len(self.ledger))
+        self.metrics.finish()
+
+    def compute_columns(self, columns: ColumnCache) -> None:
+        """Computes stock volume from already decoded message columns."""
+        apply_message = self.apply_message
+        index_execution = self.index_execution
+        tracer = self.tracer
+        for kind, order_id, shares, symbol_id, execution_id in zip(
+            columns.kinds,
+            columns.order_ids,
+            columns.shares,
+            self.column_symbol_ids(columns),
+            columns.execution_ids,
+        ):
+            if tracer is not None:
+                tracer(kind, order_id, shares, symbol_id)
+            changed: int = apply_message(kind, order_id, shares, symbol_id)
+            if execution_id >= 0 and (changed >= 0 or kind == ORDER_EXECUTED):
+                index_execution(execution_id, shares, changed)
+
+    def column_symbol_ids(self, columns: ColumnCache):
+        """Interns the cache's symbols and returns its symbol id column in this analyzer's ids."""
+        symbol_ids: list[int] = [self.symbols.intern(name.encode()) for name in columns.symbols]
+        # Only remap symbol ids when this analyzer interned symbols before the cache's.
+        if symbol_ids == list(range(len(symbol_ids))):
+            return columns.symbol_ids
+        symbol_ids.append(-1)
+        return [symbol_ids[symbol_id] for symbol_id in columns.symbol_ids]
+
+    def request_stop(self) -> None:
+        """Asks read_file to stop after the block it is working on, keeping the results so far.
+
+        Safe to call from a signal handler.
+        """
+        self.stop_requested = True
+
+    def process_batch(self, buffer: bytes | bytearray | memoryview) -> None:
+        """Computes stock volume for a batch of newline separated PITCH records held in memory.
+
+        Files, standard input and feed sockets are all read as batches through here, and code
+        using Analyzer as a library can push the blocks it already holds. The batch must hold
+        whole records, the last one may go without its newline. The batch's records are applied
+        in one tight loop, then the metrics and the publisher are updated once.
+        """
+        self.compute_block(buffer)
+        self.metrics.end_block(len(buffer), len(self.ledger))
+        if self.publisher is not None:
+            self.publisher.publish(self)
+
+    def compute_block(self, block: bytes | bytearray | memoryview) -> None:
+        """Computes stock volume for a block of newline separated PITCH records.
+
+        Sampled blocks time splitting and counting apart from decoding and computing.
+        """
+        metrics: Metrics = self.metrics
+        if not metrics.sampling:
+            records: list[bytes] = iter_records(block)
+            metrics.count_records(records)
+            self.compute_records(records)
+            return
+        start: float = time.perf_counter()
+        records = iter_records(block)
+        metrics.count_records(records)
+        parsed: float = time.perf_counter()
+        self.compute_records(records)
+        metrics.add_phase("parse", parsed - start)
+        metrics.add_phase("compute", time.perf_counter() - parsed)
+
+    def compute_records(self, records: Iterable[bytes]) -> None:
+        """Decodes raw PITCH records with the shared byte level decoder and computes stock volume.
+
+        Records whose message type is not used for volume are skipped before any field is sliced.
+        Executions that count volume are indexed by execution id, so trade breaks can reverse them.
+
+        Messages are applied inline, with the ledger probed in the loop and the executions of
+        the batch indexed at once. Subclasses that override how messages are applied, tracers
+        and other ledgers get every message through apply_message instead, see apply_records.
+        """
+        cls: type = type(self)
+        if (
+            self.tracer is not None
+            or type(self.ledger) is not OrderLedger
+            or type(self.executions) is not ExecutionIndex
+            or cls.apply_message is not Analyzer.apply_message
+            or cls.index_execution is not Analyzer.index_execution
+            or cls.break_trade is not Analyzer.break_trade
+        ):
+            self.apply_records(records)
+            return
+
+        layouts: dict = LAYOUTS
+        execution_fields: dict = EXECUTION_IDS
+        symbol_ids: dict = self.symbols.ids
+        intern = self.symbols.intern
+        volumes: array = self.symbols.volumes
+        ledger: OrderLedger = self.ledger
+        keys: array = ledger.keys
+        remaining: array = ledger.shares
+        order_symbols: array = ledger.symbols
+        mask: int = ledger.mask
+        index_executions = self.executions.extend
+        # Executions that counted volume wait here and join the index once per batch.
+        execution_ids: array = array("q")
+        execution_shares: array = array("q")
+        execution_symbol_ids: array = array("i")
+        try:
+            for record in records:
+                message_type: bytes = record[9:10]
+                layout: tuple | None = layouts.get(message_type)
+                if layout is None:
+                    if message_type == TRADE_BREAK_TYPE:
+                        # The execution a break names may still be waiting.
+                        index_executions(execution_ids, execution_shares, execution_symbol_ids)
+                        del execution_ids[:], execution_shares[:], execution_symbol_ids[:]
+                        self.break_trade(int(record[10:22], 36))
+                    continue
+                kind, shares_field, symbol_field = layout
+                order_id: int = int(record[10:22], 36)
+                shares: int = int(record[shares_field])
+                # "X" and "E" messages do not have stock symbols.
+                if symbol_field is None:
+                    symbol_id: int = -1
+                else:
+                    symbol: bytes = record[symbol_field].rstrip()
+                    symbol_id = symbol_ids.get(symbol)
+                    if symbol_id is None:
+                        symbol_id = intern(symbol)
+                    if kind == ADD_ORDER:
+                        ledger.add(order_id, shares, symbol_id)
+                        # Growing the ledger replaces its arrays.
+                        if ledger.keys is not keys:
+                            keys, remaining = ledger.keys, ledger.shares
+                            order_symbols, mask = ledger.symbols, ledger.mask
+                        continue
+                    volumes[symbol_id] += shares
+
+                # OrderLedger.find and OrderLedger.reduce, inlined.
+                position: int = (order_id * HASH_MULTIPLIER >> 32) & mask
+                key: int = keys[position]
+                while key != order_id and key != EMPTY:
+                    position = (position + 1) & mask
+                    key = keys[position]
+                if key == order_id:
+                    if kind == ORDER_EXECUTED:
+                        symbol_id = order_symbols[position]
+                        volumes[symbol_id] += shares
+                    shares_left: int = remaining[position] - shares
+                    if shares_left == 0:
+                        keys[position] = TOMBSTONE
+                        ledger.size -= 1
+                    else:
+                        remaining[position] = shares_left
+
+                if symbol_id >= 0:
+                    execution_ids.append(int(record[execution_fields[message_type]], 36))
+                    execution_shares.append(shares)
+                    execution_symbol_ids.append(symbol_id)
+        finally:
+            index_executions(execution_ids, execution_shares, execution_symbol_ids)
+
+    def apply_records(self, records: Iterable[bytes]) -> None:
+        """Computes stock volume like compute_records, applying each message through
+        apply_message and index_execution, and showing it to the tracer first.
+        """
+        layouts: dict = LAYOUTS
+        execution_fields: dict = EXECUTION_IDS
+        symbol_ids: dict = self.symbols.ids
+        intern = self.symbols.intern
+        apply_message = self.apply_message
+        index_execution = self.index_execution
+        tracer = self.tracer
+        for record in records:
+            message_type: bytes = record[9:10]
+            layout: tuple | None = layouts.get(message_type)
+            if layout is None:
+                if message_type == TRADE_BREAK_TYPE:
+                    execution_id: int = int(record[10:22], 36)
+                    if tracer is not None:
+                        tracer(TRADE_BREAK, execution_id, 0, -1)
+                    apply_message(TRADE_BREAK, execution_id, 0, -1)
+                continue
+            kind, shares_field, symbol_field = layout
+            # "X" and "E" messages do not have stock symbols.
+            if symbol_field is None:
+                symbol_id: int = -1
+            else:
+                symbol: bytes = record[symbol_field].rstrip()
+                symbol_id = symbol_ids.get(symbol)
+                if symbol_id is None:
+                    symbol_id = intern(symbol)
+            order_id: int = int(record[10:22], 36)
+            shares: int = int(record[shares_field])
+            if tracer is not None:
+                tracer(kind, order_id, shares, symbol_id)
+            changed: int = apply_message(kind, order_id, shares, symbol_id)
+            if changed >= 0 or kind == ORDER_EXECUTED:
+                execution_id = int(record[execution_fields[message_type]], 36)
+                index_execution(execution_id, shares, changed)
+
+    def apply_message(self, kind: int, order_id: int, shares: int, symbol_id: int) -> int:
+        """Applies a single decoded order message to the ledger and symbol volumes.
+
+        The ledger keeps the remaining shares and symbol id of each resting order,
+        so executions update volume by array index without looking up a symbol.
+        Trade breaks pass the execution id they break as order_id, see break_trade.
+        Returns the id of the symbol whose volume changed, or -1 if no volume changed.
+        """
+        if kind == ADD_ORDER:
+            self.ledger.add(order_id, shares, symbol_id)
+            return -1
+
+        volumes: array = self.symbols.volumes
+        if kind == TRADE:
+            volumes[symbol_id] += shares
+        elif kind == TRADE_BREAK:
+            return self.break_trade(order_id)
+        else:
+            symbol_id = -1
+
+        position: int = self.ledger.find(order_id)
+        if position < 0:
+            return symbol_id
+
+        if kind == ORDER_EXECUTED:
+            symbol_id = self.ledger.symbols[position]
+            volumes[symbol_id] += shares
+
+        self.ledger.reduce(position, shares)
+        return symbol_id
+
+    def index_execution(self, execution_id: int, shares: int, symbol_id: int) -> None:
+        """Indexes an applied execution or trade by its execution id for trade breaks.
+
+        symbol_id is what apply_message returned, -1 for executions that counted no volume.
+        """
+        if symbol_id >= 0:
+            self.executions.add(execution_id, shares, symbol_id)
+
+    def break_trade(self, execution_id: int) -> int:
+        """Takes the shares of a broken execution off its symbol's volume.
+
+        Breaks of executions that counted no volume, or that expired from the execution index,
+        are ignored. Returns the id of the symbol whose volume changed, or -1.
+        """
+        execution: tuple[int, int] | None = self.executions.pop(execution_id)
+        if execution is None:
+            return -1
+        shares, symbol_id = execution
+        self.symbols.volumes[symbol_id] -= shares
+        return symbol_id
+
     def get_message_type(self, entry: str) -> str:
         """Finds message type and return it's value."""
-        return entry[9]
+        return get_message_type(entry)
 
     def get_message_symbol(self, message: list[str], message_type: str) -> str:
         """Parses message and returns it's stock symbol."""
-        match message_type:
-            case "E":
-                symbol = None
-            case "X":
-                symbol = None
-            case default:
-                symbol: str = message[5]
-        return symbol
-
-    # TODO add more types
+        return get_message_symbol(message, message_type)
+
     def parse_order_message(self, entry: str, type: str) -> list[str]:
-        """Reads in entry string and returns a list called a message.
+        """Reads in entry string and returns a list called a message, see decoder."""
+        return parse_order_message(entry, type)
 
-        The message returned can vary based on message type.
-        The list returned contains indexed components based on Cboe PITCH specifications.
+    def compute_message(self, message: list[str], message_type: str, message_symbol: str) -> None:
+        """Evaluates message attributes and preforms operations to track order volume in the symbol book.
 
-        Using a match statement structure, will allow for easy addition of additional PITCH order messages.
+        Accepts a message produced by parse_order_message and applies it through apply_message.
+        Messages of types that are not used for volume are ignored.
         """
-        message: list[str] = []
-        match (type):
-            case "A":  # Add Order (short)
-                time_stamp: str = entry[1:9]
-                message_type: str = entry[9]
-                order_id: str = entry[10:22]
-                side_indicator: str = entry[22]
-                shares: str = entry[23:29]
-                stock_symbol: str = entry[29:35].strip()
-                price: str = entry[35:45]
-                reserved: str = entry[45]
-                message = [
-                    time_stamp,
-                    message_type,
-                    order_id,
-                    side_indicator,
-                    shares,
-                    stock_symbol,
-                    price,
-                    reserved,
-                ]
-            case "1":  # Add Order (extended)
-                time_stamp: str = entry[1:9]
-                message_type: str = entry[9]
-                order_id: str = entry[10:22]
-                side_indicator: str = entry[22]
-                shares: str = entry[23:29]
-                stock_symbol: str = entry[29:37].strip()
-                price: str = entry[37:51]
-                display: str = entry[51]
-                participant_id: str = entry[52:56]
-                customer_indicator: str = entry[56]
-                message = [
-                    time_stamp,
-                    message_type,
-                    order_id,
-                    side_indicator,
-                    shares,
-                    stock_symbol,
-                    price,
-                    display,
-                    participant_id,
-                    customer_indicator,
-                ]
-            case "E":  # Order executed
-                time_stamp: str = entry[1:9]
-                message_type: str = entry[9]
-                order_id: str = entry[10:22]
-                executed_shares: str = entry[22:28]
-                execution_id: str = entry[28:40]
-                message = [time_stamp, message_type, order_id, executed_shares, execution_id]
-            case "X":  # Order cancel
-                time_stamp: str = entry[1:9]
-                message_type: str = entry[9]
-                order_id: str = entry[10:22]
-                canceled_shares: str = entry[22:28]
-                message = [time_stamp, message_type, order_id, canceled_shares]
-            case "P":  # Trade (short)
-                time_stamp: str = entry[1:9]
-                message_type: str = entry[9]
-                order_id: str = entry[10:22]
-                side_indicator: str = entry[22]
-                shares: str = entry[23:29]
-                stock_symbol: str = entry[29:35].strip()
-                price: str = entry[35:45]
-                execution_id: str = entry[45:57]
-                message = [
-                    time_stamp,
-                    message_type,
-                    order_id,
-                    side_indicator,
-                    shares,
-                    stock_symbol,
-                    price,
-                    execution_id,
-                ]
-        return message
-
-    def compute_message(self, message: list[str], message_type: str, message_symbol: str) -> None:
-        """Evaluates message attributes and preforms operations to track order volume in the symbol book."""
-        order_id: str = message[2]
-
-        # Check to see if order is already in the ledger, if not then enter it.
-        if order_id not in self.ledger:
-            match message_type:
-                case "P":
-                    current_volume: int = self.symbol_book[message_symbol]
-                    self.symbol_book[message_symbol] = current_volume + int(message[4])
-                case default:
-                    self.ledger[order_id] = message
-
-        # Update ledger if order message is found in the ledger.
-        elif order_id in self.ledger:
-            self.update_ledger_shares(message, message_type, message_symbol, order_id)
+        if message_type == "B":
+            self.break_trade(decode_order_id(message[2]))
+            return
+        layout: tuple | None = LAYOUTS.get(message_type.encode())
+        if layout is None:
+            return
+        kind, shares_field, symbol_field = layout
+        if symbol_field is None:
+            shares: int = int(message[3])
+            symbol_id: int = -1
+        else:
+            shares = int(message[4])
+            symbol_id = self.symbols.intern(message_symbol.encode())
+        changed: int = self.apply_message(kind, decode_order_id(message[2]), shares, symbol_id)
+        if kind == ORDER_EXECUTED or kind == TRADE:
+            # The execution id is the last field of executions and trades.
+            self.index_execution(decode_order_id(message[-1]), shares, changed)
 
     def update_ledger_shares(
         self, message: list[str], message_type: str, message_symbol: str, order_id: str
     ) -> None:
         """Based on message type, this function will preform operations to update shares in the ledger."""
-        old_message: list = self.ledger[order_id]
-        old_message_symbol: str = old_message[5]
-
-        match message_type:
-            case "X":
-                shares: str = old_message[4]
-                canceled_shares: str = message[3]
-
-                shares_left: int = int(shares) - int(canceled_shares)
-                if shares_left == 0:
-                    del self.ledger[order_id]
-                else:
-                    old_message[4] = shares_left
-                    self.ledger[order_id] = old_message
-
-            case "E":
-                shares: str = old_message[4]
-                executed_shares: str = message[3]
-
-                current_volume: int = self.symbol_book[old_message_symbol]
-                self.symbol_book[old_message_symbol] = current_volume + int(executed_shares)
-                shares_left: int = int(shares) - int(executed_shares)
-                if shares_left == 0:
-                    del self.ledger[order_id]
-                else:
-                    old_message[4] = shares_left
-                    self.ledger[order_id] = old_message
-
-            case "P":
-                shares: str = old_message[4]
-                executed_shares: str = message[4]
-
-                current_volume: int = self.symbol_book[message_symbol]
-                self.symbol_book[message_symbol] = current_volume + int(executed_shares)
-                shares_left: int = int(shares) - int(executed_shares)
-                if shares_left == 0:
-                    del self.ledger[order_id]
-                else:
-                    old_message[4] = shares_left
-                    self.ledger[order_id] = old_message
+        if decode_order_id(order_id) in self.ledger:
+            self.compute_message(message, message_type, message_symbol)
 
     def print_ledger(self) -> None:
         """Prints out the current state of the ledger which tracks order messages."""
-        [print(f"{key}: {value}") for key, value in self.ledger.items()]
+        [print(f"{order_id}: {entry}") for order_id, entry in self.ledger_view().items()]
+
+    def ledger_view(self) -> dict[str, list]:
+        """Returns the resting orders as base36 order id -> [remaining shares, symbol]."""
+        return {
+            format_order_id(order_id): [shares, self.symbols.names[symbol_id]]
+            for order_id, shares, symbol_id in self.ledger.items()
+        }
 
     def track_symbol(self, message: list) -> None:
         """Determines if the stock symbol is found in symbol dictionary.
         If the symbol is not found, initialize a new one and enter it into the dictionary.
         """
-        symbol: str = message[5]
-        if symbol not in self.symbol_book:
-            self.symbol_book[symbol] = 0
+        self.symbols.intern(message[5].encode())
 
     def print_symbols(self) -> None:
         """Prints out the symbols found in the symbol book."""
-        for key, value in self.symbol_book.items():
+        for key, value in self.symbols.items():
             print(f"{key}: {value}")
 
     def get_top_ten_symbols(self) -> None:
         """Get the top ten stocks in descending order based on stock volume."""
-        print("*** Top Ten Symbols ***")
-        top_ten: dict = dict(
-            sorted(self.symbol_book.items(), key=operator.itemgetter(1), reverse=True)[:10]
-        )
-        for key, value in top_ten.items():
-            print(f"{key}: {value}")
-        print("")
+        self.get_top_symbols(10)
+
+    def get_top_symbols(self, count: int) -> None:
+        """Get the top count stocks in descending order based on stock volume."""
+        print_ranking(self.symbols.top(count), count)
+
+
+def print_ranking(ranking: list[tuple[str, int]], count: int, heading: str = "") -> None:
+    """Prints a ranking of (symbol, volume) pairs under a "Top N Symbols" banner."""
+    title: str = "Ten" if count == 10 else str(count)
+    print(f"*** Top {title} Symbols{heading} ***")
+    for key, value in ranking:
+        print(f"{key}: {value}")
+    print("")
@@ -0,0 +1,188 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from pitch_volume_analysis.core.analyzer import Analyzer, print_ranking
+from pitch_volume_analysis.core.engines import (
+    SERIAL_ENGINES,
+    choose_engine,
+    create_engine,
+    engine_available,
+)
+from pitch_volume_analysis.core.symbol_index import SUFFIX
+from pitch_volume_analysis.core.symbols import SymbolTable
+import argparse
+import glob
+import json
+import os
+import sys
+
+
+def main(argv: list[str] | None = None):
+    """Entry point of pva batch, analyzes many dataset files in a process pool."""
+    parser = argparse.ArgumentParser(prog="pva batch")
+    parser.add_argument(
+        "sources", nargs="+", help="Directories or glob patterns of the dataset files to analyze"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes, each analyzes one file at a time",
+    )
+    parser.add_argument(
+        "-t", "--top", type=int, default=10, help="Number of top symbols to display"
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=[*SERIAL_ENGINES, "auto"],
+        default="python",
+        help="Engine that computes volume, auto picks one for the size of each file",
+    )
+    parser.add_argument(
+        "-o", "--output", type=Path, help="Also writes per file and total volumes as JSON"
+    )
+    args = parser.parse_args(argv)
+
+    paths: list[Path] = expand_sources(args.sources)
+    if not paths:
+        print("No dataset files found.")
+        sys.exit(1)
+    if args.engine == "numpy" and not engine_available("numpy"):
+        print("NumPy is not installed, using the python engine instead.\n")
+        args.engine = "python"
+
+    results: list[dict] = run_batch(paths, args.workers, args.engine, print_file_result)
+    totals: SymbolTable = aggregate(results)
+    print("")
+    print_ranking(totals.top(args.top), args.top, f" across {len(results)} files")
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(batch_report(results, totals), indent=2))
+        print(f"Results written to {args.output}")
+
+
+def expand_sources(sources: list[str]) -> list[Path]:
+    """Lists the files of directories and glob patterns, each source sorted by name.
+
+    Hidden files and symbol indexes are left out, and files listed twice are kept once.
+    """
+    paths: list[Path] = []
+    for source in sources:
+        if Path(source).is_dir():
+            candidates = Path(source).iterdir()
+        else:
+            candidates = map(Path, glob.glob(source, recursive=True))
+        paths.extend(
+            sorted(
+                path
+                for path in candidates
+                if path.is_file() and not path.name.startswith(".") and path.suffix != SUFFIX
+            )
+        )
+    return list(dict.fromkeys(paths))
+
+
+def analyze_file(dataset_path: str, engine: str = "python") -> tuple[list[str], str, int, float]:
+    """Worker entry point. Computes one file and publishes its volumes in shared memory.
+
+    Returns the file's symbols, the name of the shared memory block holding their volumes, the
+    message count and the seconds taken. The caller reads the block and unlinks it.
+    """
+    if engine == "auto":
+        engine = choose_engine(dataset_path, SERIAL_ENGINES)[0]
+    my_analyzer: Analyzer = create_engine(engine, dataset_path)
+    my_analyzer.read_file()
+
+    volumes: array = my_analyzer.symbols.volumes
+    size: int = len(volumes) * volumes.itemsize
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    # The block outlives this worker's use of it, the caller unlinks it once it is read.
+    resource_tracker.unregister(block._name, "shared_memory")
+    block.buf[:size] = memoryview(volumes).cast("B")
+    block.close()
+    metrics = my_analyzer.metrics
+    return my_analyzer.symbols.names, block.name, metrics.messages, metrics.elapsed
+
+
+def read_volumes(names: list[str], block_name: str) -> SymbolTable:
+    """Copies a worker's volumes out of its shared memory block and unlinks the block."""
+    symbols = SymbolTable()
+    for name in names:
+        symbols.intern(name.encode())
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        with block.buf[: len(names) * symbols.volumes.itemsize] as view:
+            del symbols.volumes[:]
+            symbols.volumes.frombytes(view)
+    finally:
+        block.close()
+        block.unlink()
+    return symbols
+
+
+def run_batch(paths: list[Path], workers: int, engine: str = "python", on_result=None) -> list:
+    """Analyzes every file in a process pool and returns their results in the order given.
+
+    Each result is a dict of path, messages, seconds and the file's SymbolTable. on_result is
+    called with each result as soon as it and the results before it are in. Files that can't
+    be analyzed are reported and left out.
+    """
+    results: list[dict] = []
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as executor:
+        futures: list = [executor.submit(analyze_file, str(path), engine) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                names, block_name, messages, seconds = future.result()
+            except OSError as error:
+                print(f"Skipped {path}: {error}")
+                continue
+            except SystemExit:
+                # Analyzer already printed why the file could not be read.
+                print(f"Skipped {path}, it could not be analyzed.")
+                continue
+            result: dict = {
+                "path": path,
+                "messages": messages,
+                "seconds": seconds,
+                "symbols": read_volumes(names, block_name),
+            }
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def aggregate(results: list[dict]) -> SymbolTable:
+    """Adds up the volumes of every file. Symbols keep the order they first appear in."""
+    totals = SymbolTable()
+    volumes: array = totals.volumes
+    for result in results:
+        for name, volume in result["symbols"].items():
+            volumes[totals.intern(name.encode())] += volume
+    return totals
+
+
+def print_file_result(result: dict) -> None:
+    """Prints one line per file with its message count, time taken and top symbol."""
+    top: list[tuple[str, int]] = result["symbols"].top(1)
+    leader: str = f", top {top[0][0]}: {top[0][1]}" if top else ""
+    print(f"{result['path']}: {result['messages']} messages in {result['seconds']:.2f}s{leader}")
+
+
+def batch_report(results: list[dict], totals: SymbolTable) -> dict:
+    """Per file and total volumes of a batch, in the form written by --output."""
+    return {
+        "files": [
+            {
+                "path": str(result["path"]),
+                "messages": result["messages"],
+                "seconds": result["seconds"],
+                "volumes": dict(result["symbols"].items()),
+            }
+            for result in results
+        ],
+        "total": dict(totals.items()),
+    }
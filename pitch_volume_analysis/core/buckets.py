@@ -0,0 +1,404 @@
+from array import array
+from pathlib import Path
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.cache import ColumnCache
+from pitch_volume_analysis.core.decoder import (
+    ADD_ORDER,
+    EXECUTION_IDS,
+    LAYOUTS,
+    ORDER_EXECUTED,
+    PRICE_FIELDS,
+    TRADE_BREAK,
+    TRADE_BREAK_TYPE,
+)
+from pitch_volume_analysis.core.executions import DEFAULT_WINDOW, ExecutionIndex
+from pitch_volume_analysis.core.ledger import OrderLedger
+from typing import Iterable, Iterator
+import csv
+import json
+import os
+import struct
+import sys
+import tempfile
+
+FORMAT_VERSION: int = 1
+MAGIC: bytes = b"PVABUCKT"
+FORMATS: list[str] = ["csv", "binary"]
+# Interval suffix -> milliseconds, longest suffixes first so "ms" is not read as minutes.
+UNITS: dict[str, int] = {"ms": 1, "s": 1000, "m": 60_000, "h": 3_600_000}
+# Prices and notional are fixed-point with this many implied decimal places.
+PRICE_PLACES: int = 4
+PRICE_SCALE: int = 10**PRICE_PLACES
+
+
+class PricedLedger(OrderLedger):
+    """OrderLedger that also keeps the limit price of every resting order.
+
+    Executions don't carry a price, they fill at the price of the order they execute.
+    """
+
+    __slots__ = ("prices",)
+
+    def allocate(self, capacity: int) -> None:
+        super().allocate(capacity)
+        self.prices: array = array("q", [0]) * len(self.keys)
+
+    def add_priced(self, order_id: int, shares: int, symbol_id: int, price: int) -> bool:
+        """Enters a new resting order with its price. Returns False if the order id is resting."""
+        if not self.add(order_id, shares, symbol_id):
+            return False
+        self.prices[self.find(order_id)] = price
+        return True
+
+    def resize(self) -> None:
+        keys, prices = self.keys, self.prices
+        super().resize()
+        for position in range(len(keys)):
+            if keys[position] >= 0:
+                self.prices[self.find(keys[position])] = prices[position]
+
+
+class PricedExecutions(ExecutionIndex):
+    """ExecutionIndex that also keeps the time stamp and price of every execution, so a trade
+    break can be taken off the bucket its execution was added to.
+    """
+
+    __slots__ = ("time_stamps", "prices")
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        super().__init__(window)
+        self.time_stamps: array = array("i")
+        self.prices: array = array("q")
+
+    def add_priced(
+        self, execution_id: int, shares: int, symbol_id: int, price: int, time_stamp: int
+    ) -> None:
+        """Indexes an execution with the price it filled at and its time stamp."""
+        position: int = self.count % self.window
+        if position == len(self.prices):
+            self.prices.append(price)
+            self.time_stamps.append(time_stamp)
+        else:
+            self.prices[position] = price
+            self.time_stamps[position] = time_stamp
+        self.add(execution_id, shares, symbol_id)
+
+
+class VolumeBuckets:
+    """Executed shares, notional and trade count of every symbol in every time bucket.
+
+    Cells live in dense arrays laid out a bucket at a time, with width slots per bucket indexed
+    by symbol id. Buckets are appended as timestamps reach them and the width doubles when a
+    symbol id outgrows it, so adding a trade is an index computation and three array adds.
+    Notional is shares times the fixed-point price, see PRICE_PLACES.
+    """
+
+    __slots__ = ("bucket_ms", "first", "count", "width", "shares", "notional", "trades")
+
+    def __init__(self, bucket_ms: int, width: int = 64):
+        self.bucket_ms: int = bucket_ms
+        # Bucket number, time stamp // bucket_ms, of the first bucket held, and buckets held.
+        self.first: int = 0
+        self.count: int = 0
+        self.width: int = width
+        self.shares: array = array("q")
+        self.notional: array = array("q")
+        self.trades: array = array("i")
+
+    def add(self, symbol_id: int, time_stamp: int, shares: int, price: int) -> None:
+        """Adds a trade of shares at a fixed-point price to the symbol's bucket."""
+        bucket: int = time_stamp // self.bucket_ms - self.first
+        if bucket < 0 or bucket >= self.count or symbol_id >= self.width:
+            bucket = self.grow(time_stamp // self.bucket_ms, symbol_id)
+        index: int = bucket * self.width + symbol_id
+        self.shares[index] += shares
+        self.notional[index] += shares * price
+        self.trades[index] += 1
+
+    def remove(self, symbol_id: int, time_stamp: int, shares: int, price: int) -> None:
+        """Takes a broken trade back off the bucket add put it in."""
+        index: int = (time_stamp // self.bucket_ms - self.first) * self.width + symbol_id
+        self.shares[index] -= shares
+        self.notional[index] -= shares * price
+        self.trades[index] -= 1
+
+    def grow(self, bucket_number: int, symbol_id: int) -> int:
+        """Makes room for a symbol id in a bucket and returns the bucket's row."""
+        if symbol_id >= self.width:
+            width: int = self.width
+            while width <= symbol_id:
+                width *= 2
+            self.restride(width)
+        if not self.count:
+            self.first = bucket_number
+        # Feeds are in time order, but records from before the first bucket are kept too.
+        if bucket_number < self.first:
+            rows: int = self.first - bucket_number
+            for cells in (self.shares, self.notional, self.trades):
+                cells[0:0] = array(cells.typecode, [0]) * (rows * self.width)
+            self.first = bucket_number
+            self.count += rows
+        elif bucket_number >= self.first + self.count:
+            rows = bucket_number - self.first - self.count + 1
+            for cells in (self.shares, self.notional, self.trades):
+                cells.extend(array(cells.typecode, [0]) * (rows * self.width))
+            self.count += rows
+        return bucket_number - self.first
+
+    def restride(self, width: int) -> None:
+        """Changes the slots per bucket, keeping every cell. width can't drop below a used id."""
+        used: int = min(width, self.width)
+        for name in ("shares", "notional", "trades"):
+            cells: array = getattr(self, name)
+            restrided: array = array(cells.typecode, [0]) * (self.count * width)
+            for row in range(self.count):
+                restrided[row * width : row * width + used] = cells[
+                    row * self.width : row * self.width + used
+                ]
+            setattr(self, name, restrided)
+        self.width = width
+
+    def rows(self) -> Iterator[tuple[int, int, int, int, int]]:
+        """Yields (bucket start in ms, symbol id, shares, notional, trades) of every traded cell.
+
+        Cells come in time order, symbols of a bucket in order of first appearance.
+        """
+        width: int = self.width
+        shares, notional, trades = self.shares, self.notional, self.trades
+        for row in range(self.count):
+            start: int = (self.first + row) * self.bucket_ms
+            for index in range(row * width, row * width + width):
+                if trades[index]:
+                    yield start, index - row * width, shares[index], notional[index], trades[index]
+
+
+class BucketAnalyzer(Analyzer):
+    """Analyzer that also aggregates executed volume by symbol and time bucket, see VolumeBuckets.
+
+    Volume follows the same rules as Analyzer, so each symbol's buckets add up to its volume.
+    Executions trade at the price of the order they execute and trades at their own price.
+    Trade breaks take the trade off the bucket it was added to.
+    """
+
+    def __init__(self, dataset_path, bucket_ms: int):
+        super().__init__(dataset_path)
+        self.ledger = PricedLedger()
+        self.executions = PricedExecutions()
+        self.buckets = VolumeBuckets(bucket_ms)
+
+    def compute_records(self, records: Iterable[bytes]) -> None:
+        """Decodes records like Analyzer.compute_records, with their time stamps and prices."""
+        layouts: dict = LAYOUTS
+        price_fields: dict = PRICE_FIELDS
+        execution_fields: dict = EXECUTION_IDS
+        symbol_ids: dict = self.symbols.ids
+        intern = self.symbols.intern
+        apply_priced = self.apply_priced
+        tracer = self.tracer
+        for record in records:
+            message_type: bytes = record[9:10]
+            layout: tuple | None = layouts.get(message_type)
+            if layout is None:
+                if message_type == TRADE_BREAK_TYPE:
+                    execution_id: int = int(record[10:22], 36)
+                    if tracer is not None:
+                        tracer(TRADE_BREAK, execution_id, 0, -1)
+                    self.apply_message(TRADE_BREAK, execution_id, 0, -1)
+                continue
+            kind, shares_field, symbol_field = layout
+            if symbol_field is None:
+                symbol_id: int = -1
+                price: int = 0
+            else:
+                symbol: bytes = record[symbol_field].rstrip()
+                symbol_id = symbol_ids.get(symbol)
+                if symbol_id is None:
+                    symbol_id = intern(symbol)
+                price = int(record[price_fields[message_type]])
+            order_id: int = int(record[10:22], 36)
+            shares: int = int(record[shares_field])
+            if tracer is not None:
+                tracer(kind, order_id, shares, symbol_id)
+            execution_field: slice | None = execution_fields.get(message_type)
+            execution_id = -1 if execution_field is None else int(record[execution_field], 36)
+            apply_priced(kind, order_id, shares, symbol_id, price, int(record[1:9]), execution_id)
+
+    def compute_columns(self, columns: ColumnCache) -> None:
+        """Computes volume and buckets from cached columns, which keep time stamps and prices."""
+        apply_priced = self.apply_priced
+        tracer = self.tracer
+        for kind, order_id, shares, symbol_id, price, time_stamp, execution_id in zip(
+            columns.kinds,
+            columns.order_ids,
+            columns.shares,
+            self.column_symbol_ids(columns),
+            columns.prices,
+            columns.time_stamps,
+            columns.execution_ids,
+        ):
+            if tracer is not None:
+                tracer(kind, order_id, shares, symbol_id)
+            apply_priced(kind, order_id, shares, symbol_id, price, time_stamp, execution_id)
+
+    def apply_priced(
+        self,
+        kind: int,
+        order_id: int,
+        shares: int,
+        symbol_id: int,
+        price: int,
+        time_stamp: int,
+        execution_id: int = -1,
+    ) -> int:
+        """Applies a message with apply_message and adds the volume it executed to its bucket.
+
+        Executions that added volume are indexed under execution_id for trade breaks.
+        """
+        ledger: PricedLedger = self.ledger
+        if kind == ADD_ORDER:
+            ledger.add_priced(order_id, shares, symbol_id, price)
+            return -1
+        if kind == TRADE_BREAK:
+            return self.apply_message(kind, order_id, shares, symbol_id)
+        if kind == ORDER_EXECUTED:
+            position: int = ledger.find(order_id)
+            if position < 0:
+                return -1
+            price = ledger.prices[position]
+        symbol_id = self.apply_message(kind, order_id, shares, symbol_id)
+        if symbol_id >= 0:
+            self.buckets.add(symbol_id, time_stamp, shares, price)
+            if execution_id >= 0:
+                self.executions.add_priced(execution_id, shares, symbol_id, price, time_stamp)
+        return symbol_id
+
+    def break_trade(self, execution_id: int) -> int:
+        """Takes a broken execution off its symbol's volume and off its bucket."""
+        executions: PricedExecutions = self.executions
+        position: int = executions.find(execution_id)
+        if position < 0:
+            return -1
+        shares, symbol_id = executions.remove(position)
+        self.symbols.volumes[symbol_id] -= shares
+        self.buckets.remove(
+            symbol_id, executions.time_stamps[position], shares, executions.prices[position]
+        )
+        return symbol_id
+
+    def write_buckets(self, path: Path, format: str = "csv") -> None:
+        """Writes the buckets as CSV or in the binary format read by load_buckets."""
+        if format == "binary":
+            write_binary(path, self.buckets, self.symbols.names)
+        else:
+            write_csv(path, self.buckets, self.symbols.names)
+
+
+def parse_bucket_interval(text: str) -> int:
+    """Parses a bucket width such as "500ms", "1s", "1m" or "5m" into milliseconds."""
+    for suffix, milliseconds in UNITS.items():
+        if text.endswith(suffix):
+            interval: int = int(float(text[: -len(suffix)]) * milliseconds)
+            if interval <= 0:
+                raise ValueError(text)
+            return interval
+    raise ValueError(text)
+
+
+def format_time(milliseconds: int) -> str:
+    """Formats milliseconds since midnight as HH:MM:SS.mmm."""
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def format_fixed(value: int) -> str:
+    """Formats a fixed-point value with PRICE_PLACES decimals, without going through a float."""
+    whole, fraction = divmod(value, PRICE_SCALE)
+    return f"{whole}.{fraction:0{PRICE_PLACES}d}"
+
+
+def write_csv(path: Path, buckets: VolumeBuckets, names: list[str]) -> None:
+    """Writes one line per traded (symbol, bucket) with its shares, notional, trades and VWAP.
+
+    The VWAP is rounded half up to PRICE_PLACES decimals.
+    """
+
+    def lines():
+        for start, symbol_id, shares, notional, trades in buckets.rows():
+            vwap: int = (2 * notional + shares) // (2 * shares)
+            yield (
+                names[symbol_id],
+                format_time(start),
+                shares,
+                format_fixed(notional),
+                trades,
+                format_fixed(vwap),
+            )
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["symbol", "bucket_start", "shares", "notional", "trades", "vwap"])
+            writer.writerows(lines())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def write_binary(path: Path, buckets: VolumeBuckets, names: list[str]) -> None:
+    """Writes the cells as a JSON header and three native-endian arrays of buckets x symbols.
+
+    The arrays hold shares (int64), notional (int64) and trades (int32), with one column per
+    symbol in the header, so numpy.frombuffer(...).reshape(buckets, symbols) reads them back.
+    """
+    header: bytes = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "bucket_ms": buckets.bucket_ms,
+            "first": buckets.first,
+            "count": buckets.count,
+            "price_places": PRICE_PLACES,
+            "symbols": names,
+        }
+    ).encode()
+    width: int = buckets.width
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack("<I", len(header)))
+            file.write(header)
+            for cells in (buckets.shares, buckets.notional, buckets.trades):
+                for row in range(buckets.count):
+                    cells[row * width : row * width + len(names)].tofile(file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load_buckets(path: Path) -> tuple[VolumeBuckets, list[str]]:
+    """Reads a file written by write_binary back into VolumeBuckets and its symbol names."""
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a time bucket file")
+        (length,) = struct.unpack("<I", file.read(4))
+        meta: dict = json.loads(file.read(length))
+        if meta.get("version") != FORMAT_VERSION or meta["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written by another version or platform")
+        names: list[str] = meta["symbols"]
+        buckets = VolumeBuckets(meta["bucket_ms"], max(len(names), 1))
+        buckets.first = meta["first"]
+        buckets.count = meta["count"]
+        # Buckets only exist once a symbol traded, so count is 0 when there are no symbols.
+        for cells in (buckets.shares, buckets.notional, buckets.trades):
+            cells.fromfile(file, buckets.count * len(names))
+    return buckets, names
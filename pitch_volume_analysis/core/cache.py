@@ -0,0 +1,202 @@
+from array import array
+from pathlib import Path
+from pitch_volume_analysis.core.decoder import (
+    EXECUTION_IDS,
+    LAYOUTS,
+    PRICE_FIELDS,
+    TRADE_BREAK,
+    TRADE_BREAK_TYPE,
+    iter_records,
+)
+from pitch_volume_analysis.core.reader import read_blocks
+from pitch_volume_analysis.core.symbols import SymbolTable
+import hashlib
+import json
+import mmap
+import os
+import shutil
+
+FORMAT_VERSION: int = 2
+
+# Column name -> array typecode. Each column is stored as a raw native-endian file.
+COLUMNS: dict[str, str] = {
+    "kinds": "B",  # decoder kind
+    "time_stamps": "i",  # milliseconds since midnight
+    "order_ids": "q",  # base36 order id decoded to an int, the broken execution id for breaks
+    "shares": "q",
+    "symbol_ids": "i",  # index into the symbol dictionary, -1 for executions and cancels
+    "prices": "q",  # fixed-point, 4 implied decimal places, 0 when the message has no price
+    "execution_ids": "q",  # base36 execution id decoded to an int, -1 when the message has none
+}
+
+
+class ColumnCache:
+    """Memory mapped columns of a parsed PITCH dataset.
+
+    Only messages used to compute volume, trade breaks included, are stored. Every column is
+    exposed as a memoryview cast to its typecode, so it can be indexed, iterated or handed to
+    NumPy without copying.
+    symbols lists the symbol dictionary in order of first appearance.
+    """
+
+    def __init__(self, directory: Path, meta: dict):
+        self.directory = directory
+        self.meta = meta
+        self.symbols: list[str] = meta["symbols"]
+        self.count: int = meta["count"]
+        self.maps: list[mmap.mmap] = []
+        self.kinds: memoryview = self.map_column("kinds")
+        self.time_stamps: memoryview = self.map_column("time_stamps")
+        self.order_ids: memoryview = self.map_column("order_ids")
+        self.shares: memoryview = self.map_column("shares")
+        self.symbol_ids: memoryview = self.map_column("symbol_ids")
+        self.prices: memoryview = self.map_column("prices")
+        self.execution_ids: memoryview = self.map_column("execution_ids")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def map_column(self, name: str) -> memoryview:
+        """Maps one column file, empty columns can't be mapped so they get an empty array."""
+        typecode: str = COLUMNS[name]
+        if self.count == 0:
+            return memoryview(array(typecode))
+        with open(Path(self.directory, name), "rb") as file:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.maps.append(mapped)
+        return memoryview(mapped).cast(typecode)
+
+    def close(self) -> None:
+        """Releases the column views and unmaps the files."""
+        for name in COLUMNS:
+            getattr(self, name).release()
+        for mapped in self.maps:
+            mapped.close()
+        self.maps.clear()
+
+
+def cache_directory(dataset_path, cache_root) -> Path:
+    """Each dataset gets its own directory named after a hash of its resolved path."""
+    resolved: str = str(Path(dataset_path).resolve())
+    return Path(cache_root, hashlib.blake2b(resolved.encode(), digest_size=12).hexdigest())
+
+
+def hash_file(dataset_path) -> str:
+    """Returns the content hash that identifies a dataset."""
+    hasher = hashlib.blake2b(digest_size=20)
+    for block in read_blocks(dataset_path):
+        hasher.update(block)
+    return hasher.hexdigest()
+
+
+def load_cache(dataset_path, cache_root) -> ColumnCache | None:
+    """Returns the cache of a dataset, or None if there is none or the dataset changed.
+
+    A matching path, size and mtime is trusted without reading the dataset. If only the mtime
+    differs, the content hash decides and a match refreshes the stored mtime.
+    """
+    directory: Path = cache_directory(dataset_path, cache_root)
+    try:
+        meta: dict = json.loads(Path(directory, "meta.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+    stat: os.stat_result = os.stat(dataset_path)
+    if meta.get("version") != FORMAT_VERSION or meta["size"] != stat.st_size:
+        return None
+    if meta["mtime_ns"] != stat.st_mtime_ns:
+        if meta["content_hash"] != hash_file(dataset_path):
+            return None
+        meta["mtime_ns"] = stat.st_mtime_ns
+        write_meta(directory, meta)
+    return ColumnCache(directory, meta)
+
+
+def build_cache(dataset_path, cache_root) -> ColumnCache:
+    """Parses a dataset once and writes its columns and symbol dictionary to the cache.
+
+    Columns are appended to their files block by block, so memory stays bounded. The cache is
+    built in a temporary directory and moved into place when complete.
+    """
+    directory: Path = cache_directory(dataset_path, cache_root)
+    building: Path = directory.with_name(f"{directory.name}.{os.getpid()}.tmp")
+    shutil.rmtree(building, ignore_errors=True)
+    building.mkdir(parents=True)
+
+    stat: os.stat_result = os.stat(dataset_path)
+    hasher = hashlib.blake2b(digest_size=20)
+    symbols = SymbolTable()
+    files: dict = {name: open(Path(building, name), "wb") for name in COLUMNS}
+    count: int = 0
+    try:
+        for block in read_blocks(dataset_path):
+            hasher.update(block)
+            columns: dict[str, array] = {
+                name: array(typecode) for name, typecode in COLUMNS.items()
+            }
+            append_records(iter_records(block), columns, symbols)
+            count += len(columns["kinds"])
+            for name, column in columns.items():
+                column.tofile(files[name])
+    finally:
+        for file in files.values():
+            file.close()
+
+    meta: dict = {
+        "version": FORMAT_VERSION,
+        "dataset_path": str(Path(dataset_path).resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": hasher.hexdigest(),
+        "count": count,
+        "symbols": symbols.names,
+    }
+    write_meta(building, meta)
+    shutil.rmtree(directory, ignore_errors=True)
+    os.replace(building, directory)
+    return ColumnCache(directory, meta)
+
+
+def load_or_build_cache(dataset_path, cache_root) -> ColumnCache:
+    """Returns the cache of a dataset, building it first when it is missing or stale."""
+    return load_cache(dataset_path, cache_root) or build_cache(dataset_path, cache_root)
+
+
+def append_records(records, columns: dict[str, array], symbols: SymbolTable) -> None:
+    """Decodes records into the column arrays, interning symbols in order of first appearance."""
+    kinds, time_stamps, order_ids = columns["kinds"], columns["time_stamps"], columns["order_ids"]
+    shares, symbol_ids, prices = columns["shares"], columns["symbol_ids"], columns["prices"]
+    execution_ids: array = columns["execution_ids"]
+    for record in records:
+        message_type: bytes = record[9:10]
+        layout: tuple | None = LAYOUTS.get(message_type)
+        if layout is None:
+            if message_type == TRADE_BREAK_TYPE:
+                kinds.append(TRADE_BREAK)
+                time_stamps.append(int(record[1:9]))
+                order_ids.append(int(record[10:22], 36))
+                shares.append(0)
+                symbol_ids.append(-1)
+                prices.append(0)
+                execution_ids.append(-1)
+            continue
+        kind, shares_field, symbol_field = layout
+        kinds.append(kind)
+        time_stamps.append(int(record[1:9]))
+        order_ids.append(int(record[10:22], 36))
+        shares.append(int(record[shares_field]))
+        if symbol_field is None:
+            symbol_ids.append(-1)
+            prices.append(0)
+        else:
+            symbol_ids.append(symbols.intern(record[symbol_field].rstrip()))
+            prices.append(int(record[PRICE_FIELDS[message_type]]))
+        execution_field: slice | None = EXECUTION_IDS.get(message_type)
+        execution_ids.append(-1 if execution_field is None else int(record[execution_field], 36))
+
+
+def write_meta(directory: Path, meta: dict) -> None:
+    """Writes meta.json atomically."""
+    temporary: Path = Path(directory, "meta.json.tmp")
+    temporary.write_text(json.dumps(meta))
+    os.replace(temporary, Path(directory, "meta.json"))
@@ -0,0 +1,170 @@
+from array import array
+from pathlib import Path
+from pitch_volume_analysis.core.cache import cache_directory
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+
+FORMAT_VERSION: int = 2
+MAGIC: bytes = b"PVACKPT\n"
+# Bytes hashed at the start of the dataset and just before the offset to recognise it again.
+# Bytes between the two ranges are not checked.
+IDENTITY_BYTES: int = 65536
+
+# Array -> typecode, stored raw and native-endian after the header in this order.
+ARRAYS: dict[str, str] = {
+    "order_ids": "q",
+    "shares": "q",
+    "symbol_ids": "i",  # index into the header's symbols
+    "volumes": "q",  # volume of every symbol
+    # Executions indexed for trade breaks, oldest first, see ExecutionIndex.ordered.
+    "execution_ids": "q",
+    "execution_shares": "q",
+    "execution_symbol_ids": "i",
+}
+
+
+class Checkpointer:
+    """Writes checkpoints of an analyzer to path, at most once every every seconds of a run.
+
+    The analyzer calls check after each block, when its ledger and offset agree.
+    """
+
+    def __init__(self, path: Path, every: float | None = None):
+        self.path = Path(path)
+        self.every = every
+        self.last_write: float = time.monotonic()
+
+    def check(self, analyzer) -> None:
+        if self.every is not None and time.monotonic() - self.last_write >= self.every:
+            self.write(analyzer)
+
+    def write(self, analyzer) -> None:
+        save_checkpoint(analyzer, self.path)
+        self.last_write = time.monotonic()
+
+
+def checkpoint_path(dataset_path, checkpoint_root) -> Path:
+    """Each dataset gets one checkpoint file named like its cache directory."""
+    return cache_directory(dataset_path, checkpoint_root).with_suffix(".checkpoint")
+
+
+def identify(dataset_path, offset: int) -> dict[str, str]:
+    """Hashes the first IDENTITY_BYTES of the dataset and the IDENTITY_BYTES just before offset.
+
+    A dataset that was replaced, truncated or rewritten since the checkpoint no longer matches.
+    Only those two ranges are read, so resuming costs the same however far into the file the
+    offset is. An edit that leaves both ranges alone, in the middle of a large prefix, is not
+    detected.
+    """
+    with open(dataset_path, "rb") as file:
+        head: bytes = file.read(min(offset, IDENTITY_BYTES))
+        file.seek(max(offset - IDENTITY_BYTES, 0))
+        tail: bytes = file.read(offset - max(offset - IDENTITY_BYTES, 0))
+    return {
+        "head_hash": hashlib.blake2b(head, digest_size=16).hexdigest(),
+        "tail_hash": hashlib.blake2b(tail, digest_size=16).hexdigest(),
+    }
+
+
+def save_checkpoint(analyzer, path: Path) -> None:
+    """Atomically writes the analyzer's offset, resting orders, symbol volumes and indexed
+    executions to path.
+
+    Only occupied ledger slots are stored, as three arrays of order ids, shares and symbol ids.
+    """
+    order_ids, shares, symbol_ids = array("q"), array("q"), array("i")
+    for order_id, remaining, symbol_id in analyzer.ledger.items():
+        order_ids.append(order_id)
+        shares.append(remaining)
+        symbol_ids.append(symbol_id)
+    execution_ids, execution_shares, execution_symbol_ids = analyzer.executions.ordered()
+    arrays: dict[str, array] = {
+        "order_ids": order_ids,
+        "shares": shares,
+        "symbol_ids": symbol_ids,
+        "volumes": analyzer.symbols.volumes,
+        "execution_ids": execution_ids,
+        "execution_shares": execution_shares,
+        "execution_symbol_ids": execution_symbol_ids,
+    }
+    header: bytes = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "dataset_path": str(Path(analyzer.dataset_path).resolve()),
+            "offset": analyzer.offset,
+            **identify(analyzer.dataset_path, analyzer.offset),
+            "orders": len(order_ids),
+            "symbols": analyzer.symbols.names,
+            "executions": len(execution_ids),
+            "execution_count": analyzer.executions.count,
+        }
+    ).encode()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack("<I", len(header)))
+            file.write(header)
+            for name in ARRAYS:
+                arrays[name].tofile(file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load_checkpoint(path: Path, dataset_path) -> dict | None:
+    """Reads a checkpoint of dataset_path, or returns None if there is no usable one.
+
+    A checkpoint is unusable when it is missing, damaged, written by another format version or
+    machine byte order, or when the dataset no longer holds the bytes it was taken over.
+    """
+    try:
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = struct.unpack("<I", file.read(4))
+            meta: dict = json.loads(file.read(length))
+            if meta["version"] != FORMAT_VERSION or meta["byteorder"] != sys.byteorder:
+                return None
+            counts: dict[str, int] = {
+                "order_ids": meta["orders"],
+                "shares": meta["orders"],
+                "symbol_ids": meta["orders"],
+                "volumes": len(meta["symbols"]),
+                "execution_ids": meta["executions"],
+                "execution_shares": meta["executions"],
+                "execution_symbol_ids": meta["executions"],
+            }
+            state: dict = {}
+            for name, typecode in ARRAYS.items():
+                state[name] = array(typecode)
+                state[name].fromfile(file, counts[name])
+    except (FileNotFoundError, EOFError, KeyError, ValueError, struct.error):
+        return None
+
+    if meta["dataset_path"] != str(Path(dataset_path).resolve()):
+        return None
+    offset: int = meta["offset"]
+    if os.stat(dataset_path).st_size < offset:
+        return None
+    if identify(dataset_path, offset) != {
+        "head_hash": meta["head_hash"],
+        "tail_hash": meta["tail_hash"],
+    }:
+        return None
+    state["offset"] = offset
+    state["symbols"] = meta["symbols"]
+    state["execution_count"] = meta["execution_count"]
+    return state
@@ -0,0 +1,100 @@
+from pathlib import Path
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# Only the standard library is imported here, so a query costs little more than the interpreter.
+
+
+def default_socket() -> Path:
+    """Socket pva serve listens on unless told otherwise, one per user."""
+    return Path(tempfile.gettempdir(), f"pva-{os.getuid()}.sock")
+
+
+class Client:
+    """Connection to pva serve. Requests are JSON objects, one per line, and so are replies."""
+
+    def __init__(self, socket_path: Path | None = None, timeout: float | None = None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(str(socket_path or default_socket()))
+        except OSError:
+            self.sock.close()
+            raise
+        self.replies = self.sock.makefile("rb")
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def request(self, **query) -> dict:
+        """Sends a request and waits for its reply, see serve.AnalysisServer.answer."""
+        self.sock.sendall(json.dumps(query).encode() + b"\n")
+        line: bytes = self.replies.readline()
+        if not line:
+            raise ConnectionError("pva serve closed the connection")
+        return json.loads(line)
+
+    def close(self) -> None:
+        self.replies.close()
+        self.sock.close()
+
+
+def main(argv: list[str] | None = None):
+    """Entry point of pva query, asks a running pva serve to analyze a file."""
+    parser = argparse.ArgumentParser(prog="pva query")
+    parser.add_argument("file", type=Path, nargs="?", help="Dataset file to analyze")
+    parser.add_argument("--start", type=int, default=0, help="Byte offset of the first record")
+    parser.add_argument(
+        "--stop", type=int, help="Byte offset just past the last record, defaults to the end"
+    )
+    parser.add_argument(
+        "--symbol", nargs="+", default=[], help="Also prints the volume of these symbols"
+    )
+    parser.add_argument(
+        "-t", "--top", type=int, default=10, help="Number of top symbols to display"
+    )
+    parser.add_argument("-s", "--socket", type=Path, help="Socket of pva serve")
+    parser.add_argument(
+        "--stats", action="store_true", help="Prints the warm cache statistics of pva serve"
+    )
+    args = parser.parse_args(argv)
+    if args.file is None and not args.stats:
+        parser.error("a file or --stats is required")
+
+    try:
+        with Client(args.socket) as client:
+            if args.stats:
+                reply: dict = client.request(command="stats")
+            else:
+                reply = client.request(
+                    path=str(args.file.resolve()),
+                    start=args.start,
+                    stop=args.stop,
+                    top=args.top,
+                    symbols=args.symbol,
+                )
+    except OSError as error:
+        print(f"Could not reach pva serve at {args.socket or default_socket()}: {error}")
+        sys.exit(1)
+
+    if not reply["ok"]:
+        print(reply["error"])
+        sys.exit(1)
+    if args.stats:
+        print(json.dumps(reply, indent=2))
+        return
+    if args.top:
+        title: str = "Ten" if args.top == 10 else str(args.top)
+        print(f"*** Top {title} Symbols ***")
+        for key, value in reply["top"]:
+            print(f"{key}: {value}")
+        print("")
+    for key, value in reply.get("volumes", {}).items():
+        print(f"{key}: {value}")
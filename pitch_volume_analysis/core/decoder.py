@@ -0,0 +1,245 @@
+# Byte offsets follow the Cboe PITCH layouts used by parse_order_message.
+# Every record starts with "S" and an 8 digit timestamp, so the message type always sits at byte 9
+# and the order id always sits at bytes 10-22.
+
+ADD_ORDER: int = 0
+ORDER_EXECUTED: int = 1
+ORDER_CANCEL: int = 2
+TRADE: int = 3
+TRADE_BREAK: int = 4
+
+MESSAGE_TYPE: slice = slice(9, 10)
+ORDER_ID: slice = slice(10, 22)
+
+# Message type -> (kind, shares field, symbol field).
+# Only the fields volume tracking reads are described. Types missing from this table are skipped,
+# except trade breaks, see TRADE_BREAK_TYPE.
+LAYOUTS: dict[bytes, tuple[int, slice, slice | None]] = {
+    b"A": (ADD_ORDER, slice(23, 29), slice(29, 35)),  # Add Order (short)
+    b"1": (ADD_ORDER, slice(23, 29), slice(29, 37)),  # Add Order (extended)
+    b"d": (ADD_ORDER, slice(23, 29), slice(29, 37)),  # Add Order (long)
+    b"E": (ORDER_EXECUTED, slice(22, 28), None),  # Order executed
+    b"X": (ORDER_CANCEL, slice(22, 28), None),  # Order cancel
+    b"P": (TRADE, slice(23, 29), slice(29, 35)),  # Trade (short)
+    b"r": (TRADE, slice(23, 29), slice(29, 37)),  # Trade (long)
+}
+
+# A trade break carries no shares or symbol, only the execution id of the execution it breaks,
+# at the bytes other messages keep their order id in. It is decoded apart from LAYOUTS, so
+# records that are skipped pay a single comparison for it.
+TRADE_BREAK_TYPE: bytes = b"B"
+
+# Message type -> execution id field of the messages that execute shares. Execution ids are
+# base36 like order ids.
+EXECUTION_IDS: dict[bytes, slice] = {
+    b"E": slice(28, 40),
+    b"P": slice(45, 57),
+    b"r": slice(47, 59),
+}
+
+# Every message type of the Cboe PITCH spec. Records of other types are counted as unknown.
+MESSAGE_TYPES: frozenset[bytes] = frozenset(LAYOUTS) | {
+    b"s",  # Symbol clear
+    b"B",  # Trade break
+    b"H",  # Trading status
+    b"I",  # Auction update
+    b"J",  # Auction summary
+    b"R",  # Retail price improvement
+}
+
+# Message type -> price field. Prices are fixed-point with 4 implied decimal places.
+PRICE_FIELDS: dict[bytes, slice] = {
+    b"A": slice(35, 45),
+    b"1": slice(37, 51),
+    b"d": slice(37, 47),
+    b"P": slice(35, 45),
+    b"r": slice(37, 47),
+}
+
+# Milliseconds since midnight.
+TIME_STAMP: slice = slice(1, 9)
+
+
+def decode(record: bytes) -> tuple[int, bytes, int, bytes | None] | None:
+    """Decodes a single PITCH record into (kind, order id, shares, symbol).
+
+    The symbol is None for executions and cancels since they only reference an order id.
+    Trade breaks decode to (TRADE_BREAK, execution id, 0, None).
+    Returns None for message types that are not used to compute volume. Looking up the type
+    uses a one byte slice, which CPython caches, so skipped records allocate nothing.
+    """
+    layout: tuple | None = LAYOUTS.get(record[9:10])
+    if layout is None:
+        if record[9:10] == TRADE_BREAK_TYPE:
+            return TRADE_BREAK, record[10:22], 0, None
+        return None
+    kind, shares_field, symbol_field = layout
+    if symbol_field is None:
+        return kind, record[10:22], int(record[shares_field]), None
+    return kind, record[10:22], int(record[shares_field]), record[symbol_field].rstrip()
+
+
+def decode_execution_id(record: bytes) -> bytes | None:
+    """Returns the execution id field of a record, or None if its type executes no shares."""
+    field: slice | None = EXECUTION_IDS.get(record[9:10])
+    return None if field is None else record[field]
+
+
+def iter_records(block: bytes | memoryview):
+    """Splits a block of newline separated PITCH data into records.
+
+    A memoryview is copied once per block so every record and field slice is a hashable bytes object.
+    """
+    if not isinstance(block, bytes):
+        block = bytes(block)
+    return block.split(b"\n")
+
+
+def get_message_type(entry: str) -> str:
+    """Finds message type and return it's value."""
+    return entry[9]
+
+
+def get_message_symbol(message: list[str], message_type: str) -> str:
+    """Parses message and returns it's stock symbol."""
+    match message_type:
+        case "E":
+            symbol = None
+        case "X":
+            symbol = None
+        case "B":
+            symbol = None
+        case _:
+            # Messages of types parse_order_message does not know are empty.
+            symbol: str = message[5] if message else None
+    return symbol
+
+
+def parse_order_message(entry: str, type: str) -> list[str]:
+    """Reads in entry string and returns a list called a message.
+
+    The message returned can vary based on message type.
+    The list returned contains indexed components based on Cboe PITCH specifications.
+
+    Using a match statement structure, will allow for easy addition of additional PITCH order messages.
+    """
+    message: list[str] = []
+    match (type):
+        case "A":  # Add Order (short)
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            order_id: str = entry[10:22]
+            side_indicator: str = entry[22]
+            shares: str = entry[23:29]
+            stock_symbol: str = entry[29:35].strip()
+            price: str = entry[35:45]
+            reserved: str = entry[45]
+            message = [
+                time_stamp,
+                message_type,
+                order_id,
+                side_indicator,
+                shares,
+                stock_symbol,
+                price,
+                reserved,
+            ]
+        case "1":  # Add Order (extended)
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            order_id: str = entry[10:22]
+            side_indicator: str = entry[22]
+            shares: str = entry[23:29]
+            stock_symbol: str = entry[29:37].strip()
+            price: str = entry[37:51]
+            display: str = entry[51]
+            participant_id: str = entry[52:56]
+            customer_indicator: str = entry[56]
+            message = [
+                time_stamp,
+                message_type,
+                order_id,
+                side_indicator,
+                shares,
+                stock_symbol,
+                price,
+                display,
+                participant_id,
+                customer_indicator,
+            ]
+        case "d":  # Add Order (long)
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            order_id: str = entry[10:22]
+            side_indicator: str = entry[22]
+            shares: str = entry[23:29]
+            stock_symbol: str = entry[29:37].strip()
+            price: str = entry[37:47]
+            display: str = entry[47]
+            message = [
+                time_stamp,
+                message_type,
+                order_id,
+                side_indicator,
+                shares,
+                stock_symbol,
+                price,
+                display,
+            ]
+        case "E":  # Order executed
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            order_id: str = entry[10:22]
+            executed_shares: str = entry[22:28]
+            execution_id: str = entry[28:40]
+            message = [time_stamp, message_type, order_id, executed_shares, execution_id]
+        case "X":  # Order cancel
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            order_id: str = entry[10:22]
+            canceled_shares: str = entry[22:28]
+            message = [time_stamp, message_type, order_id, canceled_shares]
+        case "P":  # Trade (short)
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            order_id: str = entry[10:22]
+            side_indicator: str = entry[22]
+            shares: str = entry[23:29]
+            stock_symbol: str = entry[29:35].strip()
+            price: str = entry[35:45]
+            execution_id: str = entry[45:57]
+            message = [
+                time_stamp,
+                message_type,
+                order_id,
+                side_indicator,
+                shares,
+                stock_symbol,
+                price,
+                execution_id,
+            ]
+        case "r":  # Trade (long)
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            order_id: str = entry[10:22]
+            side_indicator: str = entry[22]
+            shares: str = entry[23:29]
+            stock_symbol: str = entry[29:37].strip()
+            price: str = entry[37:47]
+            execution_id: str = entry[47:59]
+            message = [
+                time_stamp,
+                message_type,
+                order_id,
+                side_indicator,
+                shares,
+                stock_symbol,
+                price,
+                execution_id,
+            ]
+        case "B":  # Trade break
+            time_stamp: str = entry[1:9]
+            message_type: str = entry[9]
+            execution_id: str = entry[10:22]
+            message = [time_stamp, message_type, execution_id]
+    return message
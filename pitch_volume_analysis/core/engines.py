@@ -0,0 +1,135 @@
+from pathlib import Path
+from typing import Callable
+import os
+
+# Every engine takes a source, a dataset path or an open binary stream, and computes symbol
+# volumes and metrics through the interface of Analyzer: read_file(), symbol_book and metrics.
+# Analyzer itself is the reference engine, every other engine must match its volumes exactly.
+# Engines import their analyzer when they are created, so choosing one costs no imports.
+
+REFERENCE: str = "python"
+
+# Engine name -> function returning an analyzer of a source for a number of workers.
+ENGINES: dict[str, Callable] = {}
+# Engines that read the source in the calling process, so they can run inside other workers.
+SERIAL_ENGINES: list[str] = []
+
+# Sizes at which the auto engine stops using the python engine. Below VECTORIZED_BYTES importing
+# NumPy costs more than it saves. Without NumPy, files from PARALLEL_BYTES are split over the
+# cores, smaller ones finish before a process pool would have started.
+VECTORIZED_BYTES: int = 2 << 20
+PARALLEL_BYTES: int = 16 << 20
+
+
+def register(name: str, serial: bool = True):
+    """Registers the decorated function as the engine called name."""
+
+    def decorator(factory: Callable) -> Callable:
+        ENGINES[name] = factory
+        if serial:
+            SERIAL_ENGINES.append(name)
+        return factory
+
+    return decorator
+
+
+@register("python")
+def python_engine(source, workers: int = 1):
+    """The reference engine, applies every message in order."""
+    from pitch_volume_analysis.core.analyzer import Analyzer
+
+    return Analyzer(source)
+
+
+@register("numpy")
+def numpy_engine(source, workers: int = 1):
+    """Decodes whole blocks and computes volume with array operations, see vectorized.py."""
+    from pitch_volume_analysis.core.vectorized import VectorizedAnalyzer
+
+    return VectorizedAnalyzer(source)
+
+
+@register("parallel", serial=False)
+def parallel_engine(source, workers: int = 1):
+    """Parses chunks of a file in a process pool, one per core unless workers says otherwise."""
+    from pitch_volume_analysis.core.parallel import ParallelAnalyzer
+
+    return ParallelAnalyzer(source, workers if workers > 1 else os.cpu_count() or 1)
+
+
+def create_engine(name: str, source, workers: int = 1):
+    """Returns the analyzer of the engine called name for source.
+
+    Raises ValueError for an unknown engine and ImportError when its dependencies are missing.
+    """
+    try:
+        factory: Callable = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown engine {name}, choose from {', '.join(ENGINES)}")
+    return factory(source, workers)
+
+
+def engine_available(name: str) -> bool:
+    """Returns whether the dependencies of an engine are installed."""
+    if name == "numpy":
+        from pitch_volume_analysis.core import vectorized
+
+        return vectorized.numpy is not None
+    return name in ENGINES
+
+
+def choose_engine(
+    source, engines: list[str] | None = None, cores: int | None = None
+) -> tuple[str, int]:
+    """Picks an engine among engines, all of them by default, for the size of source.
+
+    Returns the engine and its number of workers. Sources of unknown size, streams or None for a
+    live feed, and small files use the python engine. Larger files use the numpy engine when it
+    is installed, which is several times faster than the python engine on one core, and the
+    parallel engine otherwise when there are several cores.
+    """
+    engines = list(ENGINES) if engines is None else engines
+    if cores is None:
+        cores = os.cpu_count() or 1
+    size: int = 0
+    if source is not None and not hasattr(source, "read"):
+        size = os.stat(Path(source)).st_size
+    if size >= VECTORIZED_BYTES and "numpy" in engines and engine_available("numpy"):
+        return "numpy", 1
+    if size >= PARALLEL_BYTES and cores > 1 and "parallel" in engines:
+        return "parallel", cores
+    return REFERENCE, 1
+
+
+def run_engine(engine: str, source, workers: int = 4) -> list[tuple[str, int]]:
+    """Returns the symbol_book an engine computes for source, in order of first appearance."""
+    my_analyzer = create_engine(engine, source, workers)
+    my_analyzer.read_file()
+    return list(my_analyzer.symbol_book.items())
+
+
+def compare_engines(
+    source, engines: list[str] | None = None, workers: int = 4
+) -> dict[str, list[str]]:
+    """Runs every engine over source and compares its symbol_book with the reference engine's.
+
+    Returns the engines that differ and, for each, the symbols whose volume differs. Engines that
+    only differ in the order of symbols report "symbol order".
+    """
+    expected: list[tuple[str, int]] = run_engine(REFERENCE, source)
+    mismatches: dict[str, list[str]] = {}
+    for engine in engines or list(ENGINES):
+        if engine == REFERENCE:
+            continue
+        book: list[tuple[str, int]] = run_engine(engine, source, workers)
+        if book == expected:
+            continue
+        expected_volumes: dict[str, int] = dict(expected)
+        volumes: dict[str, int] = dict(book)
+        symbols: list[str] = [
+            symbol
+            for symbol in {**expected_volumes, **volumes}
+            if volumes.get(symbol) != expected_volumes.get(symbol)
+        ]
+        mismatches[engine] = symbols or ["symbol order"]
+    return mismatches
@@ -0,0 +1,152 @@
+from array import array
+
+# A broken or expired execution keeps its place in the ring under this id, which no base36
+# execution id decodes to.
+BROKEN: int = -1
+
+# Executions kept for trade breaks unless told otherwise, 40 MiB once the ring is full, and
+# another 208 MiB once a trade break has built the id map.
+DEFAULT_WINDOW: int = 1 << 21
+# Memory an execution takes in the ring: its id, shares and symbol id.
+EXECUTION_BYTES: int = 20
+# Memory an execution takes in the id map: its dict slot and the id and position objects.
+POSITION_BYTES: int = 104
+
+
+class ExecutionIndex:
+    """Compact index of the most recent executions that counted volume, for trade breaks.
+
+    Execution ids, shares and symbol ids sit in three parallel arrays used as a ring of the last
+    window executions. Once the ring is full every new execution expires the oldest one, so
+    memory stays bounded however long the session. The first trade break builds a dict mapping
+    the id of every execution in the ring to its position, which is then updated as positions
+    are written and expired, so breaks find their execution in constant time. Sessions without
+    breaks never pay for the map. Execution ids are unique within a session.
+
+    The execution numbered n since the start sits at position n % window, whatever path added it,
+    so engines that add executions in bulk expire them exactly like Analyzer does.
+    """
+
+    __slots__ = ("window", "ids", "shares", "symbols", "count", "positions")
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        if window < 1:
+            raise ValueError("The execution window must hold at least one execution")
+        self.window = window
+        self.ids: array = array("q")
+        self.shares: array = array("q")
+        self.symbols: array = array("i")
+        # Executions added since the start, expired ones included.
+        self.count: int = 0
+        # Execution id -> ring position, for every execution in the ring that is not broken.
+        # None until the first find.
+        self.positions: dict[int, int] | None = None
+
+    def __len__(self) -> int:
+        """Positions of the ring in use, broken executions included."""
+        return len(self.ids)
+
+    def add(self, execution_id: int, shares: int, symbol_id: int) -> None:
+        """Indexes an execution, expiring the oldest one when the ring is full."""
+        ids: array = self.ids
+        if len(ids) < self.window:
+            position: int = len(ids)
+            ids.append(execution_id)
+            self.shares.append(shares)
+            self.symbols.append(symbol_id)
+        else:
+            position = self.count % self.window
+            self.expire(position, position + 1)
+            ids[position] = execution_id
+            self.shares[position] = shares
+            self.symbols[position] = symbol_id
+        if execution_id >= 0 and self.positions is not None:
+            self.positions[execution_id] = position
+        self.count += 1
+
+    def extend(self, ids: array, shares: array, symbols: array) -> None:
+        """Indexes executions in order, like add for each of them but with slice copies.
+
+        ids and shares are arrays of typecode q, symbols of typecode i.
+        """
+        window: int = self.window
+        positions: dict[int, int] | None = self.positions
+        if len(ids) > window:
+            # The ones before the last window executions would expire straight away.
+            self.count += len(ids) - window
+            ids, shares, symbols = ids[-window:], shares[-window:], symbols[-window:]
+        start: int = 0
+        while start < len(ids):
+            position: int = self.count % window
+            if position > len(self.ids):
+                self.pad(position)
+            stop: int = min(len(ids), start + window - position)
+            end: int = position + stop - start
+            if position == len(self.ids):
+                self.ids.extend(ids[start:stop])
+                self.shares.extend(shares[start:stop])
+                self.symbols.extend(symbols[start:stop])
+            else:
+                self.expire(position, end)
+                self.ids[position:end] = ids[start:stop]
+                self.shares[position:end] = shares[start:stop]
+                self.symbols[position:end] = symbols[start:stop]
+            if positions is not None:
+                positions.update(zip(ids[start:stop], range(position, end)))
+            self.count += stop - start
+            start = stop
+        if positions is not None:
+            # Broken executions take up positions without an id.
+            positions.pop(BROKEN, None)
+
+    def skip(self, count: int) -> None:
+        """Counts executions that are already broken or expired, expiring as many old ones."""
+        if count > self.window:
+            self.count += count - self.window
+            count = self.window
+        self.extend(array("q", [BROKEN]) * count, array("q", [0]) * count, array("i", [0]) * count)
+
+    def pad(self, length: int) -> None:
+        """Grows the ring to length positions holding no execution."""
+        missing: int = length - len(self.ids)
+        self.ids.extend(array("q", [BROKEN]) * missing)
+        self.shares.extend(array("q", [0]) * missing)
+        self.symbols.extend(array("i", [0]) * missing)
+
+    def expire(self, start: int, stop: int) -> None:
+        """Forgets the ids of the executions at positions start to stop, before they are
+        overwritten.
+        """
+        positions: dict[int, int] | None = self.positions
+        if positions is None:
+            return
+        for position, execution_id in enumerate(self.ids[start:stop], start):
+            if positions.get(execution_id) == position:
+                del positions[execution_id]
+
+    def ordered(self) -> tuple[array, array, array]:
+        """Returns copies of the ids, shares and symbol ids in the ring, oldest execution first."""
+        start: int = self.count % self.window if len(self.ids) == self.window else 0
+        return tuple(
+            column[start:] + column[:start] for column in (self.ids, self.shares, self.symbols)
+        )
+
+    def find(self, execution_id: int) -> int:
+        """Returns the ring position of an execution, or -1 if it is not indexed."""
+        if self.positions is None:
+            self.positions = dict(zip(self.ids, range(len(self.ids))))
+            self.positions.pop(BROKEN, None)
+        return self.positions.get(execution_id, -1)
+
+    def remove(self, position: int) -> tuple[int, int]:
+        """Removes the execution at a ring position and returns its (shares, symbol id)."""
+        self.expire(position, position + 1)
+        self.ids[position] = BROKEN
+        return self.shares[position], self.symbols[position]
+
+    def pop(self, execution_id: int) -> tuple[int, int] | None:
+        """Removes an execution and returns its (shares, symbol id), or None if not indexed."""
+        position: int = self.find(execution_id)
+        if position < 0:
+            return None
+        return self.remove(position)
@@ -0,0 +1,66 @@
+from pitch_volume_analysis.core.reader import BLOCK_SIZE, ReceiveBuffer
+from typing import AsyncIterator
+import asyncio
+import socket
+
+
+async def receive_blocks(
+    sock: socket.socket, block_size: int = BLOCK_SIZE
+) -> AsyncIterator[memoryview]:
+    """Receives a socket on the running event loop and yields views of its complete records.
+
+    Like read_socket_blocks, but one event loop can receive several feed units at once.
+    Each view is only valid until the consumer asks for the next block.
+    """
+    loop = asyncio.get_running_loop()
+    sock.setblocking(False)
+    buffer = ReceiveBuffer(block_size)
+    while True:
+        with buffer.space() as space:
+            received: int = await loop.sock_recv_into(sock, space)
+        block: memoryview | None = buffer.records(received)
+        if block is not None:
+            with block:
+                yield block
+        if not received:
+            return
+        buffer.carry()
+
+
+async def consume_feeds(analyzer, sockets: list[socket.socket], block_size: int = BLOCK_SIZE):
+    """Computes stock volume from several feed units concurrently.
+
+    Each unit is received by its own task, and every block is computed without yielding to the
+    event loop, so the units share one ledger and symbol table without locking.
+    """
+    await asyncio.gather(*(consume_feed(analyzer, sock, block_size) for sock in sockets))
+
+
+async def consume_feed(analyzer, sock: socket.socket, block_size: int = BLOCK_SIZE) -> None:
+    """Computes stock volume from one feed unit until it closes or a stop is requested."""
+    async for block in receive_blocks(sock, block_size):
+        analyzer.process_batch(block)
+        if analyzer.stop_requested:
+            break
+
+
+def parse_address(address: str) -> tuple[socket.AddressFamily, str | tuple[str, int]]:
+    """Parses "host:port" for TCP or "unix:path" for a Unix socket into (family, address)."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:") :]
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Feed address {address} is not host:port or unix:path")
+    return socket.AF_INET, (host.strip("[]") or "127.0.0.1", int(port))
+
+
+def connect(address: str) -> socket.socket:
+    """Opens a blocking connection to a feed unit."""
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target)
+        return sock
+    sock = socket.create_connection(target)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
@@ -0,0 +1,134 @@
+from array import array
+from typing import Iterator
+
+EMPTY: int = -1
+TOMBSTONE: int = -2
+
+# Fibonacci hashing spreads sequential order ids across the table instead of one long probe run.
+HASH_MULTIPLIER: int = 0x9E3779B97F4A7C15
+
+DIGITS: str = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+class OrderLedger:
+    """Compact ledger of resting orders.
+
+    Order ids are base36 encoded 12 character strings, which always fit in a signed 64 bit int.
+    Each resting order only keeps its remaining shares and the id of its interned symbol.
+    Orders live in three parallel arrays that form an open addressed hash table with linear probing.
+    Removing an order leaves a tombstone that the next insert along the probe sequence recycles.
+    """
+
+    __slots__ = ("keys", "shares", "symbols", "mask", "size", "filled")
+
+    def __init__(self, capacity: int = 1024):
+        self.allocate(capacity)
+
+    def allocate(self, capacity: int) -> None:
+        """Replaces the table with an empty one of at least capacity positions."""
+        capacity = 1 << max(capacity - 1, 1).bit_length()
+        self.keys: array = array("q", [EMPTY]) * capacity
+        self.shares: array = array("q", [0]) * capacity
+        self.symbols: array = array("i", [0]) * capacity
+        self.mask: int = capacity - 1
+        self.size: int = 0
+        # Occupied plus tombstoned positions, used to decide when to rebuild the table.
+        self.filled: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, order_id: int) -> bool:
+        return self.find(order_id) >= 0
+
+    def find(self, order_id: int) -> int:
+        """Returns the table position of an order, or -1 if the order is not resting."""
+        keys: array = self.keys
+        mask: int = self.mask
+        position: int = (order_id * HASH_MULTIPLIER >> 32) & mask
+        while True:
+            key: int = keys[position]
+            if key == order_id:
+                return position
+            if key == EMPTY:
+                return -1
+            position = (position + 1) & mask
+
+    def add(self, order_id: int, shares: int, symbol_id: int) -> bool:
+        """Enters a new resting order. Returns False if the order id is already resting."""
+        keys: array = self.keys
+        mask: int = self.mask
+        position: int = (order_id * HASH_MULTIPLIER >> 32) & mask
+        recycled: int = -1
+        while True:
+            key: int = keys[position]
+            if key == order_id:
+                return False
+            if key == EMPTY:
+                break
+            if key == TOMBSTONE and recycled < 0:
+                recycled = position
+            position = (position + 1) & mask
+
+        if recycled >= 0:
+            position = recycled
+        else:
+            self.filled += 1
+        keys[position] = order_id
+        self.shares[position] = shares
+        self.symbols[position] = symbol_id
+        self.size += 1
+
+        # Linear probing stays short up to a three quarter load.
+        if self.filled * 4 > mask * 3:
+            self.resize()
+        return True
+
+    def reduce(self, position: int, shares: int) -> int:
+        """Takes shares off the order at a table position and removes it once no shares are left."""
+        shares_left: int = self.shares[position] - shares
+        if shares_left == 0:
+            self.keys[position] = TOMBSTONE
+            self.size -= 1
+        else:
+            self.shares[position] = shares_left
+        return shares_left
+
+    def get(self, order_id: int) -> tuple[int, int] | None:
+        """Returns (remaining shares, symbol id) of a resting order."""
+        position: int = self.find(order_id)
+        if position < 0:
+            return None
+        return self.shares[position], self.symbols[position]
+
+    def items(self) -> Iterator[tuple[int, int, int]]:
+        """Yields (order id, remaining shares, symbol id) for every resting order."""
+        keys: array = self.keys
+        for position in range(len(keys)):
+            if keys[position] >= 0:
+                yield keys[position], self.shares[position], self.symbols[position]
+
+    def resize(self) -> None:
+        """Rebuilds the table, dropping tombstones and doubling the capacity when it is mostly live."""
+        keys, shares, symbols = self.keys, self.shares, self.symbols
+        capacity: int = len(keys)
+        if self.size * 2 > capacity:
+            capacity *= 2
+        self.allocate(capacity)
+        for position in range(len(keys)):
+            if keys[position] >= 0:
+                self.add(keys[position], shares[position], symbols[position])
+
+
+def decode_order_id(order_id: bytes | str) -> int:
+    """Decodes a base36 order id into an int."""
+    return int(order_id, 36)
+
+
+def format_order_id(order_id: int) -> str:
+    """Encodes an int order id back into its 12 character base36 form."""
+    characters: list[str] = []
+    while order_id:
+        order_id, digit = divmod(order_id, 36)
+        characters.append(DIGITS[digit])
+    return "".join(reversed(characters)).rjust(12, "0")
@@ -1,24 +1,56 @@
 from pathlib import Path
-from pitch_volume_analysis.core.analyzer import Analyzer
-from pitch_volume_analysis.core.symbol_analyzer import SymbolAnalyzer
+import os
+import signal
+import stat
 import sys
-import traceback
-import typing
-import cProfile
-import pstats
-import argparse
+
+# Only the standard library is imported up front, so "pva query" starts as fast as the client.
+# The analyzers are imported by the functions that run them, and modules that take long to
+# import, such as NumPy, multiprocessing, asyncio and the profiler, only by the runs using them.
 
 
 def main():
+    # Checking for commands. "pva batch" analyzes many files, "pva serve" keeps analyses warm
+    # for "pva query", and each has its own flags.
+    if sys.argv[1:2] == ["batch"]:
+        from pitch_volume_analysis.core import batch
+
+        batch.main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["serve"]:
+        from pitch_volume_analysis.core import serve
+
+        serve.main(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["query"]:
+        from pitch_volume_analysis.core import client
+
+        client.main(sys.argv[2:])
+        return
+
+    from pitch_volume_analysis.core.checkpoint import checkpoint_path
+    from pitch_volume_analysis.core.engines import choose_engine
+    from pitch_volume_analysis.core.reader import detect_compression
+    from pitch_volume_analysis.core.spill import resident_budget
+    from pitch_volume_analysis.core.symbol_index import build_index
+
     # Adding optional argument flags.
     args = add_flags()
 
+    # The parallel engine is the python engine spread over workers, one per core by default.
+    if args.engine == "parallel":
+        args.engine = "python"
+        if args.workers == 1:
+            args.workers = os.cpu_count() or 1
+
     # Setting base directory.
     try:
         CURRENT_FILE_PATH: Path = Path(__file__).resolve()
         PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
         DATASET_PATH: Path = Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
         LOG_PATH: Path = Path(PROJECT_ROOT, "data", "logs")
+        CACHE_PATH: Path = Path(PROJECT_ROOT, "data", "processed")
+        CHECKPOINT_PATH: Path = Path(PROJECT_ROOT, "data", "processed", "checkpoints")
     except:
         print("Directories and/or dataset not found!")
         # traceback.print_exc()
@@ -36,52 +68,561 @@ def main():
             print("File does not exist!")
             print("Will use the default file instead.\n")
 
-    # Checking for profile flag.
+    # Checking for standard input, either "pva -" or data piped or redirected into pva.
+    if args.source == "-" or (args.file is None and not args.feed and stdin_is_piped()):
+        DATASET_PATH = sys.stdin.buffer
+        if args.workers > 1:
+            print("Parallel workers need a file, reading standard input serially.\n")
+            args.workers = 1
+
+    # Checking for index flag. The index is built in one pass and the program exits.
+    if args.build_index:
+        if args.feed or hasattr(DATASET_PATH, "read"):
+            print("Only files can be indexed.")
+            sys.exit(1)
+        try:
+            print(f"Symbol index written to {build_index(DATASET_PATH)}")
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
+        return
+
+    # Checking for symbol flag. A single symbol is computed by SymbolAnalyzer, from the index
+    # when the dataset has one.
+    if args.symbol is not None and not args.feed:
+        start_symbol_program(DATASET_PATH, args.symbol.upper())
+        return
+
+    # Checking for compressed files. They are decompressed as one stream on a background thread.
+    compressed: bool = (
+        not args.feed
+        and not hasattr(DATASET_PATH, "read")
+        and Path(DATASET_PATH).is_file()
+        and detect_compression(DATASET_PATH) is not None
+    )
+    if compressed and args.workers > 1:
+        print("Compressed datasets are decompressed as one stream, ignoring workers.\n")
+        args.workers = 1
+
+    # Checking for feed flag. Live feed units are received concurrently by one process.
+    if args.feed and args.workers > 1:
+        print("Feed units are received in one process, ignoring workers.\n")
+        args.workers = 1
+
+    # Checking for cache flag. Only files can be cached, and cached columns are replayed serially.
+    cache_dir: Path | None = None
+    if args.cache:
+        if args.feed:
+            print("Live feeds can't be cached, reading them directly.\n")
+        elif hasattr(DATASET_PATH, "read"):
+            print("Standard input can't be cached, reading it directly.\n")
+        else:
+            cache_dir = args.cache_dir or CACHE_PATH
+            if args.workers > 1:
+                print("Cached datasets are replayed serially, ignoring workers.\n")
+                args.workers = 1
+
+    # Checking for checkpoint flags. Checkpoints record how far into a file a serial run got.
+    checkpoint_file: Path | None = None
+    if args.resume or args.follow or args.checkpoint_every is not None:
+        if args.feed or hasattr(DATASET_PATH, "read") or compressed:
+            print("Only uncompressed files can be checkpointed, running without checkpoints.\n")
+        else:
+            checkpoint_file = checkpoint_path(DATASET_PATH, args.checkpoint_dir or CHECKPOINT_PATH)
+            if cache_dir is not None:
+                print("Checkpointed runs read the file directly, ignoring the cache.\n")
+                cache_dir = None
+            if args.workers > 1:
+                print("Checkpointed runs read the file serially, ignoring workers.\n")
+                args.workers = 1
+
+    # Checking for debug flag. Traced symbols are followed during the main pass.
+    trace_symbols: list[str] = []
+    if args.debug is not None:
+        trace_symbols = [
+            symbol.upper() for symbols in args.debug for symbol in symbols.split(",") if symbol
+        ]
+        if args.workers > 1:
+            print("Debug mode traces symbols during a serial pass, ignoring workers.\n")
+            args.workers = 1
+
+    # Checking for buckets flag. Time buckets need the price of every resting order, which only
+    # the serial python engine keeps.
+    buckets_output: Path | None = None
+    if args.buckets is not None:
+        extension: str = "csv" if args.buckets_format == "csv" else "bin"
+        buckets_output = args.buckets_output or Path(CACHE_PATH, f"buckets.{extension}")
+        if checkpoint_file is not None:
+            print("Checkpoints don't hold time buckets, running without checkpoints.\n")
+            checkpoint_file = None
+        if args.ledger_memory is not None:
+            print("Time buckets keep the whole ledger in memory, ignoring the ledger memory.\n")
+            args.ledger_memory = None
+        if args.snapshot_every is not None:
+            print("Time buckets are written at the end of the run, ignoring snapshots.\n")
+            args.snapshot_every = None
+        if args.engine == "numpy":
+            print("Time buckets are computed by the python engine.\n")
+            args.engine = "python"
+        if args.workers > 1:
+            print("Time buckets are computed serially, ignoring workers.\n")
+            args.workers = 1
+
+    # Checking for ledger memory flag. Orders over the budget are spilled to disk.
+    max_resident: int | None = None
+    if args.ledger_memory is not None:
+        max_resident = resident_budget(args.ledger_memory)
+        if args.engine == "numpy":
+            print("The numpy engine keeps its whole ledger in memory, using the python engine.\n")
+            args.engine = "python"
+        if args.workers > 1:
+            print("A bounded ledger is kept by one process, ignoring workers.\n")
+            args.workers = 1
+
+    # Checking for auto engine. Features that apply messages one at a time need the python
+    # engine, and only whole uncompressed files can be split over workers, as many as given.
+    if args.engine == "auto":
+        engines: list[str] = ["python", "numpy", "parallel"]
+        if trace_symbols or args.snapshot_every is not None or args.buckets is not None:
+            engines = ["python"]
+        elif max_resident is not None:
+            engines = ["python"]
+        elif hasattr(DATASET_PATH, "read") or compressed:
+            engines = ["python", "numpy"]
+        elif cache_dir is not None or checkpoint_file is not None:
+            engines = ["python", "numpy"]
+        cores: int | None = args.workers if args.workers > 1 else None
+        source = None if args.feed else DATASET_PATH
+        args.engine, args.workers = choose_engine(source, engines, cores)
+        if args.engine == "parallel":
+            print(f"Using the parallel engine with {args.workers} workers.\n")
+            args.engine = "python"
+        else:
+            print(f"Using the {args.engine} engine.\n")
+
+    # Checking for engine flag. The numpy engine never applies messages one at a time.
+    if args.engine == "numpy":
+        from pitch_volume_analysis.core import vectorized
+
+        if vectorized.numpy is None:
+            print("NumPy is not installed, using the python engine instead.\n")
+            args.engine = "python"
+        elif trace_symbols or args.snapshot_every is not None:
+            print("Debug traces and snapshots follow every message, using the python engine.\n")
+            args.engine = "python"
+        elif args.workers > 1:
+            print("The numpy engine reads the dataset in one process, ignoring workers.\n")
+            args.workers = 1
+
+    options = RunOptions(
+        workers=args.workers,
+        top=args.top,
+        snapshot_every=args.snapshot_every,
+        trace_symbols=trace_symbols,
+        trace_dir=args.trace_dir,
+        cache_dir=cache_dir,
+        engine=args.engine,
+        metrics_path=args.metrics,
+        metrics_format=args.metrics_format,
+        metrics_every=args.metrics_every,
+        feeds=args.feed,
+        checkpoint_file=checkpoint_file,
+        checkpoint_every=args.checkpoint_every,
+        resume=args.resume,
+        follow=args.follow,
+        max_resident=max_resident,
+        spill_dir=args.spill_dir,
+        bucket_ms=args.buckets,
+        buckets_output=buckets_output,
+        buckets_format=args.buckets_format,
+        execution_window=args.break_window,
+        publish_name=args.publish,
+    )
+
+    # Checking for profile flag. Only the run itself is profiled.
+    profile = None
     if args.profile:
+        import cProfile
+
         print("Running profiler...")
-        with cProfile.Profile() as profile:
-            start_program(DATASET_PATH)
-            profiler = pstats.Stats(profile)
-            profiler.sort_stats(pstats.SortKey.TIME)
-            profiler.print_stats()
-            profiler.dump_stats(Path(LOG_PATH, "results.prof"))
-    else:
-        start_program(DATASET_PATH)
+        profile = cProfile.Profile()
+        profile.enable()
+    start_program(DATASET_PATH, options)
+    if profile is not None:
+        import pstats
 
-    # Checking for debug flag.
-    if args.debug is not None:
-        SYMBOL: str = args.debug
-        start_symbol_program(DATASET_PATH, SYMBOL.upper())
+        profile.disable()
+        profiler = pstats.Stats(profile)
+        profiler.sort_stats(pstats.SortKey.TIME)
+        profiler.print_stats()
+        profiler.dump_stats(Path(LOG_PATH, "results.prof"))
 
 
 def add_flags():
     """Adds optional command line arguments enabling additional features."""
+    from pitch_volume_analysis.core.buckets import FORMATS as BUCKET_FORMATS
+    from pitch_volume_analysis.core.buckets import parse_bucket_interval
+    from pitch_volume_analysis.core.engines import ENGINES
+    from pitch_volume_analysis.core.metrics import FORMATS
+    from pitch_volume_analysis.core.ranking import parse_snapshot_interval
+    from pitch_volume_analysis.core.spill import parse_size
+    import argparse
+
     parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "source",
+        nargs="?",
+        choices=["-"],
+        help="Use - to stream PITCH data from standard input",
+    )
     parser.add_argument(
         "-f", "--file", type=Path, help="Enter file path to preform pitch volume analysis"
     )
+    parser.add_argument(
+        "--feed",
+        nargs="+",
+        help="Reads live PITCH feed units from host:port or unix:path sockets until they close",
+    )
     parser.add_argument("-p", "--profile", action="store_true", help="Enables profiler mode")
     parser.add_argument(
         "-d",
         "--debug",
         type=str,
-        help="Enables debug mode to finely track a symbol",
+        nargs="+",
+        help="Enables debug mode to finely track one or more symbols (space or comma separated)",
+    )
+    parser.add_argument(
+        "--symbol",
+        help="Computes only this symbol's volume and prints its events, see --build-index",
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help="Indexes the records of every symbol next to the dataset, for fast --symbol runs",
+    )
+    parser.add_argument(
+        "--trace-dir",
+        type=Path,
+        help="Writes the debug trace of each symbol to SYMBOL.trace in this directory",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes that parse the dataset in parallel chunks",
+    )
+    parser.add_argument(
+        "-t", "--top", type=int, default=10, help="Number of top symbols to display"
+    )
+    parser.add_argument(
+        "-s",
+        "--snapshot-every",
+        type=parse_snapshot_interval,
+        help="Prints the current top symbols every N messages, or every N seconds with an s suffix",
+    )
+    parser.add_argument(
+        "-c",
+        "--cache",
+        action="store_true",
+        help="Parses the dataset once into a binary columnar cache and reuses it on later runs",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Directory the columnar cache is kept in, defaults to data/processed",
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=[*ENGINES, "auto"],
+        default="python",
+        help="Engine that computes volume, auto picks one from the dataset size and the cores",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Writes message counts, throughput and phase timings of the run to this file",
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=FORMATS,
+        default="json",
+        help="Format of the metrics file, prometheus writes the text exposition format",
+    )
+    parser.add_argument(
+        "--metrics-every",
+        type=float,
+        help="Also rewrites the metrics file every N seconds during the run",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continues from the file's last checkpoint instead of reading it from the start",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="Keeps reading records appended to the file until interrupted, like tail -f",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=float,
+        help="Writes a checkpoint of the run every N seconds, one is always written at the end",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        type=Path,
+        help="Directory checkpoints are kept in, defaults to data/processed/checkpoints",
+    )
+    parser.add_argument(
+        "--ledger-memory",
+        type=parse_size,
+        metavar="SIZE",
+        help="Memory for resting orders, such as 512M. Older orders spill to disk past it",
+    )
+    parser.add_argument(
+        "--spill-dir",
+        type=Path,
+        help="Directory of the ledger's spill file, defaults to the system temporary directory",
+    )
+    parser.add_argument(
+        "--buckets",
+        type=parse_bucket_interval,
+        metavar="INTERVAL",
+        help="Also aggregates volume, notional, trades and VWAP per symbol in buckets such as 1s or 5m",
+    )
+    parser.add_argument(
+        "--buckets-output",
+        type=Path,
+        help="File the time buckets are written to, defaults to data/processed/buckets.csv or .bin",
+    )
+    parser.add_argument(
+        "--buckets-format",
+        choices=BUCKET_FORMATS,
+        default="csv",
+        help="Format of the time buckets, binary writes dense arrays of buckets by symbols",
+    )
+    parser.add_argument(
+        "--break-window",
+        type=int,
+        metavar="N",
+        help="Executions kept for trade breaks, defaults to 2097152, older ones cannot be broken. "
+        "Takes 20 bytes per execution, plus 104 once the first break builds the id map",
+    )
+    parser.add_argument(
+        "--publish",
+        metavar="NAME",
+        help="Publishes live symbol volumes to shared memory NAME for readers, see publish.py",
     )
     args = parser.parse_args()
+    if args.break_window is not None and args.break_window < 1:
+        parser.error("--break-window must keep at least one execution")
     return args
 
 
-def start_program(DATASET_PATH: Path) -> bool:
-    """Initializes base program to compute stock volumes."""
-    my_analyzer = Analyzer(DATASET_PATH)
-    my_analyzer.read_file()
-    my_analyzer.get_top_ten_symbols()
+class RunOptions:
+    """Options of a run of start_program, set from the command line flags by main.
+
+    Options left out keep their defaults, which compute volume with the python engine.
+    """
+
+    workers: int = 1
+    top: int = 10
+    snapshot_every: tuple[int | None, float | None] | None = None
+    trace_symbols: list[str] | None = None
+    trace_dir: Path | None = None
+    cache_dir: Path | None = None
+    engine: str = "python"
+    metrics_path: Path | None = None
+    metrics_format: str = "json"
+    metrics_every: float | None = None
+    feeds: list[str] | None = None
+    checkpoint_file: Path | None = None
+    checkpoint_every: float | None = None
+    resume: bool = False
+    follow: bool = False
+    max_resident: int | None = None
+    spill_dir: Path | None = None
+    bucket_ms: int | None = None
+    buckets_output: Path | None = None
+    buckets_format: str = "csv"
+    execution_window: int | None = None
+    publish_name: str | None = None
+
+    def __init__(self, **options):
+        for name, value in options.items():
+            if not hasattr(RunOptions, name):
+                raise TypeError(f"Unknown run option {name}")
+            setattr(self, name, value)
+
+
+def start_program(DATASET_PATH: Path, options: RunOptions | None = None) -> bool:
+    """Initializes base program to compute stock volumes, with the options main parsed.
+
+    Symbols in trace_symbols are traced during the same pass, see SymbolTracer.
+    With a cache_dir the dataset is read through its columnar cache, see cache.py.
+    With a metrics_path the run's metrics are written there, see metrics.py.
+    With feeds the feed units at those addresses are read instead of the dataset, see feed.py.
+    With a checkpoint_file the run is checkpointed there and can resume from it, and follow
+    keeps reading records appended to the dataset, see checkpoint.py.
+    With max_resident at most that many orders stay in memory, the rest spill to a file in
+    spill_dir, see spill.py.
+    With bucket_ms executed volume is also aggregated into time buckets of that many
+    milliseconds and written to buckets_output, see buckets.py.
+    With an execution_window only that many recent executions can be reversed by trade breaks,
+    see executions.py.
+    With a publish_name the volumes are published to that shared memory segment after every
+    block for other processes to read, see publish.py.
+    """
+    from pitch_volume_analysis.core.buckets import BucketAnalyzer
+    from pitch_volume_analysis.core.checkpoint import Checkpointer, load_checkpoint
+    from pitch_volume_analysis.core.engines import create_engine
+    from pitch_volume_analysis.core.ranking import LiveAnalyzer
+    from pitch_volume_analysis.core.reader import complete_end
+    from pitch_volume_analysis.core.tracer import SymbolTracer
+
+    if options is None:
+        options = RunOptions()
+    if options.bucket_ms is not None:
+        my_analyzer = BucketAnalyzer(DATASET_PATH, options.bucket_ms)
+    elif options.snapshot_every is not None:
+        every_messages, every_seconds = options.snapshot_every
+        my_analyzer = LiveAnalyzer(DATASET_PATH, options.top, every_messages, every_seconds)
+    elif options.engine == "python" and options.workers > 1:
+        my_analyzer = create_engine("parallel", DATASET_PATH, options.workers)
+    else:
+        my_analyzer = create_engine(options.engine, DATASET_PATH, options.workers)
+
+    # Streams are flushed on a signal: the first one stops reading and shows the results so far.
+    if hasattr(DATASET_PATH, "read") or options.feeds or options.checkpoint_file is not None:
+        install_stop_handlers(my_analyzer)
+
+    if options.max_resident is not None:
+        my_analyzer.spill_ledger(options.max_resident, options.spill_dir)
+
+    if options.execution_window is not None:
+        my_analyzer.set_execution_window(options.execution_window)
+
+    if options.checkpoint_file is not None:
+        my_analyzer.checkpointer = Checkpointer(options.checkpoint_file, options.checkpoint_every)
+        if options.resume:
+            state: dict | None = load_checkpoint(options.checkpoint_file, DATASET_PATH)
+            if state is None:
+                print("No usable checkpoint for this file, reading it from the start.\n")
+            else:
+                print(f"Resuming from byte {state['offset']}.\n")
+                my_analyzer.restore(state)
+
+    if options.publish_name is not None:
+        my_analyzer.publisher = create_publisher(options.publish_name)
+
+    if options.metrics_path is not None:
+        my_analyzer.metrics.export_to(
+            options.metrics_path, options.metrics_format, options.metrics_every
+        )
+
+    if options.trace_symbols:
+        print("*** Running Debug Trace ***")
+        my_analyzer.tracer = SymbolTracer(my_analyzer, options.trace_symbols, options.trace_dir)
+
+    if options.feeds:
+        sockets: list = connect_feeds(options.feeds)
+        try:
+            my_analyzer.read_feeds(sockets)
+        finally:
+            for sock in sockets:
+                sock.close()
+    elif options.cache_dir is not None:
+        my_analyzer.read_cached(options.cache_dir)
+    elif options.checkpoint_file is not None:
+        # A record still being appended is left for the next run.
+        my_analyzer.read_file(stop=complete_end(DATASET_PATH, my_analyzer.offset))
+        if options.follow:
+            my_analyzer.get_top_symbols(options.top)
+            my_analyzer.follow(on_update=lambda: my_analyzer.get_top_symbols(options.top))
+        my_analyzer.checkpointer.write(my_analyzer)
+    else:
+        my_analyzer.read_file()
+    my_analyzer.metrics.write()
+    if options.publish_name is not None:
+        my_analyzer.publisher.publish(my_analyzer, finished=True)
+    if options.bucket_ms is not None:
+        my_analyzer.write_buckets(options.buckets_output, options.buckets_format)
+        print(f"Time buckets written to {options.buckets_output}\n")
+    if options.trace_symbols:
+        my_analyzer.tracer.close()
+        print("")
+    my_analyzer.get_top_symbols(options.top)
+    if options.max_resident is not None:
+        storage: dict = my_analyzer.ledger.storage()
+        print(
+            f"Ledger: {storage['resident']} orders resident, {storage['spilled']} spilled to disk"
+        )
+        my_analyzer.ledger.close()
+    if options.publish_name is not None:
+        publisher = my_analyzer.publisher
+        if publisher.published < len(my_analyzer.symbols):
+            print(
+                f"Only the first {publisher.capacity} symbols were published to {publisher.name}"
+            )
+        publisher.close()
     # my_analyzer.print_symbols()
     return True
 
 
+def connect_feeds(addresses: list[str]) -> list:
+    """Connects to every feed unit, exiting with a message when one can't be reached."""
+    from pitch_volume_analysis.core import feed
+
+    sockets: list = []
+    for address in addresses:
+        try:
+            sockets.append(feed.connect(address))
+        except (OSError, ValueError) as error:
+            print(f"Could not connect to feed {address}: {error}")
+            for sock in sockets:
+                sock.close()
+            sys.exit(1)
+    return sockets
+
+
+def create_publisher(name: str):
+    """Creates the shared memory segment volumes are published to, exiting when it exists."""
+    from pitch_volume_analysis.core.publish import VolumePublisher
+
+    try:
+        return VolumePublisher(name)
+    except FileExistsError:
+        print(f"Shared memory {name} already exists, is another run publishing to it?")
+        sys.exit(1)
+
+
+def stdin_is_piped() -> bool:
+    """Returns True when standard input is a pipe or a redirected file rather than a terminal."""
+    try:
+        mode: int = os.fstat(sys.stdin.fileno()).st_mode
+    except (AttributeError, OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode)
+
+
+def install_stop_handlers(my_analyzer) -> None:
+    """Makes SIGINT and SIGTERM stop the analyzer gracefully. A second signal aborts the run."""
+
+    def handle_stop(signal_number, frame) -> None:
+        if my_analyzer.stop_requested:
+            raise KeyboardInterrupt
+        my_analyzer.request_stop()
+
+    signal.signal(signal.SIGINT, handle_stop)
+    signal.signal(signal.SIGTERM, handle_stop)
+
+
 def start_symbol_program(DATASET_PATH: Path, SYMBOL: str) -> bool:
     """Initializes debug program to find the volume of a single stock symbol."""
+    from pitch_volume_analysis.core.symbol_analyzer import SymbolAnalyzer
+
     print(f"*** Running Debug Test ***")
     symbol_analyzer = SymbolAnalyzer(SYMBOL, DATASET_PATH)
     symbol_analyzer.read_file()
@@ -0,0 +1,329 @@
+from collections import Counter
+from operator import itemgetter
+from pathlib import Path
+from pitch_volume_analysis.core.decoder import (
+    LAYOUTS,
+    MESSAGE_TYPE,
+    MESSAGE_TYPES,
+    TRADE_BREAK_TYPE,
+)
+import json
+import os
+import tempfile
+import time
+
+# Phases timed on sampled blocks. read waits for the block, parse splits it into records and
+# counts their types, compute decodes the fields and updates the ledger and volumes.
+PHASES: list[str] = ["read", "parse", "compute"]
+FORMATS: list[str] = ["json", "prometheus"]
+
+# One block in every SAMPLE_EVERY has its phases timed.
+SAMPLE_EVERY: int = 8
+
+message_type = itemgetter(MESSAGE_TYPE)
+
+
+class Metrics:
+    """Counters and timings of a run, updated once per block rather than once per message.
+
+    Phase timings are only taken on sampled blocks, and the ledger high-water mark is checked at
+    block boundaries. Counting message types takes a C level pass over every record, about a
+    tenth of a microsecond each, so it is only done with count_types, which export_to turns on.
+    """
+
+    def __init__(self, sample_every: int = SAMPLE_EVERY, count_types: bool = False):
+        self.sample_every = sample_every
+        self.count_types = count_types
+        self.started: float = time.perf_counter()
+        self.finished: float | None = None
+        self.bytes_read: int = 0
+        self.blocks: int = 0
+        self.messages: int = 0
+        # Message type byte -> messages. Records too short to hold a type count under b"".
+        self.message_types: Counter = Counter()
+        self.ledger_high_water: int = 0
+        self.phase_seconds: dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.sampled_blocks: int = 0
+        # True while the current block has its phases timed.
+        self.sampling: bool = True
+        # Where and how often the metrics are written during the run, see export_to.
+        self.export_path: Path | None = None
+        self.export_format: str = "json"
+        self.export_every: float | None = None
+        self.last_export: float = self.started
+        # Ledger whose resident and spilled orders are reported, see Analyzer.spill_ledger.
+        self.spilling_ledger = None
+
+    def __getstate__(self) -> dict:
+        # Worker processes send their metrics back, but never export on their own.
+        return {
+            **self.__dict__,
+            "export_path": None,
+            "export_every": None,
+            "spilling_ledger": None,
+        }
+
+    def count_records(self, records: list[bytes]) -> None:
+        """Counts the non-blank records of a block, and their types with count_types."""
+        blank: int = records.count(b"")
+        self.messages += len(records) - blank
+        if self.count_types:
+            self.message_types.update(map(message_type, records))
+            if blank:
+                self.message_types[b""] -= blank
+
+    def count_type_codes(self, counts) -> None:
+        """Counts messages and their types from 256 counts indexed by type byte."""
+        for code, count in enumerate(counts):
+            if count:
+                self.message_types[bytes((code,))] += int(count)
+                self.messages += int(count)
+
+    def count_short_records(self, count: int) -> None:
+        """Counts records that are too short to hold a message type."""
+        self.message_types[b""] += count
+        self.messages += count
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        self.phase_seconds[phase] += seconds
+
+    def timed_blocks(self, blocks):
+        """Yields the blocks of a reader, timing the reads of sampled blocks."""
+        clock = time.perf_counter
+        blocks = iter(blocks)
+        while True:
+            start: float = clock()
+            block = next(blocks, None)
+            if block is None:
+                return
+            if self.sampling:
+                self.phase_seconds["read"] += clock() - start
+            yield block
+
+    def end_block(self, size: int, ledger_size: int) -> None:
+        """Records a finished block and picks whether the next one is sampled."""
+        if self.sampling:
+            self.sampled_blocks += 1
+        self.blocks += 1
+        self.bytes_read += size
+        self.track_ledger(ledger_size)
+        self.sampling = self.blocks % self.sample_every == 0
+        if self.export_every is not None:
+            self.check_export()
+
+    def track_ledger(self, ledger_size: int) -> None:
+        if ledger_size > self.ledger_high_water:
+            self.ledger_high_water = ledger_size
+
+    def merge(self, other: "Metrics") -> None:
+        """Adds the counters and timings of another run, such as one chunk of a parallel run.
+
+        The ledger high-water mark is left to the caller, chunk ledgers don't add up.
+        """
+        self.bytes_read += other.bytes_read
+        self.blocks += other.blocks
+        self.messages += other.messages
+        self.message_types.update(other.message_types)
+        self.sampled_blocks += other.sampled_blocks
+        for phase, seconds in other.phase_seconds.items():
+            self.phase_seconds[phase] += seconds
+
+    def finish(self) -> None:
+        """Stops the clock, so rates cover the run rather than the time until export."""
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def skipped_messages(self) -> int | None:
+        """Messages whose type is not used for volume, unknown ones included."""
+        if not self.message_types:
+            return None
+        return sum(
+            count
+            for message_type, count in self.message_types.items()
+            if message_type not in LAYOUTS and message_type != TRADE_BREAK_TYPE
+        )
+
+    @property
+    def unknown_messages(self) -> int | None:
+        """Messages whose type is not part of the PITCH spec, or that are too short to have one."""
+        if not self.message_types:
+            return None
+        return sum(
+            count
+            for message_type, count in self.message_types.items()
+            if message_type not in MESSAGE_TYPES
+        )
+
+    def snapshot(self) -> dict:
+        """Returns every metric as a JSON compatible dict."""
+        elapsed: float = self.elapsed
+        return {
+            "elapsed_seconds": elapsed,
+            "bytes": self.bytes_read,
+            "blocks": self.blocks,
+            "messages": self.messages,
+            "message_types": {
+                message_type.decode("latin-1"): count
+                for message_type, count in sorted(self.message_types.items())
+                if message_type and count
+            },
+            "skipped_messages": self.skipped_messages,
+            "unknown_messages": self.unknown_messages,
+            "ledger_high_water": self.ledger_high_water,
+            "bytes_per_second": self.bytes_read / elapsed if elapsed else 0.0,
+            "messages_per_second": self.messages / elapsed if elapsed else 0.0,
+            "sampled_blocks": self.sampled_blocks,
+            "phase_seconds": dict(self.phase_seconds),
+            "ledger_storage": (
+                self.spilling_ledger.storage() if self.spilling_ledger is not None else None
+            ),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        snapshot: dict = self.snapshot()
+        lines: list[str] = []
+
+        def metric(name: str, kind: str, help: str, samples: list[tuple[str, float]]) -> None:
+            # Metrics that were not collected, such as type counts of a cached run, are left out.
+            if not samples or samples[0][1] is None:
+                return
+            lines.append(f"# HELP pva_{name} {help}")
+            lines.append(f"# TYPE pva_{name} {kind}")
+            lines.extend(f"pva_{name}{labels} {value}" for labels, value in samples)
+
+        metric("bytes_total", "counter", "Bytes of PITCH data read.", [("", snapshot["bytes"])])
+        metric("blocks_total", "counter", "Blocks of PITCH data read.", [("", snapshot["blocks"])])
+        metric("messages_total", "counter", "PITCH messages read.", [("", snapshot["messages"])])
+        metric(
+            "message_type_total",
+            "counter",
+            "PITCH messages read by message type.",
+            [
+                (f'{{type="{escape_label(message_type)}"}}', count)
+                for message_type, count in snapshot["message_types"].items()
+            ],
+        )
+        metric(
+            "skipped_messages_total",
+            "counter",
+            "Messages whose type is not used for volume.",
+            [("", snapshot["skipped_messages"])],
+        )
+        metric(
+            "unknown_messages_total",
+            "counter",
+            "Messages whose type is not part of the PITCH spec.",
+            [("", snapshot["unknown_messages"])],
+        )
+        metric(
+            "ledger_high_water",
+            "gauge",
+            "Most orders resting in the ledger at a block boundary.",
+            [("", snapshot["ledger_high_water"])],
+        )
+        metric(
+            "elapsed_seconds",
+            "gauge",
+            "Seconds spent on the run.",
+            [("", snapshot["elapsed_seconds"])],
+        )
+        metric(
+            "bytes_per_second",
+            "gauge",
+            "Bytes read per second.",
+            [("", snapshot["bytes_per_second"])],
+        )
+        metric(
+            "messages_per_second",
+            "gauge",
+            "Messages read per second.",
+            [("", snapshot["messages_per_second"])],
+        )
+        metric(
+            "sampled_blocks_total",
+            "counter",
+            "Blocks whose phases were timed.",
+            [("", snapshot["sampled_blocks"])],
+        )
+        metric(
+            "phase_seconds_total",
+            "counter",
+            "Seconds spent in each phase of the sampled blocks.",
+            [
+                (f'{{phase="{phase}"}}', seconds)
+                for phase, seconds in snapshot["phase_seconds"].items()
+            ],
+        )
+        storage: dict = snapshot["ledger_storage"] or {}
+        metric(
+            "ledger_resident_orders",
+            "gauge",
+            "Orders resting in memory.",
+            [("", storage.get("resident"))],
+        )
+        metric(
+            "ledger_spilled_orders",
+            "gauge",
+            "Orders resting on disk.",
+            [("", storage.get("spilled"))],
+        )
+        metric(
+            "ledger_spills_total",
+            "counter",
+            "Orders written to disk to stay within the ledger's memory budget.",
+            [("", storage.get("spills"))],
+        )
+        metric(
+            "ledger_faults_total",
+            "counter",
+            "Spilled orders read back from disk.",
+            [("", storage.get("faults"))],
+        )
+        return "\n".join(lines) + "\n"
+
+    def export_to(self, path: Path, format: str = "json", every: float | None = None) -> None:
+        """Writes the metrics to path at the end of the run, and every N seconds with every."""
+        self.count_types = True
+        self.export_path = path
+        self.export_format = format
+        self.export_every = every
+
+    def check_export(self) -> None:
+        """Writes the metrics when the export interval has passed."""
+        now: float = time.perf_counter()
+        if now - self.last_export >= self.export_every:
+            self.last_export = now
+            self.write()
+
+    def write(self) -> None:
+        """Writes the metrics to the export path. Readers never see a partly written file."""
+        if self.export_path is None:
+            return
+        text: str = self.to_prometheus() if self.export_format == "prometheus" else self.to_json()
+        write_atomic(Path(self.export_path), text)
+
+
+def escape_label(value: str) -> str:
+    """Escapes a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Writes text to a temporary file next to path, then renames it over path."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "w") as file:
+            file.write(text)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
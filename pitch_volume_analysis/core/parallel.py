@@ -0,0 +1,226 @@
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.decoder import ADD_ORDER, ORDER_EXECUTED, TRADE_BREAK
+from pitch_volume_analysis.core.executions import DEFAULT_WINDOW, ExecutionIndex
+from pitch_volume_analysis.core.ledger import OrderLedger
+from pitch_volume_analysis.core.metrics import Metrics
+from pitch_volume_analysis.core.reader import detect_compression, read_range_blocks, split_ranges
+from pitch_volume_analysis.core.symbols import SymbolTable
+import os
+import sys
+import traceback
+
+
+class ChunkAnalyzer(Analyzer):
+    """Analyzer for a single byte range of a dataset, run inside a worker process.
+
+    Executions, cancels and trades that reference an order the chunk has not seen cannot be
+    resolved locally. They are kept in order as pending messages for the merge phase, as
+    (kind, order id, shares, symbol id, sequence, execution id) tuples. The sequence is the
+    number of executions the chunk had indexed, so the merge can put them back in between.
+
+    Trade breaks are pending too, with the execution id they break as order id. Breaks of an
+    execution the chunk indexed are applied locally and keep its shares, symbol id and number in
+    the chunk in place of the execution id. Other breaks have no shares and a number of -1.
+    """
+
+    def __init__(
+        self, dataset_path: str, start: int, stop: int, execution_window: int = DEFAULT_WINDOW
+    ):
+        super().__init__(dataset_path)
+        self.start = start
+        self.stop = stop
+        self.executions = ExecutionIndex(execution_window)
+        self.pending: list[tuple[int, int, int, int, int, int]] = []
+
+    def read_file(self) -> None:
+        """Computes stock volume for the records within this chunk's byte range."""
+        for block in self.metrics.timed_blocks(
+            read_range_blocks(self.dataset_path, self.start, self.stop)
+        ):
+            self.process_batch(block)
+
+    def apply_message(self, kind: int, order_id: int, shares: int, symbol_id: int) -> int:
+        """Records messages for unknown orders as pending before applying them locally.
+
+        Trades still add their volume locally, only the ledger update is left for the merge.
+        """
+        if kind != ADD_ORDER and kind != TRADE_BREAK and order_id not in self.ledger:
+            self.pending.append((kind, order_id, shares, symbol_id, self.executions.count, -1))
+        return super().apply_message(kind, order_id, shares, symbol_id)
+
+    def index_execution(self, execution_id: int, shares: int, symbol_id: int) -> None:
+        """Executions of orders the chunk has not seen are pending, they keep their execution id
+        to be indexed if the merge resolves them.
+        """
+        if symbol_id < 0:
+            kind, order_id, shares, symbol_id, sequence, _ = self.pending[-1]
+            self.pending[-1] = (kind, order_id, shares, symbol_id, sequence, execution_id)
+            return
+        super().index_execution(execution_id, shares, symbol_id)
+
+    def break_trade(self, execution_id: int) -> int:
+        """Breaks executions the chunk indexed and records every break as pending."""
+        executions: ExecutionIndex = self.executions
+        count: int = executions.count
+        position: int = executions.find(execution_id)
+        if position < 0:
+            self.pending.append((TRADE_BREAK, execution_id, 0, -1, count, -1))
+            return -1
+        number: int = count - 1 - (count - 1 - position) % executions.window
+        shares, symbol_id = executions.remove(position)
+        self.symbols.volumes[symbol_id] -= shares
+        self.pending.append((TRADE_BREAK, execution_id, shares, symbol_id, count, number))
+        return symbol_id
+
+
+def analyze_chunk(
+    dataset_path: str,
+    start: int,
+    stop: int,
+    count_types: bool = False,
+    execution_window: int = DEFAULT_WINDOW,
+) -> tuple[SymbolTable, OrderLedger, list, ExecutionIndex, Metrics]:
+    """Worker entry point. Returns partial volumes, open orders, pending messages, indexed
+    executions and metrics.
+
+    Symbol ids in the returned ledger and executions refer to the chunk's own symbol table.
+    """
+    chunk_analyzer = ChunkAnalyzer(dataset_path, start, stop, execution_window)
+    chunk_analyzer.metrics.count_types = count_types
+    chunk_analyzer.read_file()
+    return (
+        chunk_analyzer.symbols,
+        chunk_analyzer.ledger,
+        chunk_analyzer.pending,
+        chunk_analyzer.executions,
+        chunk_analyzer.metrics,
+    )
+
+
+class ParallelAnalyzer(Analyzer):
+    """Analyzer that splits the dataset on record boundaries and parses the chunks in a process pool.
+
+    Chunk results are reconciled in file order: each chunk's pending messages are replayed against
+    the orders left open by the chunks before it. PITCH order ids are unique within a session,
+    so the reconciled volumes match the serial Analyzer exactly.
+    """
+
+    def __init__(self, dataset_path: str, workers: int = os.cpu_count()):
+        super().__init__(dataset_path)
+        self.workers = workers
+
+    def read_file(self) -> None:
+        """Parses every chunk in parallel and merges the partial results.
+
+        A compressed dataset can't be split into chunks, it is decompressed and read serially.
+        """
+        if detect_compression(self.dataset_path) is not None:
+            super().read_file()
+            return
+        try:
+            ranges: list[tuple[int, int]] = split_ranges(self.dataset_path, self.workers)
+            if not ranges:
+                return
+            with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+                futures: list = [
+                    executor.submit(
+                        analyze_chunk,
+                        self.dataset_path,
+                        start,
+                        stop,
+                        self.metrics.count_types,
+                        self.executions.window,
+                    )
+                    for start, stop in ranges
+                ]
+                # Merging starts as soon as the first chunk finishes, in file order.
+                for future in futures:
+                    symbols, open_orders, pending, executions, metrics = future.result()
+                    self.merge_chunk(symbols, open_orders, pending, executions)
+                    self.metrics.merge(metrics)
+                    self.metrics.track_ledger(len(self.ledger))
+                    if self.publisher is not None:
+                        self.publisher.publish(self)
+                    if self.metrics.export_every is not None:
+                        self.metrics.check_export()
+            self.metrics.finish()
+
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File {self.dataset_path} not found")
+        except ValueError:
+            print("Value calculation error detected!")
+            print(
+                "Check the dataset for following proper PITCH transaction rules and/or correctness of math operations within code."
+            )
+            sys.exit(1)
+        except:
+            traceback.print_exc()
+            sys.exit(1)
+
+    def merge_chunk(
+        self,
+        symbols: SymbolTable,
+        open_orders: OrderLedger,
+        pending: list,
+        executions: ExecutionIndex,
+    ) -> None:
+        """Folds one chunk's results into the totals. Chunks must be merged in file order.
+
+        The chunk's executions are indexed in file order along with the pending executions the
+        merge resolves, so every execution gets the number it has in a serial run.
+        """
+        volumes: array = self.symbols.volumes
+        symbol_ids: list[int] = [self.symbols.intern(symbol) for symbol in symbols.ids]
+        for symbol_id, volume in zip(symbol_ids, symbols.volumes):
+            volumes[symbol_id] += volume
+
+        execution_ids, execution_shares, execution_symbols = executions.ordered()
+        # Number in the chunk of its oldest indexed execution, older ones expired in the chunk.
+        oldest: int = executions.count - len(execution_ids)
+        # Number the chunk's first execution gets here, before resolved ones are counted.
+        first: int = self.executions.count
+        # Chunk numbers of the executions resolved so far, they were indexed before that number.
+        resolved: list[int] = []
+        merged: int = 0
+
+        def merge_executions(stop: int) -> None:
+            """Indexes the chunk's executions numbered from merged up to stop."""
+            nonlocal merged
+            if merged < oldest:
+                self.executions.skip(min(stop, oldest) - merged)
+                merged = min(stop, oldest)
+            if merged < stop:
+                start, end = merged - oldest, stop - oldest
+                self.executions.extend(
+                    execution_ids[start:end],
+                    execution_shares[start:end],
+                    array("i", [symbol_ids[symbol] for symbol in execution_symbols[start:end]]),
+                )
+                merged = stop
+
+        for kind, order_id, shares, symbol_id, sequence, execution_id in pending:
+            merge_executions(sequence)
+            if kind == TRADE_BREAK:
+                if execution_id < 0:
+                    self.break_trade(order_id)
+                    continue
+                # Executions resolved after the broken one may have expired it in a serial run.
+                number: int = first + execution_id + bisect_right(resolved, execution_id)
+                if self.executions.count - number > self.executions.window:
+                    volumes[symbol_ids[symbol_id]] += shares
+                continue
+            position: int = self.ledger.find(order_id)
+            if position < 0:
+                continue
+            if kind == ORDER_EXECUTED:
+                volumes[self.ledger.symbols[position]] += shares
+                self.executions.add(execution_id, shares, self.ledger.symbols[position])
+                resolved.append(sequence)
+            self.ledger.reduce(position, shares)
+        merge_executions(executions.count)
+
+        for order_id, shares, symbol_id in open_orders.items():
+            self.ledger.add(order_id, shares, symbol_ids[symbol_id])
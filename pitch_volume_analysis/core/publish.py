@@ -0,0 +1,165 @@
+from array import array
+from multiprocessing import resource_tracker, shared_memory
+import struct
+import sys
+import time
+
+# Only the standard library is imported here, so readers such as dashboards start quickly.
+
+FORMAT_VERSION: int = 1
+MAGIC: bytes = b"PVAVOLS\x00"
+
+# Symbols the segment has room for unless told otherwise, 1.1 MB of shared memory.
+DEFAULT_CAPACITY: int = 1 << 16
+# Symbols are the rstripped symbol field of a record, at most 8 bytes in long form messages.
+NAME_WIDTH: int = 8
+
+# magic, format version, capacity, sequence, symbol count, messages, finished.
+HEADER = struct.Struct("=8sIIQQQQ")
+SEQUENCE = struct.Struct("=Q")
+# symbol count, messages, finished.
+COUNTS = struct.Struct("=QQQ")
+SEQUENCE_OFFSET: int = 16
+COUNT_OFFSET: int = 24
+# The volumes start on a cache line of their own.
+VOLUMES_OFFSET: int = 64
+
+# Segments created by this process, the resource tracker removes them when it exits.
+created: set[str] = set()
+
+
+def segment_size(capacity: int) -> int:
+    """Bytes of a segment that publishes up to capacity symbols."""
+    return VOLUMES_OFFSET + capacity * (8 + NAME_WIDTH)
+
+
+class VolumePublisher:
+    """Publishes an analyzer's symbol volumes to a named shared memory segment.
+
+    The segment holds a header, the volumes as native int64 and the symbols as fixed width
+    ASCII names, both in order of first appearance. Writes are guarded by a sequence lock:
+    the sequence is odd while a publish is copying, and readers retry a snapshot when it was
+    odd or changed while they copied. The analyzer never waits on a reader. Python has no
+    memory fences, so the lock relies on stores becoming visible in order, as they do on x86-64.
+
+    publish is called between blocks and costs one copy of the volume array. Symbols past the
+    capacity are left out of the segment.
+    """
+
+    def __init__(self, name: str, capacity: int = DEFAULT_CAPACITY):
+        if capacity < 1:
+            raise ValueError("A shared memory segment must hold at least one symbol")
+        self.capacity: int = capacity
+        self.memory = shared_memory.SharedMemory(name, create=True, size=segment_size(capacity))
+        created.add(self.memory.name)
+        self.buffer: memoryview = self.memory.buf
+        self.names_offset: int = VOLUMES_OFFSET + capacity * 8
+        self.sequence: int = 0
+        # Names are only ever appended, each is written once.
+        self.published: int = 0
+        HEADER.pack_into(self.buffer, 0, MAGIC, FORMAT_VERSION, capacity, 0, 0, 0, 0)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def publish(self, analyzer, finished: bool = False) -> None:
+        """Copies the analyzer's current volumes, new symbols and message count to the segment."""
+        buffer: memoryview = self.buffer
+        symbols = analyzer.symbols
+        count: int = min(len(symbols), self.capacity)
+        self.sequence += 1
+        SEQUENCE.pack_into(buffer, SEQUENCE_OFFSET, self.sequence)
+
+        names_offset: int = self.names_offset + self.published * NAME_WIDTH
+        for name in symbols.names[self.published : count]:
+            buffer[names_offset : names_offset + NAME_WIDTH] = name.encode().ljust(NAME_WIDTH)
+            names_offset += NAME_WIDTH
+        self.published = count
+        # The view is released at once, a live export would stop the volume array from growing.
+        with memoryview(symbols.volumes) as volumes:
+            buffer[VOLUMES_OFFSET : VOLUMES_OFFSET + count * 8] = volumes[:count].cast("B")
+        COUNTS.pack_into(buffer, COUNT_OFFSET, count, analyzer.metrics.messages, int(finished))
+
+        self.sequence += 1
+        SEQUENCE.pack_into(buffer, SEQUENCE_OFFSET, self.sequence)
+
+    def close(self) -> None:
+        """Removes the segment. Readers that attached keep their mapping until they close."""
+        self.memory.close()
+        self.memory.unlink()
+        created.discard(self.memory.name)
+
+
+class VolumeReader:
+    """Reads consistent snapshots of the volumes another process publishes, see VolumePublisher.
+
+    Opening and reading never blocks the publishing analyzer. The segment is only attached to,
+    it is left for its publisher to remove.
+    """
+
+    def __init__(self, name: str):
+        self.memory = attach(name)
+        self.buffer: memoryview = self.memory.buf
+        magic, version, capacity, *_ = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Shared memory {name} does not hold published volumes")
+        self.names_offset: int = VOLUMES_OFFSET + capacity * 8
+        self.names: list[str] = []
+        # Sequence, message count and finished flag of the latest snapshot.
+        self.sequence: int = 0
+        self.messages: int = 0
+        self.finished: bool = False
+        # Snapshots that had to be copied again because a publish was under way.
+        self.retries: int = 0
+
+    def __enter__(self) -> "VolumeReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def snapshot(self, timeout: float = 1.0) -> dict[str, int]:
+        """Returns symbol -> volume in order of first appearance, as of a single publish.
+
+        Raises TimeoutError when no publish could be copied whole within timeout seconds, as
+        happens when the publisher died in the middle of one.
+        """
+        buffer: memoryview = self.buffer
+        deadline: float = time.monotonic() + timeout
+        while True:
+            sequence: int = SEQUENCE.unpack_from(buffer, SEQUENCE_OFFSET)[0]
+            if not sequence & 1:
+                count, messages, finished = COUNTS.unpack_from(buffer, COUNT_OFFSET)
+                volumes: array = array("q")
+                volumes.frombytes(buffer[VOLUMES_OFFSET : VOLUMES_OFFSET + count * 8])
+                start: int = self.names_offset + len(self.names) * NAME_WIDTH
+                names: bytes = buffer[start : self.names_offset + count * NAME_WIDTH].tobytes()
+                if SEQUENCE.unpack_from(buffer, SEQUENCE_OFFSET)[0] == sequence:
+                    break
+            self.retries += 1
+            if time.monotonic() > deadline:
+                raise TimeoutError("The publisher did not finish a publish in time")
+        self.names.extend(
+            names[position : position + NAME_WIDTH].rstrip().decode()
+            for position in range(0, len(names), NAME_WIDTH)
+        )
+        self.sequence, self.messages, self.finished = sequence, messages, bool(finished)
+        return dict(zip(self.names, volumes))
+
+    def close(self) -> None:
+        self.memory.close()
+
+
+def attach(name: str) -> shared_memory.SharedMemory:
+    """Opens an existing segment without the resource tracker removing it when this process exits.
+
+    Before Python 3.13 every attached segment is registered with the tracker like a created one.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name, track=False)
+    memory = shared_memory.SharedMemory(name)
+    if memory.name not in created:
+        resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
@@ -0,0 +1,193 @@
+from array import array
+from pitch_volume_analysis.core.analyzer import Analyzer, print_ranking
+import heapq
+import time
+from typing import Callable
+
+# How many messages pass between clock reads when snapshots are taken every few seconds.
+CLOCK_CHECK_INTERVAL: int = 1024
+
+
+class RankingHeap:
+    """Indexed binary max-heap of symbol ids ordered by their volume.
+
+    The heap reads volumes straight from a SymbolTable's volume array. After a symbol's volume
+    changes, update moves it to its new place in O(log n). Ties rank the symbol that appeared
+    first higher, which matches the order a stable sort of the symbol book produces.
+    """
+
+    __slots__ = ("volumes", "heap", "positions")
+
+    def __init__(self, volumes: array):
+        self.volumes: array = volumes
+        self.heap: array = array("i")
+        # Symbol id -> index of the symbol in heap.
+        self.positions: array = array("i")
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def ranks_above(self, symbol_id: int, other_id: int) -> bool:
+        """Returns True if symbol_id belongs above other_id in the ranking."""
+        volume: int = self.volumes[symbol_id]
+        other_volume: int = self.volumes[other_id]
+        return volume > other_volume or (volume == other_volume and symbol_id < other_id)
+
+    def update(self, symbol_id: int) -> None:
+        """Restores heap order after the volume of a symbol changed in either direction."""
+        if symbol_id >= len(self.positions):
+            self.extend(symbol_id + 1)
+        index: int = self.positions[symbol_id]
+        if self.sift_up(index) == index:
+            self.sift_down(index)
+
+    def extend(self, count: int) -> None:
+        """Enters every symbol id below count that is not in the heap yet."""
+        for symbol_id in range(len(self.positions), count):
+            self.positions.append(len(self.heap))
+            self.heap.append(symbol_id)
+            self.sift_up(len(self.heap) - 1)
+
+    def sift_up(self, index: int) -> int:
+        """Moves the symbol at index towards the root and returns its final index."""
+        heap: array = self.heap
+        positions: array = self.positions
+        symbol_id: int = heap[index]
+        while index:
+            parent: int = (index - 1) >> 1
+            parent_id: int = heap[parent]
+            if not self.ranks_above(symbol_id, parent_id):
+                break
+            heap[index] = parent_id
+            positions[parent_id] = index
+            index = parent
+        heap[index] = symbol_id
+        positions[symbol_id] = index
+        return index
+
+    def sift_down(self, index: int) -> int:
+        """Moves the symbol at index towards the leaves and returns its final index."""
+        heap: array = self.heap
+        positions: array = self.positions
+        size: int = len(heap)
+        symbol_id: int = heap[index]
+        while True:
+            child: int = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and self.ranks_above(heap[child + 1], heap[child]):
+                child += 1
+            child_id: int = heap[child]
+            if not self.ranks_above(child_id, symbol_id):
+                break
+            heap[index] = child_id
+            positions[child_id] = index
+            index = child
+        heap[index] = symbol_id
+        positions[symbol_id] = index
+        return index
+
+    def top(self, count: int) -> list[int]:
+        """Returns the count highest ranked symbol ids without disturbing the heap.
+
+        Walks the heap best first with a small candidate queue, so the cost is O(count log count).
+        """
+        self.extend(len(self.volumes))
+        heap: array = self.heap
+        volumes: array = self.volumes
+        size: int = len(heap)
+        ranked: list[int] = []
+        candidates: list[tuple[int, int, int]] = [(-volumes[heap[0]], heap[0], 0)] if size else []
+        while candidates and len(ranked) < count:
+            _, symbol_id, index = heapq.heappop(candidates)
+            ranked.append(symbol_id)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size:
+                    heapq.heappush(candidates, (-volumes[heap[child]], heap[child], child))
+        return ranked
+
+
+class LiveAnalyzer(Analyzer):
+    """Analyzer that keeps an incremental ranking and takes snapshots of it mid-stream.
+
+    Snapshots are taken every every_messages order messages or every every_seconds seconds.
+    Each snapshot is handed to on_snapshot, which prints it by default.
+    """
+
+    def __init__(
+        self,
+        dataset_path: str,
+        top: int = 10,
+        every_messages: int | None = None,
+        every_seconds: float | None = None,
+        on_snapshot: Callable[[int, list[tuple[str, int]]], None] | None = None,
+    ):
+        super().__init__(dataset_path)
+        self.ranking = RankingHeap(self.symbols.volumes)
+        self.top = top
+        self.every_messages = every_messages
+        self.every_seconds = every_seconds
+        self.on_snapshot = on_snapshot or self.print_snapshot
+        self.messages: int = 0
+        self.next_check: int = every_messages or CLOCK_CHECK_INTERVAL
+        self.deadline: float | None = time.monotonic() + every_seconds if every_seconds else None
+
+    def restore(self, state: dict) -> None:
+        """Continues from a checkpoint and ranks its symbols."""
+        super().restore(state)
+        self.ranking.extend(len(self.symbols))
+
+    def apply_message(self, kind: int, order_id: int, shares: int, symbol_id: int) -> int:
+        """Applies a message, updates the ranking of the symbol it traded and checks the snapshot interval."""
+        symbol_id = super().apply_message(kind, order_id, shares, symbol_id)
+        if symbol_id >= 0:
+            self.ranking.update(symbol_id)
+
+        self.messages += 1
+        if self.messages >= self.next_check:
+            self.check_snapshot()
+        return symbol_id
+
+    def check_snapshot(self) -> None:
+        """Takes a snapshot once the message count or clock interval has passed."""
+        if self.every_messages:
+            self.next_check += self.every_messages
+            self.take_snapshot()
+            return
+
+        self.next_check += CLOCK_CHECK_INTERVAL
+        now: float = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            self.deadline = now + self.every_seconds
+            self.take_snapshot()
+
+    def take_snapshot(self) -> None:
+        """Hands the current ranking to on_snapshot."""
+        self.on_snapshot(self.messages, self.current_ranking(self.top))
+
+    def current_ranking(self, count: int) -> list[tuple[str, int]]:
+        """Returns the current top count (symbol, volume) pairs from the heap."""
+        names: list[str] = self.symbols.names
+        volumes: array = self.symbols.volumes
+        return [(names[symbol_id], volumes[symbol_id]) for symbol_id in self.ranking.top(count)]
+
+    def print_snapshot(self, messages: int, ranking: list[tuple[str, int]]) -> None:
+        """Default snapshot handler, prints the ranking."""
+        print_ranking(ranking, self.top, f" after {messages} messages")
+
+    def get_top_symbols(self, count: int) -> None:
+        """Get the top count stocks straight from the ranking heap."""
+        print_ranking(self.current_ranking(count), count)
+
+
+def parse_snapshot_interval(text: str) -> tuple[int | None, float | None]:
+    """Parses a snapshot interval, a plain message count such as "100000" or seconds such as "5s"."""
+    if text.endswith("s"):
+        seconds: float = float(text[:-1])
+        if seconds <= 0:
+            raise ValueError(text)
+        return None, seconds
+    messages: int = int(text)
+    if messages <= 0:
+        raise ValueError(text)
+    return messages, None
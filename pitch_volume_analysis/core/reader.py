@@ -0,0 +1,336 @@
+import bz2
+import lzma
+import mmap
+import os
+import queue
+import socket
+import threading
+import zlib
+from typing import BinaryIO, Iterator
+
+# Large blocks keep the per-block bookkeeping negligible next to per-message work.
+BLOCK_SIZE: int = 1 << 22
+
+# Leading bytes of each supported compression format -> its name.
+COMPRESSION_MAGIC: dict[bytes, str] = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+}
+# Compressed bytes read at a time, and decompressed blocks the producer thread may run ahead by.
+COMPRESSED_CHUNK: int = 1 << 20
+QUEUE_BLOCKS: int = 4
+
+
+def read_blocks(
+    source,
+    block_size: int = BLOCK_SIZE,
+    use_mmap: bool = True,
+    start: int = 0,
+    stop: int | None = None,
+) -> Iterator:
+    """Yields blocks holding only complete PITCH records from a dataset path or binary stream.
+
+    Regular files are memory mapped. Anything that cannot be mapped, such as a pipe on standard
+    input, is read with readinto so memory stays bounded by the block size. Connected sockets
+    are received with recv_into. Streams and sockets passed in are left open.
+
+    gzip, bz2 and xz input is recognised by its magic bytes and decompressed on a background
+    thread, see read_compressed_blocks.
+
+    start and stop limit a file to a byte range, both must sit on record boundaries.
+    """
+    if isinstance(source, socket.socket):
+        yield from read_socket_blocks(source, block_size)
+        return
+    if hasattr(source, "readinto"):
+        yield from read_stream_blocks(source, block_size, use_mmap, start, stop)
+        return
+    with open(source, "rb") as file:
+        yield from read_stream_blocks(file, block_size, use_mmap, start, stop)
+
+
+def detect_compression(source) -> str | None:
+    """Returns the compression format of a dataset path or stream, None if it is plain text.
+
+    Streams are peeked without consuming anything, streams that can't peek count as plain.
+    """
+    if isinstance(source, socket.socket):
+        return None
+    if hasattr(source, "readinto"):
+        if not hasattr(source, "peek"):
+            return None
+        head: bytes = source.peek(6)[:6]
+    else:
+        with open(source, "rb") as file:
+            head = file.read(6)
+    for magic, compression in COMPRESSION_MAGIC.items():
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def read_stream_blocks(
+    file: BinaryIO,
+    block_size: int = BLOCK_SIZE,
+    use_mmap: bool = True,
+    start: int = 0,
+    stop: int | None = None,
+):
+    """Picks the decompressing, memory mapped or buffered reader for an open binary file."""
+    compression: str | None = detect_compression(file)
+    if compression is not None:
+        if start or stop is not None:
+            raise ValueError("Compressed input can only be read as a whole")
+        yield from read_compressed_blocks(file, compression, block_size)
+        return
+    if use_mmap and is_mappable(file):
+        yield from read_mapped_blocks(file, block_size, start, stop)
+        return
+    if start:
+        file.seek(start)
+    if stop is None:
+        yield from read_buffered_blocks(file, block_size)
+    else:
+        yield from read_into_blocks(limit_reads(file.readinto, stop - start), block_size)
+
+
+def is_mappable(file: BinaryIO) -> bool:
+    """Only non-empty regular files can be memory mapped."""
+    try:
+        stat: os.stat_result = os.fstat(file.fileno())
+    except (AttributeError, OSError):
+        return False
+    return stat.st_size > 0 and (stat.st_mode & 0o170000) == 0o100000
+
+
+def read_mapped_blocks(
+    file: BinaryIO, block_size: int = BLOCK_SIZE, start: int = 0, stop: int | None = None
+) -> Iterator[memoryview]:
+    """Walks newline boundaries in a memory mapped file and yields zero-copy views of the mapping.
+
+    start and stop limit the walk to a byte range, both must sit on record boundaries.
+    Each view is released once the consumer asks for the next block, so it must not be kept.
+    """
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        size: int = len(mapped) if stop is None else stop
+        with memoryview(mapped) as view:
+            while start < size:
+                end: int = mapped.rfind(b"\n", start, min(start + block_size, size)) + 1
+                if end <= start:
+                    # No newline in range, either the last record or one longer than a block.
+                    end = mapped.find(b"\n", start + block_size, size) + 1 or size
+                with view[start:end] as block:
+                    yield block
+                start = end
+
+
+def read_buffered_blocks(file: BinaryIO, block_size: int = BLOCK_SIZE) -> Iterator[memoryview]:
+    """Fills a single preallocated buffer with readinto and yields views of its complete records.
+
+    Used for pipes and other non-seekable inputs. A partial record at the end of a read is moved
+    to the front of the buffer and completed by the next read. Each view is only valid until the
+    consumer asks for the next block.
+    """
+    yield from read_into_blocks(file.readinto, block_size)
+
+
+def read_socket_blocks(sock: socket.socket, block_size: int = BLOCK_SIZE) -> Iterator[memoryview]:
+    """Receives a blocking socket with recv_into and yields views of its complete records."""
+    yield from read_into_blocks(sock.recv_into, block_size)
+
+
+def read_into_blocks(read_into, block_size: int = BLOCK_SIZE) -> Iterator[memoryview]:
+    """Yields views of the complete records that read_into, a readinto style function, receives."""
+    buffer = ReceiveBuffer(block_size)
+    while True:
+        with buffer.space() as space:
+            received: int = read_into(space)
+        block: memoryview | None = buffer.records(received)
+        if block is not None:
+            with block:
+                yield block
+        if not received:
+            return
+        buffer.carry()
+
+
+def read_compressed_blocks(
+    file: BinaryIO, compression: str, block_size: int = BLOCK_SIZE
+) -> Iterator[bytes]:
+    """Decompresses file on a producer thread and yields blocks of its complete records.
+
+    The codecs release the GIL while they decompress, so decompression overlaps with the
+    consumer's parsing. At most QUEUE_BLOCKS blocks wait in the queue between the two.
+    """
+    blocks: queue.Queue = queue.Queue(QUEUE_BLOCKS)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        """Waits for room in the queue, gives up once the consumer has stopped."""
+        while not stopped.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce() -> None:
+        try:
+            pending = bytearray()
+            for data in decompress_stream(file, compression):
+                pending += data
+                if len(pending) < block_size:
+                    continue
+                end: int = pending.rfind(b"\n") + 1
+                if end:
+                    with memoryview(pending) as view:
+                        block: bytes = bytes(view[:end])
+                    del pending[:end]
+                    if not put(block):
+                        return
+            if pending and not put(bytes(pending)):
+                return
+            put(None)
+        except BaseException as error:
+            put(error)
+
+    producer = threading.Thread(target=produce, name="decompress", daemon=True)
+    producer.start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is None:
+                return
+            if isinstance(block, BaseException):
+                raise block
+            yield block
+    finally:
+        stopped.set()
+        producer.join()
+
+
+def decompress_stream(file: BinaryIO, compression: str) -> Iterator[bytes]:
+    """Yields the decompressed data of file, including every member of concatenated archives."""
+    new_decompressor = {
+        "gzip": lambda: zlib.decompressobj(zlib.MAX_WBITS | 16),
+        "bz2": bz2.BZ2Decompressor,
+        "xz": lzma.LZMADecompressor,
+    }[compression]
+    decompressor = new_decompressor()
+    started: bool = False
+    while True:
+        chunk: bytes = file.read(COMPRESSED_CHUNK)
+        if not chunk:
+            break
+        while chunk:
+            started = True
+            data: bytes = decompressor.decompress(chunk)
+            if data:
+                yield data
+            chunk = b""
+            if decompressor.eof:
+                chunk = decompressor.unused_data
+                decompressor = new_decompressor()
+                started = False
+    if started:
+        raise EOFError(f"The {compression} input ended before the end of its stream")
+
+
+def limit_reads(read_into, limit: int):
+    """Wraps a readinto style function so it stops after limit bytes."""
+
+    def read_limited(view: memoryview) -> int:
+        nonlocal limit
+        with view[:limit] as limited:
+            received: int = read_into(limited) or 0
+        limit -= received
+        return received
+
+    return read_limited
+
+
+def complete_end(dataset_path, start: int = 0) -> int:
+    """Returns the end of the last complete record of a file, past start.
+
+    A record still being appended has no newline yet and is left for a later read. Returns start
+    when no record after it is complete, and the file size when the file is shorter than start.
+    """
+    with open(dataset_path, "rb") as file:
+        size: int = os.fstat(file.fileno()).st_size
+        if size <= start:
+            return size
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped.rfind(b"\n", start, size) + 1 or start
+
+
+class ReceiveBuffer:
+    """Preallocated buffer that newline separated PITCH records are read or received into.
+
+    Reads land straight in the buffer, and complete records are handed out as a view of it, so
+    no bytes object is made per read or per message. A record split across reads wraps around:
+    its head is moved to the front of the buffer and the next read completes it. The buffer only
+    grows when a single record is longer than all of it.
+    """
+
+    def __init__(self, size: int = BLOCK_SIZE):
+        self.buffer: bytearray = bytearray(size)
+        self.filled: int = 0
+        # End of the complete records handed out by the last call to records.
+        self.end: int = 0
+
+    def space(self) -> memoryview:
+        """View of the free end of the buffer, the next read goes there."""
+        return memoryview(self.buffer)[self.filled :]
+
+    def records(self, received: int | None) -> memoryview | None:
+        """Accounts for received bytes and returns a view of the complete records in the buffer.
+
+        A read of 0 bytes marks the end of the stream, any unterminated record is returned too.
+        Returns None when no record is complete yet. The view must be released before carry.
+        """
+        if not received:
+            self.end = self.filled
+        else:
+            # Only the bytes just received can hold the last newline, earlier ones were carried.
+            self.filled += received
+            self.end = self.buffer.rfind(b"\n", self.filled - received, self.filled) + 1
+        if not self.end:
+            return None
+        return memoryview(self.buffer)[: self.end]
+
+    def carry(self) -> None:
+        """Moves the partial record after the handed out records to the front of the buffer."""
+        if self.end:
+            self.buffer[: self.filled - self.end] = self.buffer[self.end : self.filled]
+            self.filled -= self.end
+            self.end = 0
+        if self.filled == len(self.buffer):
+            self.buffer.extend(bytes(len(self.buffer)))
+
+
+def read_range_blocks(
+    dataset_path, start: int, stop: int, block_size: int = BLOCK_SIZE
+) -> Iterator[memoryview]:
+    """Memory maps a dataset and yields blocks of the records between two record boundaries."""
+    with open(dataset_path, "rb") as file:
+        yield from read_mapped_blocks(file, block_size, start, stop)
+
+
+def split_ranges(dataset_path, count: int) -> list[tuple[int, int]]:
+    """Splits a dataset into at most count byte ranges that each start and end on a record boundary."""
+    size: int = os.path.getsize(dataset_path)
+    if size == 0:
+        return []
+    with open(dataset_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            bounds: list[int] = [0]
+            for index in range(1, count):
+                boundary: int = mapped.find(b"\n", max(size * index // count, bounds[-1])) + 1
+                if boundary == 0 or boundary >= size:
+                    break
+                if boundary > bounds[-1]:
+                    bounds.append(boundary)
+            bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
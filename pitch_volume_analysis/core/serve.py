@@ -0,0 +1,298 @@
+from collections import OrderedDict
+from pathlib import Path
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.checkpoint import identify
+from pitch_volume_analysis.core.client import default_socket
+from pitch_volume_analysis.core.engines import (
+    SERIAL_ENGINES,
+    choose_engine,
+    create_engine,
+    engine_available,
+)
+from pitch_volume_analysis.core.executions import POSITION_BYTES
+from pitch_volume_analysis.core.reader import complete_end, detect_compression
+from pitch_volume_analysis.core.spill import parse_size
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+# Memory a symbol takes besides its volume: its interned bytes, its name and their dict slots.
+SYMBOL_BYTES: int = 160
+
+
+def main(argv: list[str] | None = None):
+    """Entry point of pva serve, answers analysis requests on a Unix socket until interrupted."""
+    parser = argparse.ArgumentParser(prog="pva serve")
+    parser.add_argument(
+        "-s",
+        "--socket",
+        type=Path,
+        default=default_socket(),
+        help="Unix socket to listen on, defaults to pva-UID.sock in the temporary directory",
+    )
+    parser.add_argument(
+        "-m",
+        "--cache-memory",
+        type=parse_size,
+        default="1G",
+        help="Memory for warm analyses of recently used files, such as 512M",
+    )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=[*SERIAL_ENGINES, "auto"],
+        default="python",
+        help="Engine that computes volume of files that are not warm, auto picks one by size",
+    )
+    args = parser.parse_args(argv)
+    if args.engine == "numpy" and not engine_available("numpy"):
+        print("NumPy is not installed, using the python engine instead.\n")
+        args.engine = "python"
+
+    server = AnalysisServer(args.socket, WarmCache(args.cache_memory), args.engine)
+    print(f"Serving on {args.socket} with {args.cache_memory} bytes of warm cache. Ctrl+C stops.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("")
+    finally:
+        server.server_close()
+
+
+def analyzer_bytes(my_analyzer: Analyzer) -> int:
+    """Estimates the memory held by a finished analyzer's ledger, executions and symbols."""
+    ledger = my_analyzer.ledger
+    executions = my_analyzer.executions
+    symbols = my_analyzer.symbols
+    arrays: tuple = (
+        ledger.keys,
+        ledger.shares,
+        ledger.symbols,
+        executions.ids,
+        executions.shares,
+        executions.symbols,
+        symbols.volumes,
+    )
+    size: int = sum(len(cells) * cells.itemsize for cells in arrays)
+    if executions.positions is not None:
+        size += len(executions.positions) * POSITION_BYTES
+    return size + len(symbols) * SYMBOL_BYTES
+
+
+def is_offset(value: object) -> bool:
+    """Returns whether a request field is a non-negative integer, JSON true and false are not."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def check_boundary(path: str, offset: int) -> None:
+    """Raises ValueError unless offset is the start of the file or follows a newline."""
+    if offset:
+        with open(path, "rb") as file:
+            file.seek(offset - 1)
+            if file.read(1) != b"\n":
+                raise ValueError(f"Byte {offset} of {path} is not the start of a record")
+
+
+class WarmCache:
+    """Finished analyzers of recently used byte ranges of files, within max_bytes of memory.
+
+    Entries are keyed by (path, start, end) and hold the analyzer, the identity of the file up to
+    end and the analyzer's size. The least recently used entries are evicted first.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[tuple[str, int, int], tuple[Analyzer, dict, int]] = OrderedDict()
+        self.used: int = 0
+        self.hits: int = 0
+        self.extensions: int = 0
+        self.misses: int = 0
+
+    def get(self, key: tuple[str, int, int]) -> tuple[Analyzer, dict, int] | None:
+        entry: tuple | None = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def take_prefix(self, path: str, start: int, end: int) -> tuple | None:
+        """Removes and returns the entry of the longest range of path from start ending before end.
+
+        Its analyzer can continue to end instead of computing the range again.
+        """
+        prefixes: list = [key for key in self.entries if key[:2] == (path, start) and key[2] < end]
+        if not prefixes:
+            return None
+        return self.pop(max(prefixes, key=lambda key: key[2]))
+
+    def pop(self, key: tuple[str, int, int]) -> tuple | None:
+        entry: tuple | None = self.entries.pop(key, None)
+        if entry is not None:
+            self.used -= entry[2]
+        return entry
+
+    def put(self, key: tuple[str, int, int], my_analyzer: Analyzer, identity: dict) -> None:
+        """Caches an analyzer, evicting the least recently used ones until it fits."""
+        self.pop(key)
+        size: int = analyzer_bytes(my_analyzer)
+        if size > self.max_bytes:
+            return
+        while self.used + size > self.max_bytes:
+            self.pop(next(iter(self.entries)))
+        self.entries[key] = (my_analyzer, identity, size)
+        self.used += size
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.used,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "extensions": self.extensions,
+            "misses": self.misses,
+        }
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Answers every request line of one connection until the client closes it."""
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                reply: dict = self.server.answer(json.loads(line))
+            except (ValueError, AttributeError):
+                reply = {"ok": False, "error": "Requests are JSON objects, one per line"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class AnalysisServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server that keeps the analyses of recently used files warm, see WarmCache.
+
+    Each connection gets a thread, but requests are answered one at a time since computing
+    volume holds the GIL. A request for a range that is cached is answered without reading the
+    file, and a range that continues a cached one, such as a file that grew, only computes the
+    new records.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, cache: WarmCache, engine: str = "python"):
+        self.socket_path = Path(socket_path)
+        self.cache = cache
+        self.engine = engine
+        self.lock = threading.Lock()
+        # A socket left behind by a server that was killed would fail the bind.
+        if self.socket_path.is_socket():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+                raise OSError(f"pva serve is already running on {self.socket_path}")
+            except ConnectionRefusedError:
+                self.socket_path.unlink()
+            finally:
+                probe.close()
+        super().__init__(str(self.socket_path), RequestHandler)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.socket_path.unlink(missing_ok=True)
+
+    def answer(self, request: dict) -> dict:
+        """Answers a request and returns the reply.
+
+        Analysis requests have a path and optionally a start and stop byte offset, which must
+        fall on record boundaries, top, the number of top symbols to return (10 by default), and
+        symbols, a list of symbols whose volumes to return. {"command": "stats"} returns the
+        warm cache statistics. Replies have ok and either the results or an error.
+        """
+        started: float = time.perf_counter()
+        with self.lock:
+            if request.get("command") == "stats":
+                return {"ok": True, **self.cache.stats()}
+            start, stop = request.get("start") or 0, request.get("stop")
+            if not is_offset(start) or stop is not None and not is_offset(stop):
+                return {"ok": False, "error": "start and stop must be byte offsets"}
+            top: int | None = request.get("top", 10)
+            if top is not None and not is_offset(top):
+                return {"ok": False, "error": "top must be a number of symbols"}
+            symbols: list[str] = request.get("symbols") or []
+            if not isinstance(symbols, list) or not all(isinstance(name, str) for name in symbols):
+                return {"ok": False, "error": "symbols must be a list of symbols"}
+            try:
+                my_analyzer, warmth = self.analyze(request["path"], start, stop)
+            except KeyError:
+                return {"ok": False, "error": "Analysis requests need a path"}
+            except (OSError, ValueError) as error:
+                return {"ok": False, "error": str(error)}
+            except SystemExit:
+                # Analyzer printed why the file could not be read.
+                return {"ok": False, "error": f"{request['path']} could not be analyzed"}
+
+            reply: dict = {"ok": True, "warm": warmth, "messages": my_analyzer.metrics.messages}
+            if top:
+                reply["top"] = my_analyzer.symbols.top(top)
+            if symbols:
+                ids: dict[bytes, int] = my_analyzer.symbols.ids
+                volumes = my_analyzer.symbols.volumes
+                reply["volumes"] = {}
+                for symbol in map(str.upper, symbols):
+                    symbol_id: int | None = ids.get(symbol.encode())
+                    reply["volumes"][symbol] = 0 if symbol_id is None else volumes[symbol_id]
+        reply["seconds"] = time.perf_counter() - started
+        return reply
+
+    def analyze(self, path: str, start: int, stop: int | None) -> tuple[Analyzer, str]:
+        """Returns the analyzer of a byte range of a file and whether it was a hit, extended or a
+        miss. Without a stop the range ends with the last complete record.
+        """
+        path = str(Path(path).resolve())
+        if not Path(path).is_file():
+            raise FileNotFoundError(f"File {path} not found")
+        compressed: bool = detect_compression(path) is not None
+        if compressed:
+            if start or stop is not None:
+                raise ValueError("Byte ranges can only be read from uncompressed files")
+            # Compressed files are cached whole, keyed by their size.
+            end: int = os.stat(path).st_size
+        else:
+            end = complete_end(path, start) if stop is None else stop
+            check_boundary(path, start)
+            check_boundary(path, end)
+        if end < start:
+            raise ValueError(f"The range {start}-{end} ends before it starts")
+        key: tuple[str, int, int] = (path, start, end)
+        identity: dict = identify(path, end)
+
+        entry: tuple | None = self.cache.get(key)
+        if entry is not None and entry[1] == identity:
+            self.cache.hits += 1
+            return entry[0], "hit"
+
+        warmth: str = "miss"
+        my_analyzer: Analyzer | None = None
+        if not compressed:
+            prefix: tuple | None = self.cache.take_prefix(path, start, end)
+            if prefix is not None and identify(path, prefix[0].offset) == prefix[1]:
+                my_analyzer = prefix[0]
+                warmth = "extended"
+        if my_analyzer is None:
+            engine: str = self.engine
+            if engine == "auto":
+                engine = choose_engine(path, SERIAL_ENGINES)[0]
+            my_analyzer = create_engine(engine, path)
+            my_analyzer.offset = start
+
+        if compressed:
+            my_analyzer.read_file()
+        else:
+            my_analyzer.read_file(stop=end)
+        if warmth == "extended":
+            self.cache.extensions += 1
+        else:
+            self.cache.misses += 1
+        self.cache.put(key, my_analyzer, identity)
+        return my_analyzer, warmth
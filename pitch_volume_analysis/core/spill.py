@@ -0,0 +1,196 @@
+from array import array
+from pitch_volume_analysis.core.ledger import HASH_MULTIPLIER, TOMBSTONE, OrderLedger
+from typing import Iterator
+import os
+import sqlite3
+import tempfile
+import weakref
+
+# Bytes of memory per table position: order id, shares and symbol id, a spill count and an age.
+POSITION_BYTES: int = 8 + 8 + 4 + 4 + 8
+# Pages SQLite may cache, in KiB.
+CACHE_KIB: int = 2048
+# Size suffixes accepted by parse_size.
+UNITS: dict[str, int] = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+class SpillingLedger(OrderLedger):
+    """OrderLedger that keeps at most max_resident orders in memory and spills the rest to disk.
+
+    When the budget is full, the orders that have rested longest are written to a scratch
+    SQLite file in directory, a batch at a time. Finding a spilled order reads it back into
+    memory, so positions returned by find stay valid exactly as with OrderLedger and volumes
+    come out identical.
+
+    The table never grows past twice the budget, so memory stays under POSITION_BYTES per
+    position however many orders rest. A count of spilled orders per hash bucket lets lookups of
+    orders that were never spilled skip the disk.
+    """
+
+    __slots__ = (
+        "max_resident",
+        "spilled",
+        "spills",
+        "faults",
+        "spill_counts",
+        "ages",
+        "oldest",
+        "store",
+        "path",
+        "closer",
+        "__weakref__",
+    )
+
+    def __init__(self, max_resident: int, directory=None):
+        self.max_resident: int = max(max_resident, 1)
+        super().__init__(2 * self.max_resident + 2)
+        # Orders on disk now, and orders written to or read back from it over the run.
+        self.spilled: int = 0
+        self.spills: int = 0
+        self.faults: int = 0
+        # Spilled orders per hash bucket, 0 means an order id is certainly not on disk.
+        self.spill_counts: array = array("I", [0]) * len(self.keys)
+        # Order ids in the order they became resident, oldest from the oldest index on.
+        self.ages: array = array("q")
+        self.oldest: int = 0
+        descriptor, self.path = tempfile.mkstemp(
+            prefix="pva-ledger-", suffix=".sqlite", dir=directory
+        )
+        os.close(descriptor)
+        # The file is scratch space, so it is never journaled or synced.
+        self.store = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self.store.execute("PRAGMA journal_mode = OFF")
+        self.store.execute("PRAGMA synchronous = OFF")
+        self.store.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+        self.store.execute(
+            "CREATE TABLE orders (order_id INTEGER PRIMARY KEY, shares INTEGER, symbol_id INTEGER)"
+        )
+        # One transaction for the ledger's lifetime, committing each statement costs more than it.
+        self.store.execute("BEGIN")
+        self.closer = weakref.finalize(self, remove_store, self.store, self.path)
+
+    def __len__(self) -> int:
+        return self.size + self.spilled
+
+    def find(self, order_id: int) -> int:
+        """Returns the table position of an order, reading it back from disk if it was spilled."""
+        position: int = OrderLedger.find(self, order_id)
+        if position >= 0 or not self.spilled or not self.spill_counts[self.bucket(order_id)]:
+            return position
+        row: tuple | None = self.unspill(order_id)
+        if row is None:
+            return -1
+        self.make_room()
+        OrderLedger.add(self, order_id, *row)
+        self.remember(order_id)
+        return OrderLedger.find(self, order_id)
+
+    def add(self, order_id: int, shares: int, symbol_id: int) -> bool:
+        """Enters a new resting order. Returns False if the order id is resting, even on disk."""
+        if self.spilled and self.spill_counts[self.bucket(order_id)]:
+            row = self.store.execute(
+                "SELECT 1 FROM orders WHERE order_id = ?", (order_id,)
+            ).fetchone()
+            if row is not None:
+                return False
+        self.make_room()
+        if not OrderLedger.add(self, order_id, shares, symbol_id):
+            return False
+        self.remember(order_id)
+        return True
+
+    def items(self) -> Iterator[tuple[int, int, int]]:
+        """Yields (order id, remaining shares, symbol id) for every order, resident or spilled."""
+        yield from OrderLedger.items(self)
+        yield from self.store.execute("SELECT order_id, shares, symbol_id FROM orders")
+
+    def resize(self) -> None:
+        """Rebuilds the table at the same capacity, only tombstones need clearing."""
+        keys, shares, symbols = self.keys, self.shares, self.symbols
+        self.allocate(len(keys))
+        for position in range(len(keys)):
+            if keys[position] >= 0:
+                OrderLedger.add(self, keys[position], shares[position], symbols[position])
+
+    def bucket(self, order_id: int) -> int:
+        return (order_id * HASH_MULTIPLIER >> 32) & self.mask
+
+    def make_room(self) -> None:
+        """Spills the longest resting orders once the budget is full, an eighth of it at a time."""
+        if self.size < self.max_resident:
+            return
+        batch: int = max(1, self.max_resident // 8)
+        rows: list[tuple[int, int, int]] = []
+        ages: array = self.ages
+        while len(rows) < batch and self.oldest < len(ages):
+            order_id: int = ages[self.oldest]
+            self.oldest += 1
+            position: int = OrderLedger.find(self, order_id)
+            if position < 0:
+                continue
+            rows.append((order_id, self.shares[position], self.symbols[position]))
+            self.keys[position] = TOMBSTONE
+            self.size -= 1
+            self.spill_counts[self.bucket(order_id)] += 1
+        self.store.executemany("INSERT INTO orders VALUES (?, ?, ?)", rows)
+        self.spilled += len(rows)
+        self.spills += len(rows)
+
+    def unspill(self, order_id: int) -> tuple[int, int] | None:
+        """Removes an order from disk and returns (shares, symbol id), None if it is not there."""
+        row: tuple | None = self.store.execute(
+            "DELETE FROM orders WHERE order_id = ? RETURNING shares, symbol_id", (order_id,)
+        ).fetchone()
+        if row is not None:
+            self.spill_counts[self.bucket(order_id)] -= 1
+            self.spilled -= 1
+            self.faults += 1
+        return row
+
+    def remember(self, order_id: int) -> None:
+        """Notes that an order became resident. Ids that left are dropped when the ages fill up."""
+        if len(self.ages) >= len(self.keys):
+            find = OrderLedger.find
+            self.ages = array(
+                "q",
+                [order_id for order_id in self.ages[self.oldest :] if find(self, order_id) >= 0],
+            )
+            self.oldest = 0
+        self.ages.append(order_id)
+
+    def storage(self) -> dict[str, int]:
+        """Counts of resident and spilled orders, for metrics and reports."""
+        return {
+            "resident": self.size,
+            "spilled": self.spilled,
+            "max_resident": self.max_resident,
+            "spills": self.spills,
+            "faults": self.faults,
+        }
+
+    def close(self) -> None:
+        """Closes and deletes the scratch file."""
+        self.closer()
+
+
+def remove_store(store: sqlite3.Connection, path: str) -> None:
+    store.close()
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def parse_size(text: str) -> int:
+    """Parses a byte count with an optional K, M or G suffix, such as 512M."""
+    text = text.strip().upper().removesuffix("B")
+    unit: str = text[-1:] if text[-1:] in UNITS else ""
+    return int(float(text[: len(text) - len(unit)]) * UNITS[unit])
+
+
+def resident_budget(memory_bytes: int) -> int:
+    """Most resident orders whose table fits in memory_bytes, at least one."""
+    positions: int = max(memory_bytes // POSITION_BYTES, 4)
+    # Tables are a power of two positions, twice the budget plus two.
+    capacity: int = 1 << (positions.bit_length() - 1)
+    return max(capacity // 2 - 1, 1)
@@ -0,0 +1,153 @@
+from array import array
+from pathlib import Path
+from pitch_volume_analysis.core.decoder import (
+    ADD_ORDER,
+    EXECUTION_IDS,
+    LAYOUTS,
+    MESSAGE_TYPE,
+    ORDER_ID,
+    TRADE_BREAK_TYPE,
+)
+from pitch_volume_analysis.core.reader import detect_compression, read_blocks
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+FORMAT_VERSION: int = 2
+MAGIC: bytes = b"PVAINDEX"
+# The index sits next to its dataset, named after it with this suffix.
+SUFFIX: str = ".symidx"
+
+
+def index_path(dataset_path) -> Path:
+    return Path(f"{dataset_path}{SUFFIX}")
+
+
+def build_index(dataset_path) -> Path:
+    """Indexes the byte offset of every record that can change each symbol's volume, in one pass.
+
+    A symbol's records are its adds and trades, every execution, cancel or trade that
+    references an order id the symbol added, and every trade break of one of those executions
+    or trades. Order and execution ids are matched byte for byte, as SymbolAnalyzer matches
+    them. Returns the path of the index.
+
+    Offsets point into the file as stored, so compressed datasets can't be indexed.
+    """
+    if detect_compression(dataset_path) is not None:
+        raise ValueError(f"{dataset_path} is compressed, only plain datasets can be indexed")
+    offsets: dict[bytes, array] = {}
+    # Order id -> symbol that added it, and every symbol for ids added by more than one.
+    order_symbols: dict[bytes, bytes] = {}
+    shared_orders: dict[bytes, set[bytes]] = {}
+    # Execution id -> symbols the execution or trade can count volume for.
+    execution_symbols: dict[bytes, tuple | set] = {}
+    block_start: int = 0
+    for block in read_blocks(dataset_path):
+        position: int = block_start
+        for record in bytes(block).split(b"\n"):
+            layout: tuple | None = LAYOUTS.get(record[MESSAGE_TYPE])
+            if layout is None:
+                if record[MESSAGE_TYPE] == TRADE_BREAK_TYPE:
+                    for owner in execution_symbols.get(record[ORDER_ID], ()):
+                        offsets[owner].append(position)
+            else:
+                kind, _, symbol_field = layout
+                order_id: bytes = record[ORDER_ID]
+                symbol: bytes | None = None
+                if symbol_field is not None:
+                    symbol = record[symbol_field].rstrip()
+                    offsets.setdefault(symbol, array("q")).append(position)
+                added: bytes | None = order_symbols.get(order_id)
+                if added is not None:
+                    for owner in shared_orders.get(order_id) or (added,):
+                        if owner != symbol:
+                            offsets[owner].append(position)
+                if kind == ADD_ORDER and added != symbol:
+                    if added is None:
+                        order_symbols[order_id] = symbol
+                    else:
+                        shared_orders.setdefault(order_id, {added}).add(symbol)
+                execution_field: slice | None = EXECUTION_IDS.get(record[MESSAGE_TYPE])
+                if execution_field is not None:
+                    owners: tuple | set = shared_orders.get(order_id) or (
+                        () if added is None else (added,)
+                    )
+                    if symbol is not None and symbol not in owners:
+                        owners = (*owners, symbol)
+                    execution_symbols[record[execution_field]] = owners
+            position += len(record) + 1
+        block_start += len(block)
+
+    stat: os.stat_result = os.stat(dataset_path)
+    symbols: dict[str, list[int]] = {}
+    start: int = 0
+    for symbol, symbol_offsets in offsets.items():
+        symbols[symbol.decode()] = [start, len(symbol_offsets)]
+        start += len(symbol_offsets)
+    header: bytes = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "symbols": symbols,
+        }
+    ).encode()
+
+    path: Path = index_path(dataset_path)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack("<I", len(header)))
+            file.write(header)
+            for symbol_offsets in offsets.values():
+                symbol_offsets.tofile(file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
+
+
+def load_offsets(dataset_path, symbol: bytes) -> array | None:
+    """Reads the record offsets of one symbol from the dataset's index.
+
+    Returns None when the dataset has no index, or when the dataset's size or mtime changed
+    since it was indexed. A symbol that never appears has no offsets.
+    """
+    try:
+        with open(index_path(dataset_path), "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = struct.unpack("<I", file.read(4))
+            meta: dict = json.loads(file.read(length))
+            stat: os.stat_result = os.stat(dataset_path)
+            if (
+                meta.get("version") != FORMAT_VERSION
+                or meta["byteorder"] != sys.byteorder
+                or meta["size"] != stat.st_size
+                or meta["mtime_ns"] != stat.st_mtime_ns
+            ):
+                return None
+            offsets: array = array("q")
+            start, count = meta["symbols"].get(symbol.decode(), (0, 0))
+            file.seek(start * offsets.itemsize, os.SEEK_CUR)
+            offsets.fromfile(file, count)
+            return offsets
+    except (FileNotFoundError, EOFError, KeyError, ValueError, struct.error):
+        return None
+
+
+def read_indexed_records(dataset_path, offsets: array):
+    """Yields the records starting at offsets, reading nothing else of the dataset."""
+    if not offsets:
+        return
+    with open(dataset_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in offsets:
+                end: int = mapped.find(b"\n", offset)
+                yield mapped[offset : end if end >= 0 else len(mapped)]
@@ -0,0 +1,67 @@
+from array import array
+from typing import Iterator
+
+# NumPy is imported by the first ranking of VECTORIZED_RANKING symbols or more. Fewer symbols are
+# sorted faster than NumPy is imported. numpy is None once it turned out not to be installed.
+UNLOADED = object()
+numpy = UNLOADED
+VECTORIZED_RANKING: int = 4096
+
+
+class SymbolTable:
+    """Interns stock symbols to small int ids and keeps their volumes in a dense array.
+
+    Symbols are keyed by the raw bytes the decoder slices out of a record, so the hot path never
+    decodes or hashes a str. Ids are handed out in order of first appearance.
+    """
+
+    __slots__ = ("ids", "names", "volumes")
+
+    def __init__(self):
+        self.ids: dict[bytes, int] = {}
+        self.names: list[str] = []
+        self.volumes: array = array("q")
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, symbol: bytes) -> int:
+        """Returns the id of a symbol, entering it with zero volume the first time it is seen."""
+        symbol_id: int | None = self.ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = len(self.names)
+            self.ids[symbol] = symbol_id
+            self.names.append(symbol.decode())
+            self.volumes.append(0)
+        return symbol_id
+
+    def items(self) -> Iterator[tuple[str, int]]:
+        """Yields (symbol, volume) in order of first appearance."""
+        return zip(self.names, self.volumes)
+
+    def top(self, count: int) -> list[tuple[str, int]]:
+        """Returns the count symbols with the most volume in descending order.
+
+        Ties keep their order of first appearance. Rankings of many symbols are vectorized when
+        NumPy is installed.
+        """
+        if len(self.volumes) >= VECTORIZED_RANKING and load_numpy() is not None:
+            volumes = numpy.frombuffer(self.volumes, dtype=numpy.int64)
+            ranked: list[int] = numpy.argsort(-volumes, kind="stable")[:count].tolist()
+            del volumes
+        else:
+            ranked = sorted(range(len(self.volumes)), key=self.volumes.__getitem__, reverse=True)[
+                :count
+            ]
+        return [(self.names[symbol_id], self.volumes[symbol_id]) for symbol_id in ranked]
+
+
+def load_numpy():
+    """Imports NumPy on first use, returns None when it is not installed."""
+    global numpy
+    if numpy is UNLOADED:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+    return numpy
@@ -0,0 +1,153 @@
+from pathlib import Path
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.decoder import (
+    ADD_ORDER,
+    ORDER_CANCEL,
+    ORDER_EXECUTED,
+    TRADE,
+    TRADE_BREAK,
+)
+from pitch_volume_analysis.core.ledger import format_order_id
+import sys
+from typing import TextIO
+
+# Trace lines are joined and written in batches of this many lines.
+FLUSH_LINES: int = 4096
+
+
+class TraceWriter:
+    """Collects trace lines and writes them to a text stream in large batches."""
+
+    def __init__(self, stream: TextIO, close_stream: bool = False):
+        self.stream = stream
+        self.close_stream = close_stream
+        self.lines: list[str] = []
+
+    def write(self, line: str) -> None:
+        """Queues a line, writing the batch out once it is full."""
+        self.lines.append(line)
+        if len(self.lines) >= FLUSH_LINES:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes every queued line to the stream."""
+        if self.lines:
+            self.lines.append("")
+            self.stream.write("\n".join(self.lines))
+            self.lines.clear()
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Flushes the queued lines and closes streams the writer opened."""
+        self.flush()
+        if self.close_stream:
+            self.stream.close()
+
+
+class SymbolTracer:
+    """Traces the add, cancel, execute, trade and trade break events of a watch-list of symbols.
+
+    The tracer is attached to an Analyzer and sees every decoded message before it is applied,
+    so a watch-list of any size costs a single pass over the dataset. Events follow the same
+    rules the Analyzer uses to compute volume and are written in SymbolAnalyzer's format, either
+    to one buffered stream or to one SYMBOL.trace file per symbol in trace_dir.
+    """
+
+    def __init__(
+        self,
+        my_analyzer: Analyzer,
+        symbols: list[str],
+        trace_dir: Path | None = None,
+        stream: TextIO = sys.stdout,
+    ):
+        self.analyzer = my_analyzer
+        self.writers: dict[str, TraceWriter] = {}
+        if trace_dir is None:
+            shared_writer = TraceWriter(stream)
+            self.writers = {symbol: shared_writer for symbol in symbols}
+        else:
+            Path(trace_dir).mkdir(parents=True, exist_ok=True)
+            for symbol in symbols:
+                trace_file: TextIO = open(Path(trace_dir, f"{symbol}.trace"), "w")
+                self.writers[symbol] = TraceWriter(trace_file, close_stream=True)
+        # Symbol id -> writer, or None for symbols that are not watched. Filled in as ids appear.
+        self.writers_by_id: list[TraceWriter | None] = []
+        # Resting orders of watched symbols, so executions and cancels of other orders are skipped.
+        self.watched_orders: set[int] = set()
+
+    def writer_for(self, symbol_id: int) -> TraceWriter | None:
+        """Returns the writer of a symbol id, or None if the symbol is not watched."""
+        writers_by_id: list = self.writers_by_id
+        if symbol_id >= len(writers_by_id):
+            names: list[str] = self.analyzer.symbols.names
+            for name in names[len(writers_by_id) : symbol_id + 1]:
+                writers_by_id.append(self.writers.get(name))
+        return writers_by_id[symbol_id]
+
+    def __call__(self, kind: int, order_id: int, shares: int, symbol_id: int) -> None:
+        """Traces a decoded message against the ledger state from just before it is applied."""
+        if kind == ADD_ORDER:
+            writer: TraceWriter | None = self.writer_for(symbol_id)
+            if writer is not None and self.analyzer.ledger.find(order_id) < 0:
+                symbol: str = self.analyzer.symbols.names[symbol_id]
+                writer.write(f"{symbol}: {format_order_id(order_id)} added to ledger")
+                self.watched_orders.add(order_id)
+            return
+
+        if kind == TRADE_BREAK:
+            # Breaks carry the execution id they break as order_id.
+            executions = self.analyzer.executions
+            position = executions.find(order_id)
+            if position >= 0:
+                writer = self.writer_for(executions.symbols[position])
+                if writer is not None:
+                    symbol = self.analyzer.symbols.names[executions.symbols[position]]
+                    writer.write(
+                        f"{symbol}: {format_order_id(order_id)} broken, "
+                        f"{executions.shares[position]} removed from volume"
+                    )
+            return
+
+        if kind == TRADE:
+            writer = self.writer_for(symbol_id)
+            if writer is not None:
+                symbol = self.analyzer.symbols.names[symbol_id]
+                writer.write(f"{symbol}: {format_order_id(order_id)} {shares} added to volume")
+
+        if order_id not in self.watched_orders:
+            return
+
+        ledger = self.analyzer.ledger
+        position: int = ledger.find(order_id)
+        resting_symbol_id: int = ledger.symbols[position]
+        writer = self.writer_for(resting_symbol_id)
+        symbol = self.analyzer.symbols.names[resting_symbol_id]
+        order: str = format_order_id(order_id)
+        shares_left: int = ledger.shares[position] - shares
+
+        if kind == ORDER_CANCEL:
+            if shares_left == 0:
+                writer.write(f"{symbol}: {order} canceled")
+            else:
+                writer.write(
+                    f"{symbol}: {order} canceled {shares}, shares Remaining {shares_left}"
+                )
+        else:
+            if kind == ORDER_EXECUTED:
+                writer.write(f"{symbol}: {order} {shares} added to volume")
+            if shares_left == 0:
+                writer.write(f"{symbol}: {order} removed")
+            else:
+                writer.write(f"{symbol}: {order} shares Remaining {shares_left}")
+
+        if shares_left == 0:
+            self.watched_orders.discard(order_id)
+
+    def close(self) -> None:
+        """Writes the total volume of every watched symbol and flushes all writers."""
+        for symbol, writer in self.writers.items():
+            symbol_id: int | None = self.analyzer.symbols.ids.get(symbol.encode())
+            volume: int = 0 if symbol_id is None else self.analyzer.symbols.volumes[symbol_id]
+            writer.write(f"{symbol}: (Total) {volume}")
+        for writer in set(self.writers.values()):
+            writer.close()
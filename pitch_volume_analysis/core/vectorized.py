@@ -0,0 +1,476 @@
+from array import array
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.cache import ColumnCache
+from pitch_volume_analysis.core.decoder import (
+    ADD_ORDER,
+    EXECUTION_IDS,
+    LAYOUTS,
+    ORDER_EXECUTED,
+    TRADE,
+    TRADE_BREAK,
+    TRADE_BREAK_TYPE,
+)
+from pitch_volume_analysis.core.ledger import EMPTY, HASH_MULTIPLIER, OrderLedger
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+NEWLINE: int = ord("\n")
+SYMBOL_START: int = 29
+SYMBOL_WIDTH: int = 8
+# Decoded messages held before they are computed, about 120 MB of columns. Orders that are
+# still resting when a batch is computed are replayed message by message in the next one, so
+# fewer, larger batches replay less of them.
+DEFERRED_MESSAGES: int = 1 << 22
+
+if numpy is not None:
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    FULL_KEY = numpy.uint64(0xFFFFFFFFFFFFFFFF)
+    SPACES = numpy.uint64(int.from_bytes(b" " * SYMBOL_WIDTH, "little"))
+
+
+def build_tables():
+    """Builds the byte lookup tables the block decoder indexes with whole columns of bytes."""
+    # Message type byte -> kind, -1 for types that are skipped.
+    kinds = numpy.full(256, -1, dtype=numpy.int8)
+    # Message type byte -> first byte of the shares field, symbol width, first byte of the
+    # execution id field, 0 when there is none, and shortest valid record.
+    shares_starts = numpy.zeros(256, dtype=numpy.int64)
+    symbol_widths = numpy.zeros(256, dtype=numpy.int64)
+    execution_starts = numpy.zeros(256, dtype=numpy.int64)
+    record_lengths = numpy.zeros(256, dtype=numpy.int64)
+    for message_type, (kind, shares_field, symbol_field) in LAYOUTS.items():
+        kinds[message_type[0]] = kind
+        shares_starts[message_type[0]] = shares_field.start
+        if symbol_field is not None:
+            symbol_widths[message_type[0]] = symbol_field.stop - SYMBOL_START
+        record_lengths[message_type[0]] = max(
+            shares_field.stop, 0 if symbol_field is None else symbol_field.stop
+        )
+    for message_type, execution_field in EXECUTION_IDS.items():
+        code: int = message_type[0]
+        execution_starts[code] = execution_field.start
+        record_lengths[code] = max(record_lengths[code], execution_field.stop)
+    # A trade break only has the execution id it breaks, where other messages have an order id.
+    kinds[TRADE_BREAK_TYPE[0]] = TRADE_BREAK
+    record_lengths[TRADE_BREAK_TYPE[0]] = 22
+
+    # Two ASCII bytes read as a little endian uint16 -> their value as two digits of a base,
+    # 0xFFFF if either byte is not a digit of that base. Letters are base36 digits of any case,
+    # like int(text, 36) accepts.
+    digits = numpy.full(256, 255, dtype=numpy.int64)
+    for value, character in enumerate("0123456789abcdefghijklmnopqrstuvwxyz"):
+        digits[ord(character)] = value
+        digits[ord(character.upper())] = value
+    first, second = numpy.meshgrid(digits, digits, indexing="xy")
+    pair_tables: dict[int, numpy.ndarray] = {}
+    for base in (10, 36):
+        valid = (first < base) & (second < base)
+        pairs = numpy.where(valid, first * base + second, 0xFFFF)
+        pair_tables[base] = pairs.astype(numpy.uint16).ravel()
+    return kinds, shares_starts, symbol_widths, execution_starts, record_lengths, pair_tables
+
+
+def build_ledger(order_ids, shares, symbol_ids) -> OrderLedger:
+    """Builds a ledger holding distinct resting orders in one go.
+
+    Linear probing is done in rounds: every order still looking for a slot tries its current
+    slot and steps to the next one if another order holds it. The table ends up in a state
+    OrderLedger.find can probe, without an add call per order.
+    """
+    count: int = len(order_ids)
+    ledger = OrderLedger(max(1024, count * 4 // 3 + 2))
+    keys = numpy.frombuffer(ledger.keys, dtype=numpy.int64)
+    table_shares = numpy.frombuffer(ledger.shares, dtype=numpy.int64)
+    table_symbols = numpy.frombuffer(ledger.symbols, dtype=numpy.int32)
+    mask = numpy.uint64(ledger.mask)
+
+    # Same position as OrderLedger, the low 64 bits of the product hold every bit the mask keeps.
+    hashed = order_ids.astype(numpy.uint64) * numpy.uint64(HASH_MULTIPLIER)
+    probes = ((hashed >> numpy.uint64(32)) & mask).astype(numpy.int64)
+    waiting = numpy.arange(count)
+    while len(waiting):
+        # When several orders reach the same empty slot, one write wins and the rest probe on.
+        free = keys[probes] == EMPTY
+        keys[probes[free]] = order_ids[waiting[free]]
+        placed = keys[probes] == order_ids[waiting]
+        table_shares[probes[placed]] = shares[waiting[placed]]
+        table_symbols[probes[placed]] = symbol_ids[waiting[placed]]
+        waiting = waiting[~placed]
+        probes = (probes[~placed] + 1) & ledger.mask
+
+    del keys, table_shares, table_symbols
+    ledger.size = ledger.filled = count
+    return ledger
+
+
+def decode_number(data, starts, width: int, base: int, pair_tables: dict):
+    """Decodes a fixed width base 10 or base 36 field that starts at each offset in starts.
+
+    Digits are looked up two at a time, so width must be even.
+    """
+    fields = sliding_window_view(data, width)[starts].copy().view("<u2")
+    values = numpy.take(pair_tables[base], fields)
+    if values.max() >= base * base:
+        raise ValueError("Invalid digit in a numeric field")
+    powers = (base * base) ** numpy.arange(width // 2 - 1, -1, -1, dtype=numpy.int64)
+    return values.astype(numpy.int64) @ powers
+
+
+def to_array(typecode: str, values) -> array:
+    """Copies a NumPy array into an array of typecode, which ExecutionIndex stores."""
+    copied: array = array(typecode)
+    copied.frombytes(values.astype({"q": numpy.int64, "i": numpy.int32}[typecode]).tobytes())
+    return copied
+
+
+def sort_by_order_id(order_ids):
+    """Returns the stable sort order of order_ids and the sorted ids.
+
+    When the ids leave enough spare bits, each id is packed with its position and the packed
+    values are sorted directly, which is several times faster than a stable argsort.
+    """
+    count: int = len(order_ids)
+    shift: int = count.bit_length()
+    if int(order_ids.max()) >> (63 - shift) == 0:
+        packed = numpy.sort((order_ids << shift) | numpy.arange(count))
+        return packed & ((1 << shift) - 1), packed >> shift
+    order = numpy.argsort(order_ids, kind="stable")
+    return order, order_ids[order]
+
+
+class VectorizedAnalyzer(Analyzer):
+    """Analyzer that decodes blocks into NumPy arrays and computes volume with array operations.
+
+    Blocks are decoded as they are read and computed together once DEFERRED_MESSAGES messages
+    are held, so memory stays bounded however large the dataset. Executions and cancels are
+    joined to their adds by sorting the messages by order id, and each order's resting shares
+    are found with a running sum of its reductions. Order ids that are added again while still
+    resting, or that were left resting by an earlier batch, are replayed message by message with
+    Analyzer.apply_message. The executions that counted volume are indexed afterwards in file
+    order, stopping at each trade break.
+
+    Results, including the ledger of orders left resting, match Analyzer exactly.
+    Tracers are not called, since messages are never applied one at a time. Batches pushed with
+    process_batch are computed one at a time instead, as they arrive.
+    """
+
+    # Set while a whole dataset or feed is read, whose blocks are computed in large batches.
+    deferring: bool = False
+
+    def __init__(self, dataset_path):
+        if numpy is None:
+            raise ImportError("The numpy engine needs NumPy, install it with: pip install numpy")
+        super().__init__(dataset_path)
+        self.tables = build_tables()
+        # Sorted keys of every symbol decoded so far and their symbol ids, see decode_symbols.
+        self.symbol_keys = numpy.zeros(0, dtype=numpy.uint64)
+        self.symbol_key_ids = numpy.zeros(0, dtype=numpy.int32)
+        # Decoded (kinds, order ids, shares, symbol ids, execution ids) of blocks not computed
+        # yet, and how many messages they hold.
+        self.batches: list[tuple] = []
+        self.deferred: int = 0
+
+    def read_file(self, use_mmap: bool = True, stop: int | None = None) -> None:
+        """Decodes the blocks of the dataset and computes stock volume in large batches.
+
+        The ledger only catches up with the offset once the held batches are computed, so
+        checkpoints are checked at the end rather than after every block.
+        """
+        checkpointer = self.checkpointer
+        self.checkpointer = None
+        self.deferring = True
+        try:
+            super().read_file(use_mmap, stop)
+        finally:
+            self.checkpointer = checkpointer
+            self.deferring = False
+        self.compute_batches()
+        if checkpointer is not None:
+            checkpointer.check(self)
+        if self.publisher is not None:
+            self.publisher.publish(self)
+
+    def read_feeds(self, sockets: list) -> None:
+        """Decodes the blocks the feed units send and computes stock volume in large batches."""
+        self.deferring = True
+        try:
+            super().read_feeds(sockets)
+        finally:
+            self.deferring = False
+        self.compute_batches()
+        if self.publisher is not None:
+            self.publisher.publish(self)
+
+    def process_batch(self, buffer: bytes | bytearray | memoryview) -> None:
+        """Decodes a batch, see Analyzer.process_batch. Volumes are only published once the
+        batches held have been computed.
+        """
+        self.compute_block(buffer)
+        self.metrics.end_block(len(buffer), len(self.ledger))
+        if self.publisher is not None and not self.batches:
+            self.publisher.publish(self)
+
+    def compute_block(self, block: bytes | bytearray | memoryview) -> None:
+        """Decodes a block and holds on to its columns until DEFERRED_MESSAGES are held.
+
+        Outside of read_file and read_feeds the block is computed straight away.
+        """
+        if not self.metrics.sampling:
+            batch: tuple = self.decode_block(block)
+        else:
+            start: float = time.perf_counter()
+            batch = self.decode_block(block)
+            self.metrics.add_phase("parse", time.perf_counter() - start)
+        self.batches.append(batch)
+        self.deferred += len(batch[0])
+        if not self.deferring or self.deferred >= DEFERRED_MESSAGES:
+            self.compute_batches()
+
+    def compute_batches(self) -> None:
+        """Computes stock volume for every decoded block held and releases them."""
+        if not self.batches:
+            return
+        start: float = time.perf_counter()
+        columns: list = [numpy.concatenate(column) for column in zip(*self.batches)]
+        self.batches.clear()
+        self.deferred = 0
+        self.compute_arrays(*columns)
+        self.metrics.add_phase("compute", time.perf_counter() - start)
+        self.metrics.track_ledger(len(self.ledger))
+        self.metrics.finish()
+
+    def compute_columns(self, columns: ColumnCache) -> None:
+        """Computes stock volume straight from the mapped columns of a cache."""
+        symbol_ids = numpy.array(
+            [self.symbols.intern(name.encode()) for name in columns.symbols] + [-1],
+            dtype=numpy.int32,
+        )
+        self.compute_arrays(
+            numpy.frombuffer(columns.kinds, dtype=numpy.uint8),
+            numpy.frombuffer(columns.order_ids, dtype=numpy.int64),
+            numpy.frombuffer(columns.shares, dtype=numpy.int64),
+            symbol_ids[numpy.frombuffer(columns.symbol_ids, dtype=numpy.int32)],
+            numpy.frombuffer(columns.execution_ids, dtype=numpy.int64),
+        )
+
+    def decode_block(self, block: bytes | memoryview) -> tuple:
+        """Decodes every record of a block into arrays of kinds, order ids, shares, symbol ids and
+        execution ids. Trade breaks have the execution id they break as order id, and no shares.
+
+        Fields sit at fixed offsets from the start of a record, so each field is gathered for all
+        records at once from a sliding window view of the block. The block is never copied.
+        """
+        kind_table, shares_starts, symbol_widths, execution_starts, record_lengths, pair_tables = (
+            self.tables
+        )
+        data = numpy.frombuffer(block, dtype=numpy.uint8)
+        newlines = numpy.flatnonzero(data == NEWLINE)
+        starts = numpy.concatenate(([0], newlines + 1))
+        lengths = numpy.concatenate((newlines, [len(data)])) - starts
+
+        # Records too short to hold a message type are skipped, like an empty record[9:10].
+        short: int = numpy.count_nonzero((lengths > 0) & (lengths <= 9))
+        if short:
+            self.metrics.count_short_records(short)
+        starts, lengths = starts[lengths > 9], lengths[lengths > 9]
+        message_types = data[starts + 9]
+        self.metrics.count_type_codes(numpy.bincount(message_types, minlength=256).tolist())
+        kinds = kind_table[message_types]
+        used = kinds >= 0
+        starts, lengths, message_types = starts[used], lengths[used], message_types[used]
+        kinds = kinds[used].astype(numpy.uint8)
+        if numpy.any(lengths < record_lengths[message_types]):
+            raise ValueError("Record is too short for its message type")
+        if len(starts) == 0:
+            empty = numpy.zeros(0, dtype=numpy.int64)
+            return kinds, empty, empty, numpy.zeros(0, dtype=numpy.int32), empty
+
+        order_ids = decode_number(data, starts + 10, 12, 36, pair_tables)
+        shares = numpy.zeros(len(starts), dtype=numpy.int64)
+        has_shares = kinds != TRADE_BREAK
+        if numpy.any(has_shares):
+            shares_at = starts[has_shares] + shares_starts[message_types[has_shares]]
+            shares[has_shares] = decode_number(data, shares_at, 6, 10, pair_tables)
+        symbol_ids = self.decode_symbols(data, starts, symbol_widths[message_types])
+        execution_ids = numpy.full(len(starts), -1, dtype=numpy.int64)
+        execution_at = execution_starts[message_types]
+        has_execution = execution_at > 0
+        if numpy.any(has_execution):
+            execution_at = starts[has_execution] + execution_at[has_execution]
+            execution_ids[has_execution] = decode_number(data, execution_at, 12, 36, pair_tables)
+        return kinds, order_ids, shares, symbol_ids, execution_ids
+
+    def decode_symbols(self, data, starts, widths):
+        """Interns the symbol of each record and returns their ids, -1 for records without one.
+
+        Symbols are packed into 8 byte integer keys, with the bytes past a shorter field replaced
+        by spaces, so they can be grouped as integers. Keys that only differ in trailing
+        whitespace intern to the same symbol. New symbols are interned in order of first
+        appearance.
+        """
+        symbol_ids = numpy.full(len(starts), -1, dtype=numpy.int32)
+        has_symbol = widths > 0
+        if not numpy.any(has_symbol):
+            return symbol_ids
+
+        windows = sliding_window_view(data, SYMBOL_WIDTH)
+        keys = windows[starts[has_symbol] + SYMBOL_START].copy().view("<u8").ravel()
+        widths = widths[has_symbol].astype(numpy.uint64)
+        field = numpy.where(widths < SYMBOL_WIDTH, (1 << 8 * widths) - 1, FULL_KEY)
+        keys = (keys & field) | (SPACES & ~field)
+
+        # Symbols seen in earlier blocks are found with a binary search of the known keys.
+        if len(self.symbol_keys) == 0:
+            symbol_ids[has_symbol] = self.intern_keys(keys)
+            return symbol_ids
+        last: int = len(self.symbol_keys) - 1
+        known = numpy.minimum(numpy.searchsorted(self.symbol_keys, keys), last)
+        ids = self.symbol_key_ids[known]
+        new = self.symbol_keys[known] != keys
+        if numpy.any(new):
+            ids[new] = self.intern_keys(keys[new])
+        symbol_ids[has_symbol] = ids
+        return symbol_ids
+
+    def intern_keys(self, keys):
+        """Interns symbol keys missing from the known keys and returns their symbol ids."""
+        unique_keys, first_seen, inverse = numpy.unique(
+            keys, return_index=True, return_inverse=True
+        )
+        unique_ids = numpy.empty(len(unique_keys), dtype=numpy.int32)
+        for index in numpy.argsort(first_seen).tolist():
+            symbol: bytes = int(unique_keys[index]).to_bytes(SYMBOL_WIDTH, "little").rstrip()
+            unique_ids[index] = self.symbols.intern(symbol)
+
+        symbol_keys = numpy.concatenate((self.symbol_keys, unique_keys))
+        symbol_key_ids = numpy.concatenate((self.symbol_key_ids, unique_ids))
+        order = numpy.argsort(symbol_keys)
+        self.symbol_keys, self.symbol_key_ids = symbol_keys[order], symbol_key_ids[order]
+        return unique_ids[inverse.ravel()]
+
+    def compute_arrays(self, kinds, order_ids, shares, symbol_ids, execution_ids) -> None:
+        """Computes stock volume for whole columns of decoded messages in file order."""
+        # Trade breaks only reverse executions, they are taken out and applied at the end.
+        breaks = kinds == TRADE_BREAK
+        break_ids = order_ids[breaks]
+        # Messages before each break, once breaks are taken out.
+        break_positions = numpy.flatnonzero(breaks) - numpy.arange(len(break_ids))
+        if len(break_ids):
+            kept = ~breaks
+            kinds, order_ids, shares = kinds[kept], order_ids[kept], shares[kept]
+            symbol_ids, execution_ids = symbol_ids[kept], execution_ids[kept]
+        count: int = len(kinds)
+        if count == 0:
+            for execution_id in break_ids.tolist():
+                self.break_trade(execution_id)
+            return
+        volumes = numpy.zeros(len(self.symbols), dtype=numpy.int64)
+
+        # Group the messages of each order id together, keeping file order within a group.
+        order, sorted_ids = sort_by_order_id(order_ids)
+        sorted_kinds = kinds[order]
+        sorted_shares = shares[order]
+        positions = numpy.arange(count)
+        is_add = sorted_kinds == ADD_ORDER
+        first_in_group = numpy.empty(count, dtype=bool)
+        first_in_group[0] = True
+        numpy.not_equal(sorted_ids[1:], sorted_ids[:-1], out=first_in_group[1:])
+
+        # Each group is split into segments that start at an add, plus the messages before the
+        # first add, which reference an order that isn't resting yet. Within a segment the
+        # resting shares are the added shares minus a running sum of the reductions after it.
+        starts_segment = first_in_group | is_add
+        segment_starts = numpy.flatnonzero(starts_segment)
+        segment_added = is_add[segment_starts]
+        segment_ends = numpy.append(segment_starts[1:] - 1, count - 1)
+        adds = segment_starts[numpy.cumsum(starts_segment) - 1]
+        after_add = is_add[adds] & (positions > adds)
+        reduced = numpy.cumsum(numpy.where(after_add, sorted_shares, 0))
+        reduced -= reduced[adds]
+        # The order is removed by the first message that leaves exactly zero shares resting.
+        removes = after_add & (reduced == sorted_shares[adds])
+        removed = numpy.cumsum(removes)
+        resting = after_add & (removed - removes == removed[adds])
+        segment_removed = removed[segment_ends] > removed[segment_starts]
+
+        # Analyzer ignores an add while an order with the same id is still resting. Order ids
+        # where that happens are replayed in file order by the serial analyzer instead, and so
+        # are orders already resting in the ledger from earlier reads.
+        replayed_segments = numpy.zeros(len(segment_starts), dtype=bool)
+        replayed = numpy.zeros(count, dtype=bool)
+        ignored_adds = (
+            ~first_in_group[segment_starts[1:]] & segment_added[:-1] & ~segment_removed[:-1]
+        )
+        already_resting = None
+        if len(self.ledger):
+            keys = numpy.frombuffer(self.ledger.keys, dtype=numpy.int64)
+            already_resting = numpy.isin(sorted_ids[first_in_group], keys)
+        if numpy.any(ignored_adds) or already_resting is not None and numpy.any(already_resting):
+            groups = numpy.cumsum(first_in_group) - 1
+            replayed_groups = numpy.zeros(int(groups[-1]) + 1, dtype=bool)
+            replayed_groups[groups[segment_starts[1:][ignored_adds]]] = True
+            if already_resting is not None:
+                replayed_groups |= already_resting
+            replayed[order] = replayed_groups[groups]
+            replayed_segments = replayed_groups[groups[segment_starts]]
+            resting &= ~replayed_groups[groups]
+
+        executed = resting & (sorted_kinds == ORDER_EXECUTED)
+        numpy.add.at(volumes, symbol_ids[order[adds[executed]]], sorted_shares[executed])
+        trades = (kinds == TRADE) & ~replayed
+        numpy.add.at(volumes, symbol_ids[trades], shares[trades])
+
+        totals = numpy.frombuffer(self.symbols.volumes, dtype=numpy.int64)
+        totals += volumes
+        del totals
+
+        # Orders still resting at the end go into the ledger.
+        still_resting = segment_added & ~segment_removed & ~replayed_segments
+        resting_orders = order[segment_starts[still_resting]]
+        remaining = shares[resting_orders] - reduced[segment_ends[still_resting]]
+        if len(self.ledger) == 0:
+            self.ledger = build_ledger(
+                order_ids[resting_orders], remaining, symbol_ids[resting_orders]
+            )
+        else:
+            for order_id, shares_left, symbol_id in zip(
+                order_ids[resting_orders].tolist(),
+                remaining.tolist(),
+                symbol_ids[resting_orders].tolist(),
+            ):
+                self.ledger.add(order_id, shares_left, symbol_id)
+
+        # Executions count volume for the symbol of their order, trades for their own symbol.
+        counted = trades.copy()
+        counted[order[executed]] = True
+        execution_symbols = symbol_ids.copy()
+        execution_symbols[order[executed]] = symbol_ids[order[adds[executed]]]
+        for index in numpy.flatnonzero(replayed).tolist():
+            changed: int = self.apply_message(
+                int(kinds[index]),
+                int(order_ids[index]),
+                int(shares[index]),
+                int(symbol_ids[index]),
+            )
+            if changed >= 0:
+                counted[index] = True
+                execution_symbols[index] = changed
+
+        counted_positions = numpy.flatnonzero(counted)
+        executions = (
+            to_array("q", execution_ids[counted_positions]),
+            to_array("q", shares[counted_positions]),
+            to_array("i", execution_symbols[counted_positions]),
+        )
+        start: int = 0
+        splits = numpy.searchsorted(counted_positions, break_positions)
+        for split, execution_id in zip(splits.tolist(), break_ids.tolist()):
+            self.executions.extend(*(column[start:split] for column in executions))
+            self.break_trade(execution_id)
+            start = split
+        self.executions.extend(*(column[start:] for column in executions))
@@ -1,4 +1,6 @@
+from pitch_volume_analysis.benchmarks.streams import random_stream
 from pitch_volume_analysis.core.analyzer import Analyzer
+import io
 import pytest
 from pathlib import Path
 
@@ -67,7 +69,7 @@ def test_get_message_symbol(my_message_symbol):
 def test_compute_message(my_analyzer, my_message, my_message_type, my_message_symbol):
     order_id: str = my_message[2]
     my_analyzer.compute_message(my_message, my_message_type, my_message_symbol)
-    assert my_analyzer.ledger[order_id] == my_message
+    assert my_analyzer.ledger_view()[order_id] == [100, my_message_symbol]
 
 
 def test_update_ledger_shares(my_analyzer, my_message, my_message_type, my_message_symbol):
@@ -76,7 +78,7 @@ def test_update_ledger_shares(my_analyzer, my_message, my_message_type, my_messa
     cancel_entry: str = "S28858232XAK27GA0000DT000100"
     cancel_message: list[str] = my_analyzer.parse_order_message(cancel_entry, "X")
     my_analyzer.update_ledger_shares(cancel_message, "X", my_message_symbol, order_id)
-    assert my_analyzer.ledger.get(order_id) == None
+    assert my_analyzer.ledger_view().get(order_id) == None
 
 
 def test_track_symbol(my_analyzer, my_message):
@@ -85,5 +87,118 @@ def test_track_symbol(my_analyzer, my_message):
     assert symbol in my_analyzer.symbol_book
 
 
+def test_compute_records(my_analyzer):
+    records: list[bytes] = [
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y",
+        b"S28800012EAK27GA0000DT000040AK27GA0000DT",
+        b"S28800013PAK27GA0000ZZS000010SH    0000619200AK27GA0000ZZ",
+        b"S28800014HSH      T0 ",
+    ]
+    my_analyzer.compute_records(records)
+    assert my_analyzer.symbol_book["SH"] == 50
+    assert my_analyzer.ledger_view() == {"AK27GA0000DT": [60, "SH"]}
+
+
+def test_trade_breaks_reverse_executions_and_trades(my_analyzer):
+    records: list[bytes] = [
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y",
+        b"S28800012EAK27GA0000DT000040000000000E01",
+        b"S28800013PAK27GA0000ZZS000010SH    0000619200000000000P01",
+        b"S28800014rAK27GA0000ZYS000020SPY     0000619200000000000R01",
+        b"S28800015B000000000E01",
+        b"S28800016B000000000R01",
+        # Breaking an execution twice, or one that never counted, changes nothing.
+        b"S28800017B000000000E01",
+        b"S28800018B000000000X99",
+    ]
+    my_analyzer.compute_records(records)
+    assert my_analyzer.symbol_book == {"SH": 10, "SPY": 0}
+    assert my_analyzer.ledger_view() == {"AK27GA0000DT": [60, "SH"]}
+
+
+def test_trade_breaks_of_expired_executions_are_ignored(my_analyzer):
+    my_analyzer.set_execution_window(1)
+    my_analyzer.compute_records(
+        [
+            b"S28800013PAK27GA0000ZZS000010SH    0000619200000000000P01",
+            b"S28800013PAK27GA0000ZYS000020SH    0000619200000000000P02",
+            b"S28800015B000000000P01",
+        ]
+    )
+    assert my_analyzer.symbol_book == {"SH": 30}
+
+
+def test_long_form_messages(my_analyzer):
+    add_long: str = "S28800011dAK27GA0000DTB000200SPY     0000619200Y"
+    trade_long: str = "S28800013rAK27GA0000ZZS000010SPY     0000619200000000000P01"
+    my_analyzer.compute_records([add_long.encode(), trade_long.encode()])
+    assert my_analyzer.symbol_book == {"SPY": 10}
+    assert my_analyzer.ledger_view() == {"AK27GA0000DT": [200, "SPY"]}
+    for entry in (add_long, trade_long):
+        message: list[str] = my_analyzer.parse_order_message(entry, entry[9])
+        assert message[4] == entry[23:29] and message[5] == "SPY"
+
+
+def test_compute_message_ignores_unknown_types(my_analyzer):
+    entry: str = "S28800014HSH      T0 "
+    message: list[str] = my_analyzer.parse_order_message(entry, "H")
+    my_analyzer.compute_message(message, "H", my_analyzer.get_message_symbol(message, "H"))
+    trade: str = "S28800013PAK27GA0000ZZS000010SH    0000619200000000000P01"
+    message = my_analyzer.parse_order_message(trade, "P")
+    my_analyzer.compute_message(message, "P", my_analyzer.get_message_symbol(message, "P"))
+    message = my_analyzer.parse_order_message("S28800015B000000000P01", "B")
+    my_analyzer.compute_message(message, "B", my_analyzer.get_message_symbol(message, "B"))
+    assert my_analyzer.symbol_book == {"SH": 0}
+
+
+def test_read_file_from_stream(my_analyzer):
+    with open(my_analyzer.dataset_path, "rb") as file:
+        stream_analyzer = Analyzer(io.BytesIO(file.read()))
+    stream_analyzer.read_file()
+    my_analyzer.read_file()
+    assert stream_analyzer.symbol_book == my_analyzer.symbol_book
+
+
+@pytest.mark.parametrize("buffer_type", [bytes, bytearray, memoryview])
+def test_process_batch_matches_read_file(my_analyzer, buffer_type):
+    records: list[bytes] = Path(my_analyzer.dataset_path).read_bytes().splitlines(keepends=True)
+    batch_analyzer = Analyzer(None)
+    for start in range(0, len(records), 1500):
+        # The last record of a batch may go without its newline.
+        batch: bytes = b"".join(records[start : start + 1500]).rstrip(b"\n")
+        batch_analyzer.process_batch(buffer_type(batch))
+    my_analyzer.read_file()
+    assert list(batch_analyzer.symbol_book.items()) == list(my_analyzer.symbol_book.items())
+    assert batch_analyzer.ledger_view() == my_analyzer.ledger_view()
+    assert batch_analyzer.metrics.messages == my_analyzer.metrics.messages
+    assert batch_analyzer.metrics.blocks == 14
+
+
+@pytest.mark.parametrize("window", [2, 50])
+def test_inline_messages_match_apply_message(tmp_path, window):
+    # A tracer sees every message through apply_message rather than the inlined loop.
+    path: Path = random_stream(Path(tmp_path, "stream"), 20000, 7)
+    inline_analyzer = Analyzer(path)
+    inline_analyzer.set_execution_window(window)
+    inline_analyzer.read_file()
+    traced_analyzer = Analyzer(path)
+    traced_analyzer.set_execution_window(window)
+    traced_analyzer.tracer = lambda kind, order_id, shares, symbol_id: None
+    traced_analyzer.read_file()
+    assert list(inline_analyzer.symbol_book.items()) == list(traced_analyzer.symbol_book.items())
+    assert inline_analyzer.ledger_view() == traced_analyzer.ledger_view()
+    assert inline_analyzer.executions.ordered() == traced_analyzer.executions.ordered()
+    assert inline_analyzer.executions.count == traced_analyzer.executions.count
+
+
+def test_request_stop_keeps_results_so_far():
+    stream_analyzer = Analyzer(
+        io.BytesIO(b"S28800013PAK27GA0000ZZS000010SH    0000619200AK27GA0000ZZ\n")
+    )
+    stream_analyzer.request_stop()
+    stream_analyzer.read_file()
+    assert stream_analyzer.symbol_book == {"SH": 10}
+
+
 def test_get_top_ten_symbols():
     pass
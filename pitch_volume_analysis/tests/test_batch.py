@@ -0,0 +1,68 @@
+from pitch_volume_analysis.core import batch
+from pitch_volume_analysis.core.analyzer import Analyzer
+import json
+import os
+import pytest
+import shutil
+from pathlib import Path
+
+
+@pytest.fixture
+def capture_dir(tmp_path) -> Path:
+    """Directory of daily captures, the example datasets plus files batch should leave out."""
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    raw: Path = Path(PROJECT_ROOT, "data", "raw")
+    shutil.copyfile(Path(raw, "pitch_example_data"), Path(tmp_path, "day1.txt"))
+    shutil.copyfile(Path(raw, "example_alternative_data"), Path(tmp_path, "day2.txt"))
+    Path(tmp_path, ".day3.txt").write_text("")
+    Path(tmp_path, "day1.txt.symidx").write_text("")
+    Path(tmp_path, "archive").mkdir()
+    return tmp_path
+
+
+def test_expand_sources(capture_dir):
+    expected: list[Path] = [Path(capture_dir, "day1.txt"), Path(capture_dir, "day2.txt")]
+    assert batch.expand_sources([str(capture_dir)]) == expected
+    assert batch.expand_sources([str(Path(capture_dir, "day*"))]) == expected
+    assert batch.expand_sources([str(Path(capture_dir, "day2*")), str(capture_dir)]) == [
+        expected[1],
+        expected[0],
+    ]
+
+
+def test_run_batch_matches_analyzer(capture_dir):
+    paths: list[Path] = batch.expand_sources([str(capture_dir)])
+    has_shm: bool = os.path.isdir("/dev/shm")
+    shared_before: set[str] = set(os.listdir("/dev/shm")) if has_shm else set()
+    results: list[dict] = batch.run_batch(paths, 2)
+    assert [result["path"] for result in results] == paths
+
+    expected_totals: dict[str, int] = {}
+    for path, result in zip(paths, results):
+        expected = Analyzer(path)
+        expected.read_file()
+        assert list(result["symbols"].items()) == list(expected.symbol_book.items())
+        assert result["messages"] == expected.metrics.messages
+        for symbol, volume in expected.symbol_book.items():
+            expected_totals[symbol] = expected_totals.get(symbol, 0) + volume
+    assert dict(batch.aggregate(results).items()) == expected_totals
+    # Every shared memory block was unlinked once read.
+    if has_shm:
+        assert set(os.listdir("/dev/shm")) <= shared_before
+
+
+def test_batch_main_writes_report(capture_dir, tmp_path, capsys):
+    output: Path = Path(tmp_path, "reports", "batch.json")
+    batch.main([str(Path(capture_dir, "day1.txt")), "-w", "1", "-t", "3", "-o", str(output)])
+    report: dict = json.loads(output.read_text())
+    assert [Path(file["path"]).name for file in report["files"]] == ["day1.txt"]
+    assert report["total"] == report["files"][0]["volumes"]
+    assert "Top 3 Symbols across 1 files" in capsys.readouterr().out
+
+
+def test_batch_skips_unreadable_files(tmp_path, capsys):
+    path: Path = Path(tmp_path, "broken.txt")
+    path.write_bytes(b"S28800011AAK27GA0000DTSxxxxxxSH    0000619200Y\n")
+    assert batch.run_batch([path], 1) == []
+    assert "Skipped" in capsys.readouterr().out
@@ -0,0 +1,133 @@
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.buckets import (
+    BucketAnalyzer,
+    PricedLedger,
+    VolumeBuckets,
+    load_buckets,
+    parse_bucket_interval,
+)
+import csv
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+@pytest.fixture
+def small_dataset(tmp_path) -> Path:
+    records: list[str] = [
+        "S34200000A000000000001B000300AAPL  0001500000Y",
+        "S34200500A000000000002S000200MSFT  0003000000Y",
+        "S34201000E000000000001000100000000000009",
+        "S34259999P000000000009B000050AAPL  0001510000000000000010",
+        "S34260000E000000000001000200000000000011",
+        "S34260001X000000000002000200",
+        "S34260002E000000000002000100000000000012",
+    ]
+    path: Path = Path(tmp_path, "small")
+    path.write_text("\n".join(records) + "\n")
+    return path
+
+
+def test_buckets_add_up_to_volumes(dataset_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    my_analyzer = BucketAnalyzer(dataset_path, 1000)
+    my_analyzer.read_file()
+    assert list(my_analyzer.symbol_book.items()) == list(expected.symbol_book.items())
+    volumes: list[int] = [0] * len(my_analyzer.symbols)
+    for _, symbol_id, shares, _, _ in my_analyzer.buckets.rows():
+        volumes[symbol_id] += shares
+    assert volumes == list(my_analyzer.symbols.volumes)
+
+
+def test_executions_trade_at_the_order_price(small_dataset):
+    my_analyzer = BucketAnalyzer(small_dataset, 60_000)
+    my_analyzer.read_file()
+    # 09:30 and 09:31 buckets. The cancel removed order 2, so its execution is not counted.
+    assert list(my_analyzer.buckets.rows()) == [
+        (34_200_000, 0, 150, 100 * 1_500_000 + 50 * 1_510_000, 2),
+        (34_260_000, 0, 200, 200 * 1_500_000, 1),
+    ]
+
+
+def test_trade_breaks_leave_their_bucket(small_dataset):
+    with open(small_dataset, "a") as file:
+        file.write("S34260003B000000000010\nS34260004B000000000011\n")
+    my_analyzer = BucketAnalyzer(small_dataset, 60_000)
+    my_analyzer.read_file()
+    assert my_analyzer.symbol_book == {"AAPL": 100, "MSFT": 0}
+    assert list(my_analyzer.buckets.rows()) == [(34_200_000, 0, 100, 100 * 1_500_000, 1)]
+
+
+def test_csv_output(small_dataset, tmp_path):
+    my_analyzer = BucketAnalyzer(small_dataset, 60_000)
+    my_analyzer.read_file()
+    path: Path = Path(tmp_path, "buckets.csv")
+    my_analyzer.write_buckets(path)
+    with open(path, newline="") as file:
+        rows: list[dict] = list(csv.DictReader(file))
+    assert rows[0] == {
+        "symbol": "AAPL",
+        "bucket_start": "09:30:00.000",
+        "shares": "150",
+        "notional": "22550.0000",
+        "trades": "2",
+        "vwap": "150.3333",
+    }
+    assert rows[1]["bucket_start"] == "09:31:00.000"
+    assert rows[1]["vwap"] == "150.0000"
+
+
+def test_binary_round_trip(dataset_path, tmp_path):
+    my_analyzer = BucketAnalyzer(dataset_path, 5000)
+    my_analyzer.read_file()
+    path: Path = Path(tmp_path, "buckets.bin")
+    my_analyzer.write_buckets(path, "binary")
+    buckets, names = load_buckets(path)
+    assert names == my_analyzer.symbols.names
+    assert buckets.width == len(names)
+    assert list(buckets.rows()) == list(my_analyzer.buckets.rows())
+
+
+def test_read_cached_matches_read_file(dataset_path, tmp_path):
+    direct = BucketAnalyzer(dataset_path, 1000)
+    direct.read_file()
+    cached = BucketAnalyzer(dataset_path, 1000)
+    cached.read_cached(tmp_path)
+    assert list(cached.buckets.rows()) == list(direct.buckets.rows())
+
+
+def test_buckets_grow_in_both_directions():
+    buckets = VolumeBuckets(1000, width=2)
+    buckets.add(1, 5_500, 10, 20)
+    buckets.add(3, 2_000, 1, 30)
+    buckets.add(0, 9_999, 2, 40)
+    assert buckets.width == 4 and buckets.first == 2 and buckets.count == 8
+    assert list(buckets.rows()) == [
+        (2_000, 3, 1, 30, 1),
+        (5_000, 1, 10, 200, 1),
+        (9_000, 0, 2, 80, 1),
+    ]
+
+
+def test_priced_ledger_keeps_prices_when_resized():
+    ledger = PricedLedger(4)
+    for order_id in range(100):
+        ledger.add_priced(order_id, 100, 0, order_id * 10)
+    assert all(ledger.prices[ledger.find(order_id)] == order_id * 10 for order_id in range(100))
+
+
+def test_parse_bucket_interval():
+    assert parse_bucket_interval("500ms") == 500
+    assert parse_bucket_interval("1s") == 1000
+    assert parse_bucket_interval("5m") == 300_000
+    assert parse_bucket_interval("1h") == 3_600_000
+    for text in ("0s", "5", "fast"):
+        with pytest.raises(ValueError):
+            parse_bucket_interval(text)
@@ -0,0 +1,87 @@
+from pitch_volume_analysis.benchmarks import generator
+from pitch_volume_analysis.core import cache
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.decoder import ADD_ORDER, ORDER_EXECUTED, TRADE_BREAK
+import os
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+@pytest.fixture
+def small_dataset(tmp_path) -> Path:
+    path: Path = Path(tmp_path, "small.txt")
+    path.write_bytes(
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y\n"
+        b"S28800012EAK27GA0000DT000040000000000001\n"
+        b"S28800013B000000000001\n"
+    )
+    return path
+
+
+def test_read_cached_matches_read_file(dataset_path, tmp_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    for _ in range(2):
+        cached = Analyzer(dataset_path)
+        cached.read_cached(tmp_path)
+        assert list(cached.symbol_book.items()) == list(expected.symbol_book.items())
+        assert cached.ledger_view() == expected.ledger_view()
+
+
+def test_read_cached_applies_trade_breaks(tmp_path):
+    path: Path = Path(tmp_path, "breaks.txt")
+    mix: dict[str, float] = {**generator.DEFAULT_MIX, "break": 0.05}
+    truth: dict = generator.generate(path, 5000, symbols=20, mix=mix, seed=1)
+    expected = Analyzer(path)
+    expected.read_file()
+    cached = Analyzer(path)
+    cached.read_cached(Path(tmp_path, "cache"))
+    assert list(cached.symbol_book.items()) == list(truth["volumes"].items())
+    assert cached.executions.ordered() == expected.executions.ordered()
+
+
+def test_build_cache_columns(small_dataset, tmp_path):
+    columns = cache.build_cache(small_dataset, Path(tmp_path, "cache"))
+    assert len(columns) == 3
+    assert list(columns.kinds) == [ADD_ORDER, ORDER_EXECUTED, TRADE_BREAK]
+    assert list(columns.time_stamps) == [28800011, 28800012, 28800013]
+    assert list(columns.order_ids) == [int("AK27GA0000DT", 36)] * 2 + [1]
+    assert list(columns.shares) == [100, 40, 0]
+    assert list(columns.symbol_ids) == [0, -1, -1]
+    assert list(columns.prices) == [619200, 0, 0]
+    assert list(columns.execution_ids) == [-1, 1, -1]
+    assert columns.symbols == ["SH"]
+    columns.close()
+
+
+def test_load_cache_detects_changed_dataset(small_dataset, tmp_path):
+    cache.build_cache(small_dataset, tmp_path).close()
+    with open(small_dataset, "ab") as file:
+        file.write(b"S28800013XAK27GA0000DT000060\n")
+    assert cache.load_cache(small_dataset, tmp_path) is None
+
+
+def test_load_cache_reuses_touched_dataset(small_dataset, tmp_path):
+    cache.build_cache(small_dataset, tmp_path).close()
+    stat: os.stat_result = os.stat(small_dataset)
+    os.utime(small_dataset, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    columns = cache.load_cache(small_dataset, tmp_path)
+    assert columns is not None
+    assert columns.meta["mtime_ns"] == stat.st_mtime_ns + 10**9
+    columns.close()
+
+
+def test_empty_dataset(tmp_path):
+    path: Path = Path(tmp_path, "empty.txt")
+    path.write_bytes(b"")
+    columns = cache.load_or_build_cache(path, tmp_path)
+    assert len(columns) == 0
+    assert list(columns.kinds) == []
+    columns.close()
@@ -0,0 +1,133 @@
+from pitch_volume_analysis.benchmarks import generator
+from pitch_volume_analysis.core import checkpoint, vectorized
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.ranking import LiveAnalyzer
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def split_dataset(dataset_path: Path, tmp_path: Path) -> tuple[Path, bytes]:
+    """Writes the first half of the dataset's records to a new file and returns the rest."""
+    data: bytes = dataset_path.read_bytes()
+    middle: int = data.rindex(b"\n", 0, len(data) // 2) + 1
+    path: Path = Path(tmp_path, "capture")
+    path.write_bytes(data[:middle])
+    return path, data[middle:]
+
+
+@pytest.mark.parametrize("analyzer_class", [Analyzer, LiveAnalyzer])
+def test_resume_matches_full_run(dataset_path, tmp_path, analyzer_class):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    path, rest = split_dataset(dataset_path, tmp_path)
+    checkpoint_file: Path = checkpoint.checkpoint_path(path, tmp_path)
+    first = analyzer_class(path)
+    first.read_file()
+    checkpoint.save_checkpoint(first, checkpoint_file)
+
+    with open(path, "ab") as file:
+        file.write(rest)
+    resumed = analyzer_class(path)
+    resumed.restore(checkpoint.load_checkpoint(checkpoint_file, path))
+    assert resumed.offset == len(path.read_bytes()) - len(rest)
+    resumed.read_file()
+    assert list(resumed.symbol_book.items()) == list(expected.symbol_book.items())
+    assert resumed.ledger_view() == expected.ledger_view()
+    assert resumed.symbols.top(5) == expected.symbols.top(5)
+
+
+@pytest.mark.skipif(vectorized.numpy is None, reason="NumPy is not installed")
+def test_numpy_engine_resumes(dataset_path, tmp_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    path, rest = split_dataset(dataset_path, tmp_path)
+    first = vectorized.VectorizedAnalyzer(path)
+    # Checked after the batches are computed, so the checkpoint agrees with the offset.
+    first.checkpointer = checkpoint.Checkpointer(Path(tmp_path, "capture.checkpoint"), 0)
+    first.read_file()
+    with open(path, "ab") as file:
+        file.write(rest)
+    resumed = vectorized.VectorizedAnalyzer(path)
+    resumed.restore(checkpoint.load_checkpoint(first.checkpointer.path, path))
+    resumed.read_file()
+    assert resumed.symbol_book == expected.symbol_book
+    assert resumed.ledger_view() == expected.ledger_view()
+
+
+def test_resumed_run_breaks_executions_from_before_the_checkpoint(tmp_path):
+    dataset_path: Path = Path(tmp_path, "breaks.txt")
+    mix: dict[str, float] = {**generator.DEFAULT_MIX, "break": 0.05}
+    generator.generate(dataset_path, 5000, symbols=20, mix=mix, seed=2)
+    path, rest = split_dataset(dataset_path, tmp_path)
+    first = Analyzer(path)
+    first.set_execution_window(300)
+    first.read_file()
+    checkpoint.save_checkpoint(first, Path(tmp_path, "capture.checkpoint"))
+    with open(path, "ab") as file:
+        file.write(rest)
+    resumed = Analyzer(path)
+    resumed.set_execution_window(300)
+    resumed.restore(checkpoint.load_checkpoint(Path(tmp_path, "capture.checkpoint"), path))
+    resumed.read_file()
+    expected = Analyzer(dataset_path)
+    expected.set_execution_window(300)
+    expected.read_file()
+    assert resumed.symbol_book == expected.symbol_book
+    assert resumed.executions.ordered() == expected.executions.ordered()
+    assert resumed.executions.count == expected.executions.count
+
+
+def test_checkpoint_rejects_changed_dataset(dataset_path, tmp_path):
+    path, _ = split_dataset(dataset_path, tmp_path)
+    checkpoint_file: Path = Path(tmp_path, "capture.checkpoint")
+    assert checkpoint.load_checkpoint(checkpoint_file, path) is None
+    my_analyzer = Analyzer(path)
+    my_analyzer.read_file()
+    checkpoint.save_checkpoint(my_analyzer, checkpoint_file)
+    assert checkpoint.load_checkpoint(checkpoint_file, path) is not None
+
+    data: bytes = path.read_bytes()
+    path.write_bytes(data[:-1] + b"!")
+    assert checkpoint.load_checkpoint(checkpoint_file, path) is None
+    path.write_bytes(data[:100])
+    assert checkpoint.load_checkpoint(checkpoint_file, path) is None
+    checkpoint_file.write_bytes(b"not a checkpoint")
+    assert checkpoint.load_checkpoint(checkpoint_file, path) is None
+
+
+def test_follow_reads_appended_records(dataset_path, tmp_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    path, rest = split_dataset(dataset_path, tmp_path)
+    # The last record is appended in two writes, the first of them leaving it unfinished.
+    pieces: list[bytes] = [rest[:-10], rest[-10:]]
+    my_analyzer = Analyzer(path)
+
+    def append_next() -> None:
+        if not pieces:
+            my_analyzer.request_stop()
+            return
+        with open(path, "ab") as file:
+            file.write(pieces.pop(0))
+
+    my_analyzer.read_file()
+    append_next()
+    my_analyzer.follow(poll_seconds=0.01, on_update=append_next)
+    assert list(my_analyzer.symbol_book.items()) == list(expected.symbol_book.items())
+    assert my_analyzer.offset == len(path.read_bytes())
+
+
+def test_follow_stops_on_truncation(dataset_path, tmp_path, capsys):
+    path, _ = split_dataset(dataset_path, tmp_path)
+    my_analyzer = Analyzer(path)
+    my_analyzer.read_file()
+    path.write_bytes(b"")
+    my_analyzer.follow(poll_seconds=0.01)
+    assert "truncated" in capsys.readouterr().out
@@ -0,0 +1,74 @@
+from pitch_volume_analysis.core import decoder
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.symbol_analyzer import SymbolAnalyzer
+import pytest
+
+
+@pytest.fixture
+def get_entries() -> list[str]:
+    """Catalog of entries covering every message type the decoder understands."""
+    add_order_short: str = "S28800011AAK27GA0000DTS000100SH    0000619200Y"
+    add_order_long: str = "S288000111K27GA0000DTBB000200SPY     00000619200000YCBOE "
+    order_executed: str = "S28800012EAK27GA0000DT000040AK27GA0000DT"
+    cancel_order: str = "S28800181X1K27GA00000Y000100"
+    trade_short: str = "S28800013PAK27GA0000ZZS000010SH    0000619200AK27GA0000ZZ"
+    add_order_d: str = "S28800011dAK27GA0000DTB000200SPY     0000619200Y"
+    trade_long: str = "S28800013rAK27GA0000ZZS000010SPY     0000619200AK27GA0000ZZ"
+    return [
+        add_order_short,
+        add_order_long,
+        order_executed,
+        cancel_order,
+        trade_short,
+        add_order_d,
+        trade_long,
+    ]
+
+
+def test_decode_matches_parse_order_message(get_entries):
+    my_analyzer = Analyzer(None)
+    for entry in get_entries:
+        message_type: str = my_analyzer.get_message_type(entry)
+        message: list[str] = my_analyzer.parse_order_message(entry, message_type)
+        kind, order_id, shares, symbol = decoder.decode(entry.encode())
+        assert order_id.decode() == message[2]
+        if symbol is None:
+            assert shares == int(message[3])
+        else:
+            assert shares == int(message[4])
+            assert symbol.decode() == message[5]
+
+
+def test_analyzers_parse_messages_alike(get_entries):
+    my_analyzer = Analyzer(None)
+    symbol_analyzer = SymbolAnalyzer("SPY", None)
+    for entry in get_entries + ["S28800015BAK27GA0000ZZ"]:
+        message_type: str = symbol_analyzer.get_message_type(entry)
+        assert message_type == my_analyzer.get_message_type(entry)
+        message: list[str] = symbol_analyzer.parse_order_message(entry, message_type)
+        assert message == my_analyzer.parse_order_message(entry, message_type)
+        assert symbol_analyzer.get_message_symbol(message, message_type) == (
+            my_analyzer.get_message_symbol(message, message_type)
+        )
+
+
+def test_decode_trade_breaks(get_entries):
+    trade_break: tuple = decoder.decode(b"S28800015BAK27GA0000ZZ")
+    assert trade_break == (decoder.TRADE_BREAK, b"AK27GA0000ZZ", 0, None)
+    execution_ids: list = [decoder.decode_execution_id(entry.encode()) for entry in get_entries]
+    executed: bytes = b"AK27GA0000DT"
+    traded: bytes = b"AK27GA0000ZZ"
+    assert execution_ids == [None, None, executed, None, traded, None, traded]
+
+
+def test_decode_skips_unused_types():
+    assert decoder.decode(b"S28800014HSH      T0 ") is None
+    assert decoder.decode(b"") is None
+
+
+def test_iter_records_accepts_memoryview():
+    block: bytes = b"S28800181X1K27GA00000Y000100\nS28800181X1K27GA00000Y000100\n"
+    records: list[bytes] = decoder.iter_records(memoryview(block))
+    assert [decoder.decode(record) for record in records if record] == [
+        (decoder.ORDER_CANCEL, b"1K27GA00000Y", 100, None)
+    ] * 2
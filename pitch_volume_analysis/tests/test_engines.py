@@ -0,0 +1,66 @@
+from pitch_volume_analysis.benchmarks.streams import random_stream
+from pitch_volume_analysis.core import engines
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.parallel import ParallelAnalyzer
+import io
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def raw_paths() -> list[Path]:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return sorted(Path(PROJECT_ROOT, "data", "raw").iterdir())
+
+
+def available_engines() -> list[str]:
+    return [name for name in engines.ENGINES if engines.engine_available(name)]
+
+
+def test_engines_agree_on_sample_data(raw_paths):
+    for path in raw_paths:
+        assert engines.compare_engines(path, available_engines()) == {}
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_engines_agree_on_random_streams(tmp_path, seed):
+    path: Path = random_stream(Path(tmp_path, "stream"), 20000, seed)
+    assert engines.compare_engines(path, available_engines()) == {}
+
+
+def test_differences_are_reported(raw_paths, monkeypatch):
+    class ShortAnalyzer(Analyzer):
+        def read_file(self) -> None:
+            super().read_file()
+            self.symbols.volumes[0] -= 1
+
+    monkeypatch.setitem(engines.ENGINES, "short", lambda source, workers: ShortAnalyzer(source))
+    path: Path = raw_paths[-1]
+    first: str = engines.run_engine("python", path)[0][0]
+    assert engines.compare_engines(path, ["python", "short"]) == {"short": [first]}
+
+
+def test_create_engine(raw_paths):
+    assert type(engines.create_engine("python", raw_paths[0])) is Analyzer
+    parallel = engines.create_engine("parallel", raw_paths[0], 3)
+    assert isinstance(parallel, ParallelAnalyzer) and parallel.workers == 3
+    with pytest.raises(ValueError, match="Unknown engine"):
+        engines.create_engine("fortran", raw_paths[0])
+
+
+def test_choose_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(engines, "VECTORIZED_BYTES", 100)
+    monkeypatch.setattr(engines, "PARALLEL_BYTES", 1000)
+    small: Path = Path(tmp_path, "small")
+    small.write_bytes(b"x" * 10)
+    large: Path = Path(tmp_path, "large")
+    large.write_bytes(b"x" * 1000)
+    assert engines.choose_engine(small) == ("python", 1)
+    assert engines.choose_engine(io.BytesIO(b"x" * 1000)) == ("python", 1)
+    assert engines.choose_engine(None) == ("python", 1)
+    assert engines.choose_engine(large, ["python", "parallel"], cores=8) == ("parallel", 8)
+    assert engines.choose_engine(large, ["python", "parallel"], cores=1) == ("python", 1)
+    assert engines.choose_engine(large, ["python"], cores=8) == ("python", 1)
+    if engines.engine_available("numpy"):
+        assert engines.choose_engine(large, cores=8) == ("numpy", 1)
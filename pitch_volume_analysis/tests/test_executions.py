@@ -0,0 +1,81 @@
+from array import array
+from pitch_volume_analysis.core.executions import BROKEN, ExecutionIndex
+import pytest
+
+
+@pytest.fixture
+def my_executions() -> ExecutionIndex:
+    return ExecutionIndex(window=4)
+
+
+def test_add_and_pop(my_executions):
+    my_executions.add(7, 100, 0)
+    my_executions.add(8, 40, 1)
+    assert my_executions.pop(8) == (40, 1)
+    assert my_executions.pop(8) is None
+    assert my_executions.pop(9) is None
+    assert my_executions.find(7) == 0
+
+
+def test_oldest_executions_expire(my_executions):
+    for execution_id in range(1, 7):
+        my_executions.add(execution_id, execution_id * 10, 0)
+    assert len(my_executions) == 4 and my_executions.count == 6
+    assert my_executions.pop(2) is None
+    assert my_executions.pop(3) == (30, 0)
+    ids, shares, symbols = my_executions.ordered()
+    assert list(ids) == [BROKEN, 4, 5, 6]
+    assert list(shares) == [30, 40, 50, 60]
+
+
+def test_find_only_matches_whole_ids(my_executions):
+    # The bytes of 1 << 8 and 1 straddle the boundary between the two ids.
+    my_executions.add(1 << 8, 10, 0)
+    my_executions.add(1 << 56, 20, 0)
+    assert my_executions.find(1) == -1
+    assert my_executions.find(1 << 56) == 1
+    assert my_executions.find(-1) == -1
+
+
+@pytest.mark.parametrize("sizes", [[3], [2, 5], [1, 1, 9, 2], [4, 4]])
+def test_extend_matches_add(sizes):
+    added = ExecutionIndex(window=4)
+    extended = ExecutionIndex(window=4)
+    execution_id: int = 1
+    for size in sizes:
+        ids = array("q", range(execution_id, execution_id + size))
+        for value in ids:
+            added.add(value, value, value % 3)
+        extended.extend(ids, array("q", ids), array("i", [value % 3 for value in ids]))
+        execution_id += size
+    assert extended.ordered() == added.ordered()
+    assert (extended.count, extended.ids) == (added.count, added.ids)
+    assert extended.find(execution_id - 1) == added.find(execution_id - 1)
+    assert extended.positions == added.positions
+
+
+def test_skip_expires_like_add(my_executions):
+    my_executions.add(1, 10, 0)
+    my_executions.skip(2)
+    my_executions.add(2, 20, 0)
+    my_executions.add(3, 30, 0)
+    assert my_executions.find(1) == -1
+    assert list(my_executions.ordered()[0]) == [BROKEN, BROKEN, 2, 3]
+
+
+def test_positions_follow_the_ring(my_executions):
+    my_executions.extend(array("q", [1, 2, 3]), array("q", [0] * 3), array("i", [0] * 3))
+    my_executions.skip(1)
+    assert my_executions.positions is None
+    my_executions.pop(2)
+    assert my_executions.positions == {1: 0, 3: 2}
+    my_executions.add(5, 50, 0)
+    my_executions.extend(array("q", [6, 7]), array("q", [0] * 2), array("i", [0] * 2))
+    assert list(my_executions.ids) == [5, 6, 7, BROKEN]
+    assert my_executions.positions == {5: 0, 6: 1, 7: 2}
+    assert [my_executions.find(value) for value in range(1, 8)] == [-1, -1, -1, -1, 0, 1, 2]
+
+
+def test_window_must_hold_an_execution():
+    with pytest.raises(ValueError):
+        ExecutionIndex(window=0)
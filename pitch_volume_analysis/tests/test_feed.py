@@ -0,0 +1,100 @@
+from pitch_volume_analysis.benchmarks import replay_server
+from pitch_volume_analysis.core import feed, reader
+from pitch_volume_analysis.core.analyzer import Analyzer
+import asyncio
+import pytest
+import queue
+import socket
+import threading
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def start_replay(units: list[bytes], addresses: list[str], rate: float = 0) -> list[str]:
+    """Serves the units once each from a background thread and returns their bound addresses."""
+    bound: queue.Queue = queue.Queue()
+    thread = threading.Thread(
+        target=asyncio.run,
+        args=(replay_server.serve(units, addresses, rate, True, bound.put),),
+        daemon=True,
+    )
+    thread.start()
+    return bound.get(timeout=5)
+
+
+def send_in_pieces(sock: socket.socket, data: bytes, size: int) -> None:
+    """Sends data in pieces that split records, then closes the sending side."""
+    for start in range(0, len(data), size):
+        sock.sendall(data[start : start + size])
+    sock.close()
+
+
+def test_read_socket_blocks_joins_split_records(dataset_path):
+    data: bytes = dataset_path.read_bytes()
+    receiving, sending = socket.socketpair()
+    threading.Thread(target=send_in_pieces, args=(sending, data, 333)).start()
+    # A buffer smaller than a record makes it grow.
+    blocks: list[bytes] = [bytes(block) for block in reader.read_socket_blocks(receiving, 32)]
+    receiving.close()
+    assert b"".join(blocks) == data
+    assert all(block.endswith(b"\n") for block in blocks)
+
+
+def test_analyzer_reads_socket(dataset_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    receiving, sending = socket.socketpair()
+    data: bytes = dataset_path.read_bytes()
+    threading.Thread(target=send_in_pieces, args=(sending, data, 4099)).start()
+    actual = Analyzer(receiving)
+    actual.read_file()
+    receiving.close()
+    assert list(actual.symbol_book.items()) == list(expected.symbol_book.items())
+    assert actual.ledger_view() == expected.ledger_view()
+
+
+def test_receive_buffer_returns_unterminated_last_record():
+    buffer = reader.ReceiveBuffer(64)
+    with buffer.space() as space:
+        space[:5] = b"S2880"
+    assert buffer.records(5) is None
+    buffer.carry()
+    with buffer.records(0) as block:
+        assert bytes(block) == b"S2880"
+
+
+def test_read_feeds_from_units(dataset_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    units: list[bytes] = replay_server.split_units(dataset_path.read_bytes(), 3)
+    addresses: list[str] = start_replay(units, ["127.0.0.1:0"] * 3)
+    actual = Analyzer(dataset_path)
+    actual.read_feeds([feed.connect(address) for address in addresses])
+    assert actual.symbol_book == expected.symbol_book
+    assert actual.ledger_view() == expected.ledger_view()
+    assert actual.metrics.messages == expected.metrics.messages
+
+
+def test_read_feeds_from_unix_socket(dataset_path, tmp_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    addresses: list[str] = start_replay(
+        [dataset_path.read_bytes()], [f"unix:{Path(tmp_path, 'unit.sock')}"], rate=100000
+    )
+    actual = Analyzer(dataset_path)
+    actual.read_feeds([feed.connect(address) for address in addresses])
+    assert list(actual.symbol_book.items()) == list(expected.symbol_book.items())
+
+
+def test_parse_address():
+    assert feed.parse_address("localhost:9000") == (socket.AF_INET, ("localhost", 9000))
+    assert feed.parse_address(":9000") == (socket.AF_INET, ("127.0.0.1", 9000))
+    assert feed.parse_address("unix:/tmp/feed.sock") == (socket.AF_UNIX, "/tmp/feed.sock")
+    with pytest.raises(ValueError):
+        feed.parse_address("localhost")
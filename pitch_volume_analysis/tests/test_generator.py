@@ -0,0 +1,71 @@
+from pitch_volume_analysis.benchmarks import generator
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.symbol_analyzer import SymbolAnalyzer
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def generated(tmp_path) -> tuple[Path, dict]:
+    path: Path = Path(tmp_path, "generated.txt")
+    truth: dict = generator.generate(path, 20000, symbols=50, seed=3)
+    return path, truth
+
+
+def test_ground_truth_matches_analyzer(generated):
+    path, truth = generated
+    my_analyzer = Analyzer(path)
+    my_analyzer.read_file()
+    assert list(my_analyzer.symbol_book.items()) == list(truth["volumes"].items())
+    assert generator.load_truth(path) == truth
+
+
+def test_ground_truth_matches_symbol_analyzer(generated, capsys):
+    path, truth = generated
+    symbol: str = next(iter(truth["volumes"]))
+    symbol_analyzer = SymbolAnalyzer(symbol, path)
+    symbol_analyzer.read_file()
+    assert symbol_analyzer.stock_volume == truth["volumes"][symbol]
+
+
+def test_message_mix(generated):
+    path, truth = generated
+    assert sum(truth["counts"].values()) == 20000
+    assert len(path.read_text().splitlines()) == 20000
+    # Trades never fall back to another type, unlike executions and cancels without resting orders.
+    assert truth["counts"]["trade"] == pytest.approx(
+        20000 * generator.DEFAULT_MIX["trade"], rel=0.1
+    )
+
+
+def test_ground_truth_with_trade_breaks(tmp_path):
+    path: Path = Path(tmp_path, "breaks.txt")
+    mix: dict[str, float] = {**generator.DEFAULT_MIX, "break": 0.05}
+    truth: dict = generator.generate(path, 20000, symbols=50, mix=mix, long_form_rate=0.5)
+    my_analyzer = Analyzer(path)
+    my_analyzer.read_file()
+    assert truth["counts"]["break"] > 0
+    assert {record[9:10] for record in path.read_bytes().splitlines()} >= {b"B", b"d", b"r"}
+    assert list(my_analyzer.symbol_book.items()) == list(truth["volumes"].items())
+
+
+def test_generation_is_deterministic(tmp_path):
+    first: Path = Path(tmp_path, "first.txt")
+    second: Path = Path(tmp_path, "second.txt")
+    generator.generate(first, 5000, seed=7)
+    generator.generate(second, 5000, seed=7)
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_parse_mix():
+    mix: dict[str, float] = generator.parse_mix("add=0.5,execute=0.5")
+    assert mix == {
+        "add": 0.5,
+        "execute": 0.5,
+        "cancel": 0.0,
+        "trade": 0.0,
+        "other": 0.0,
+        "break": 0.0,
+    }
+    with pytest.raises(ValueError):
+        generator.parse_mix("modify=0.5")
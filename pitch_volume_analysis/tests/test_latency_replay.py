@@ -0,0 +1,66 @@
+from pitch_volume_analysis.benchmarks import latency_replay
+from pitch_volume_analysis.core.analyzer import Analyzer
+import pytest
+from array import array
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def test_replay_matches_analyzer(dataset_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    records, time_stamps = latency_replay.load_records(dataset_path)
+    actual = Analyzer(dataset_path)
+    report: dict = latency_replay.replay(actual, records, time_stamps, speed=0)
+    assert list(actual.symbol_book.items()) == list(expected.symbol_book.items())
+    assert report["messages"] == len(records)
+    latencies: dict = report["latency_seconds"]
+    assert 0 < latencies["p50"] <= latencies["p99"] <= latencies["p99.9"] <= latencies["max"]
+    # Everything arrives at once, so the whole dataset is backlogged at first.
+    assert report["max_backlog"] == len(records)
+    assert report["fell_behind"]["message"] > 0
+
+
+def test_replay_keeps_up_with_slow_feed():
+    records: list[bytes] = [
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y",
+        b"S28800013EAK27GA0000DT000040000000000001",
+        b"S28800015XAK27GA0000DT000060",
+    ]
+    time_stamps = array("q", [28800011, 28800013, 28800015])
+    my_analyzer = Analyzer(None)
+    report: dict = latency_replay.replay(
+        my_analyzer, records, time_stamps, speed=1, behind=0.05, interval=2
+    )
+    assert my_analyzer.symbol_book == {"SH": 40}
+    assert report["wall_seconds"] >= 0.004
+    assert report["fell_behind"] is None
+    assert [point["time_stamp"] for point in report["backlog"]] == [
+        "08:00:00.010",
+        "08:00:00.012",
+        "08:00:00.014",
+    ]
+
+
+def test_load_records_limit(dataset_path):
+    records, time_stamps = latency_replay.load_records(dataset_path, 10)
+    assert len(records) == len(time_stamps) == 10
+    assert time_stamps[0] == 28800011
+
+
+def test_nearest_rank():
+    values: list[float] = [float(value) for value in range(1, 1001)]
+    assert latency_replay.nearest_rank(values, 50) == 500
+    assert latency_replay.nearest_rank(values, 99.9) == 999
+    assert latency_replay.nearest_rank([3.0], 99) == 3.0
+
+
+def test_format_time_stamp():
+    assert latency_replay.format_time_stamp(34200000) == "09:30:00.000"
+    assert latency_replay.format_time_stamp(28800011) == "08:00:00.011"
@@ -0,0 +1,56 @@
+from pitch_volume_analysis.core.ledger import (
+    OrderLedger,
+    TOMBSTONE,
+    decode_order_id,
+    format_order_id,
+)
+import pytest
+
+
+@pytest.fixture
+def my_ledger() -> OrderLedger:
+    return OrderLedger(capacity=8)
+
+
+def test_order_id_round_trip():
+    order_id: int = decode_order_id(b"AK27GA0000DT")
+    assert order_id == decode_order_id("AK27GA0000DT")
+    assert format_order_id(order_id) == "AK27GA0000DT"
+    assert format_order_id(decode_order_id("000000000001")) == "000000000001"
+
+
+def test_add_and_get(my_ledger):
+    assert my_ledger.add(10, 100, 3)
+    assert not my_ledger.add(10, 500, 4)
+    assert my_ledger.get(10) == (100, 3)
+    assert my_ledger.get(11) is None
+    assert len(my_ledger) == 1
+
+
+def test_reduce_removes_filled_orders(my_ledger):
+    my_ledger.add(10, 100, 3)
+    assert my_ledger.reduce(my_ledger.find(10), 40) == 60
+    assert my_ledger.get(10) == (60, 3)
+    assert my_ledger.reduce(my_ledger.find(10), 60) == 0
+    assert 10 not in my_ledger
+    assert len(my_ledger) == 0
+
+
+def test_removed_slots_are_recycled(my_ledger):
+    my_ledger.add(10, 100, 3)
+    position: int = my_ledger.find(10)
+    my_ledger.reduce(position, 100)
+    assert my_ledger.keys[position] == TOMBSTONE
+    my_ledger.add(10, 50, 1)
+    assert my_ledger.find(10) == position
+
+
+def test_resize_keeps_every_order(my_ledger):
+    for order_id in range(1000):
+        my_ledger.add(order_id * 36**6, order_id + 1, order_id % 7)
+    for order_id in range(0, 1000, 2):
+        my_ledger.reduce(my_ledger.find(order_id * 36**6), order_id + 1)
+    assert len(my_ledger) == 500
+    assert sorted(my_ledger.items()) == [
+        (order_id * 36**6, order_id + 1, order_id % 7) for order_id in range(1, 1000, 2)
+    ]
@@ -33,6 +33,14 @@ def test_start_program():
     assert result == True
 
 
+def test_run_options():
+    options = main.RunOptions(top=3, execution_window=100)
+    assert (options.top, options.execution_window, options.workers) == (3, 100, 1)
+    assert main.RunOptions().top == 10
+    with pytest.raises(TypeError):
+        main.RunOptions(tops=3)
+
+
 def test_start_symbol_program():
     CURRENT_FILE_PATH: Path = Path(__file__).resolve()
     PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
@@ -0,0 +1,116 @@
+from pitch_volume_analysis.core import metrics
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.parallel import ParallelAnalyzer
+import io
+import json
+import pytest
+from pathlib import Path
+
+DATA: bytes = (
+    b"S28800011AAK27GA0000DTS000100SH    0000619200Y\n"
+    b"S28800012EAK27GA0000DT000040000000000001\n"
+    b"\n"
+    b"S28800168s\n"
+    b"S28800169ZAK27GA0000DT\n"
+    b"S2880\n"
+    b"S28800170XAK27GA0000DT000060\n"
+)
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def test_counts_message_types():
+    my_analyzer = Analyzer(io.BytesIO(DATA))
+    my_analyzer.metrics.count_types = True
+    my_analyzer.read_file()
+    snapshot: dict = my_analyzer.metrics.snapshot()
+    assert snapshot["messages"] == 6
+    assert snapshot["message_types"] == {"A": 1, "E": 1, "X": 1, "Z": 1, "s": 1}
+    assert snapshot["skipped_messages"] == 3
+    assert snapshot["unknown_messages"] == 2
+    assert snapshot["ledger_high_water"] == 0
+    assert snapshot["bytes"] == len(DATA)
+    assert snapshot["blocks"] == 1
+
+
+def test_types_are_not_counted_by_default():
+    my_analyzer = Analyzer(io.BytesIO(DATA))
+    my_analyzer.read_file()
+    snapshot: dict = my_analyzer.metrics.snapshot()
+    assert snapshot["messages"] == 6
+    assert snapshot["message_types"] == {}
+    assert snapshot["skipped_messages"] is None
+    assert "skipped_messages_total" not in my_analyzer.metrics.to_prometheus()
+
+
+def test_ledger_high_water():
+    my_analyzer = Analyzer(io.BytesIO(DATA[:47]))
+    my_analyzer.read_file()
+    assert my_analyzer.metrics.ledger_high_water == 1
+
+
+def test_phases_are_sampled(dataset_path):
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.read_file()
+    assert my_analyzer.metrics.sampled_blocks == 1
+    assert all(seconds > 0 for seconds in my_analyzer.metrics.phase_seconds.values())
+
+
+def test_parallel_metrics_match_serial(dataset_path):
+    expected = Analyzer(dataset_path)
+    expected.metrics.count_types = True
+    expected.read_file()
+    actual = ParallelAnalyzer(dataset_path, 4)
+    actual.metrics.count_types = True
+    actual.read_file()
+    assert actual.metrics.messages == expected.metrics.messages
+    assert actual.metrics.message_types == expected.metrics.message_types
+    assert actual.metrics.bytes_read == expected.metrics.bytes_read
+
+
+def test_vectorized_metrics_match_analyzer():
+    vectorized = pytest.importorskip("pitch_volume_analysis.core.vectorized")
+    if vectorized.numpy is None:
+        pytest.skip("numpy is not installed")
+    expected = Analyzer(io.BytesIO(DATA))
+    expected.metrics.count_types = True
+    expected.read_file()
+    actual = vectorized.VectorizedAnalyzer(io.BytesIO(DATA))
+    actual.read_file()
+    assert actual.metrics.messages == expected.metrics.messages
+    assert actual.metrics.skipped_messages == expected.metrics.skipped_messages
+    assert actual.metrics.unknown_messages == expected.metrics.unknown_messages
+
+
+def test_to_prometheus():
+    my_analyzer = Analyzer(io.BytesIO(DATA))
+    my_analyzer.metrics.count_types = True
+    my_analyzer.read_file()
+    lines: list[str] = my_analyzer.metrics.to_prometheus().splitlines()
+    assert "# TYPE pva_messages_total counter" in lines
+    assert "pva_messages_total 6" in lines
+    assert 'pva_message_type_total{type="Z"} 1' in lines
+    assert "pva_unknown_messages_total 2" in lines
+    assert any(line.startswith('pva_phase_seconds_total{phase="read"} ') for line in lines)
+
+
+def test_escape_label():
+    assert metrics.escape_label('"\\') == '\\"\\\\'
+
+
+def test_export_to(tmp_path):
+    path: Path = Path(tmp_path, "metrics", "run.json")
+    my_analyzer = Analyzer(io.BytesIO(DATA))
+    # An interval of 0 rewrites the file after every block.
+    my_analyzer.metrics.export_to(path, "json", every=0)
+    my_analyzer.read_file()
+    assert json.loads(path.read_text())["message_types"]["A"] == 1
+    my_analyzer.metrics.export_format = "prometheus"
+    my_analyzer.metrics.write()
+    assert "pva_messages_total 6" in path.read_text().splitlines()
+    assert [file.name for file in path.parent.iterdir()] == ["run.json"]
@@ -0,0 +1,89 @@
+from pitch_volume_analysis.benchmarks.streams import random_stream
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.ledger import format_order_id
+from pitch_volume_analysis.core.parallel import ChunkAnalyzer, ParallelAnalyzer
+import gzip
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def test_chunk_analyzer_keeps_unresolved_messages_pending(tmp_path):
+    dataset: Path = Path(tmp_path, "chunk")
+    dataset.write_bytes(
+        b"S28800012EAK27GA0000DT000040AK27GA0000DT\n"
+        b"S28800013PAK27GA0000ZZS000010SH    0000619200AK27GA0000ZZ\n"
+    )
+    chunk_analyzer = ChunkAnalyzer(dataset, 0, dataset.stat().st_size)
+    chunk_analyzer.read_file()
+    assert chunk_analyzer.symbol_book == {"SH": 10}
+    assert [format_order_id(message[1]) for message in chunk_analyzer.pending] == [
+        "AK27GA0000DT",
+        "AK27GA0000ZZ",
+    ]
+
+
+@pytest.mark.parametrize("workers", [2, 5])
+def test_parallel_analyzer_matches_serial(dataset_path, workers):
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.read_file()
+
+    parallel_analyzer = ParallelAnalyzer(dataset_path, workers)
+    parallel_analyzer.read_file()
+    assert list(parallel_analyzer.symbol_book.items()) == list(my_analyzer.symbol_book.items())
+    assert parallel_analyzer.ledger_view() == my_analyzer.ledger_view()
+
+
+def test_parallel_analyzer_reads_compressed_dataset_serially(dataset_path, tmp_path):
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.read_file()
+
+    path: Path = Path(tmp_path, "dataset.gz")
+    path.write_bytes(gzip.compress(dataset_path.read_bytes()))
+    parallel_analyzer = ParallelAnalyzer(path, 4)
+    parallel_analyzer.read_file()
+    assert list(parallel_analyzer.symbol_book.items()) == list(my_analyzer.symbol_book.items())
+    assert parallel_analyzer.ledger_view() == my_analyzer.ledger_view()
+
+
+@pytest.mark.parametrize("window", [3, 200])
+def test_parallel_analyzer_expires_executions_like_serial(tmp_path, window):
+    # Trade breaks reach back past the window, across chunks and into executions of orders the
+    # chunk did not add, which only count once merged.
+    path: Path = random_stream(Path(tmp_path, "stream"), 20000, 5)
+    my_analyzer = Analyzer(path)
+    my_analyzer.set_execution_window(window)
+    my_analyzer.read_file()
+
+    parallel_analyzer = ParallelAnalyzer(path, 4)
+    parallel_analyzer.set_execution_window(window)
+    parallel_analyzer.read_file()
+    assert list(parallel_analyzer.symbol_book.items()) == list(my_analyzer.symbol_book.items())
+    assert parallel_analyzer.executions.ordered() == my_analyzer.executions.ordered()
+    assert parallel_analyzer.executions.count == my_analyzer.executions.count
+
+
+def test_parallel_analyzer_restores_breaks_that_expired_once_merged(tmp_path):
+    # The second chunk breaks its own trade, but the executions it resolves against the first
+    # chunk's orders push that trade out of a window of two once merged.
+    dataset: Path = Path(tmp_path, "breaks")
+    dataset.write_bytes(
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y\n"
+        b"S28800012AAK27GA0000DUS000100SH    0000619200Y\n"
+        b"S28800013AAK27GA0000DVS000100SO    0000619200Y\n"
+        b"S28800014AAK27GA0000DWS000100SO    0000619200Y\n"
+        b"S28800015PAK27GA0000ZZS000010SH    0000619200AK27GA0000X1\n"
+        b"S28800016EAK27GA0000DT000040AK27GA0000X2\n"
+        b"S28800017EAK27GA0000DV000030AK27GA0000X3\n"
+        b"S28800018BAK27GA0000X1\n"
+    )
+    parallel_analyzer = ParallelAnalyzer(dataset, 2)
+    parallel_analyzer.set_execution_window(2)
+    parallel_analyzer.read_file()
+    assert parallel_analyzer.symbol_book == {"SH": 50, "SO": 30}
@@ -0,0 +1,96 @@
+from multiprocessing import shared_memory
+from pitch_volume_analysis.core import engines, publish
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.publish import VolumePublisher, VolumeReader
+import os
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+@pytest.fixture
+def segment_name(request) -> str:
+    return f"pva-test-{os.getpid()}-{request.node.name}".replace("[", "-").rstrip("]")
+
+
+@pytest.mark.parametrize("engine", ["python", "numpy", "parallel"])
+def test_reader_sees_every_engines_volumes(dataset_path, segment_name, engine):
+    if not engines.engine_available(engine):
+        pytest.skip(f"The {engine} engine is not available")
+    my_analyzer = engines.create_engine(engine, dataset_path, 2)
+    my_analyzer.publisher = VolumePublisher(segment_name)
+    try:
+        my_analyzer.read_file()
+        with VolumeReader(segment_name) as reader:
+            assert list(reader.snapshot().items()) == list(my_analyzer.symbol_book.items())
+            assert reader.messages == my_analyzer.metrics.messages
+            assert not reader.finished
+            my_analyzer.publisher.publish(my_analyzer, finished=True)
+            reader.snapshot()
+            assert reader.finished
+    finally:
+        my_analyzer.publisher.close()
+
+
+def test_symbols_are_read_as_they_appear(segment_name):
+    my_analyzer = Analyzer(None)
+    publisher = VolumePublisher(segment_name)
+    try:
+        reader = VolumeReader(segment_name)
+        assert reader.snapshot() == {}
+        my_analyzer.symbols.intern(b"AAPL")
+        publisher.publish(my_analyzer)
+        assert reader.snapshot() == {"AAPL": 0}
+        # The volume array still grows after being published.
+        my_analyzer.symbols.volumes[0] = 300
+        my_analyzer.symbols.intern(b"ZVZZT123")
+        my_analyzer.symbols.volumes[1] = 7
+        publisher.publish(my_analyzer)
+        assert reader.snapshot() == {"AAPL": 300, "ZVZZT123": 7}
+        assert reader.sequence == 4 and reader.retries == 0
+        reader.close()
+    finally:
+        publisher.close()
+
+
+def test_symbols_past_capacity_are_left_out(segment_name):
+    my_analyzer = Analyzer(None)
+    for symbol in (b"A", b"B", b"C"):
+        my_analyzer.symbols.intern(symbol)
+    publisher = VolumePublisher(segment_name, capacity=2)
+    try:
+        publisher.publish(my_analyzer)
+        with VolumeReader(segment_name) as reader:
+            assert reader.snapshot() == {"A": 0, "B": 0}
+    finally:
+        publisher.close()
+
+
+def test_snapshots_wait_out_a_publish_under_way(segment_name):
+    publisher = VolumePublisher(segment_name)
+    try:
+        with VolumeReader(segment_name) as reader:
+            publish.SEQUENCE.pack_into(publisher.buffer, publish.SEQUENCE_OFFSET, 1)
+            with pytest.raises(TimeoutError):
+                reader.snapshot(timeout=0.01)
+            assert reader.retries > 0
+            publish.SEQUENCE.pack_into(publisher.buffer, publish.SEQUENCE_OFFSET, 2)
+            assert reader.snapshot() == {}
+    finally:
+        publisher.close()
+
+
+def test_reader_rejects_other_segments(segment_name):
+    memory = shared_memory.SharedMemory(segment_name, create=True, size=publish.segment_size(1))
+    try:
+        with pytest.raises(ValueError):
+            VolumeReader(segment_name)
+    finally:
+        memory.close()
+        memory.unlink()
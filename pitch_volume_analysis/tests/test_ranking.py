@@ -0,0 +1,55 @@
+from array import array
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.ranking import LiveAnalyzer, RankingHeap, parse_snapshot_interval
+import random
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def test_ranking_heap_matches_stable_sort():
+    generator = random.Random(7)
+    volumes: array = array("q", [0] * 50)
+    ranking = RankingHeap(volumes)
+    for _ in range(2000):
+        symbol_id: int = generator.randrange(50)
+        volumes[symbol_id] = max(volumes[symbol_id] + generator.randint(-300, 1000), 0)
+        ranking.update(symbol_id)
+    expected: list[int] = sorted(range(50), key=volumes.__getitem__, reverse=True)
+    assert ranking.top(50) == expected
+    assert ranking.top(5) == expected[:5]
+
+
+def test_ranking_heap_includes_symbols_never_updated():
+    volumes: array = array("q", [0, 0, 10])
+    ranking = RankingHeap(volumes)
+    ranking.update(2)
+    assert ranking.top(3) == [2, 0, 1]
+
+
+def test_live_analyzer_snapshots(dataset_path):
+    snapshots: list[tuple[int, list]] = []
+    live_analyzer = LiveAnalyzer(
+        dataset_path,
+        10,
+        every_messages=5000,
+        on_snapshot=lambda *snapshot: snapshots.append(snapshot),
+    )
+    live_analyzer.read_file()
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.read_file()
+    assert [messages for messages, ranking in snapshots] == [5000, 10000, 15000, 20000]
+    assert snapshots[-1][1] == my_analyzer.symbols.top(10)
+
+
+def test_parse_snapshot_interval():
+    assert parse_snapshot_interval("1000") == (1000, None)
+    assert parse_snapshot_interval("2.5s") == (None, 2.5)
+    with pytest.raises(ValueError):
+        parse_snapshot_interval("0")
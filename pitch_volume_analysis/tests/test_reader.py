@@ -0,0 +1,109 @@
+from pitch_volume_analysis.core import reader
+import bz2
+import gzip
+import io
+import lzma
+import pytest
+import threading
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def join_blocks(blocks) -> bytes:
+    """Copies every yielded block before the reader releases it."""
+    return b"".join(bytes(block) for block in blocks)
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_read_blocks_returns_whole_file(dataset_path, use_mmap):
+    data: bytes = join_blocks(reader.read_blocks(dataset_path, block_size=4096, use_mmap=use_mmap))
+    assert data == dataset_path.read_bytes()
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_read_blocks_end_on_record_boundaries(dataset_path, use_mmap):
+    for block in reader.read_blocks(dataset_path, block_size=1000, use_mmap=use_mmap):
+        assert bytes(block[-1:]) == b"\n"
+
+
+def test_read_buffered_blocks_handles_records_longer_than_buffer():
+    data: bytes = b"S28800181X1K27GA00000Y000100\nS28800181X1K27GA00000Y000100"
+    blocks: list[bytes] = [
+        bytes(block) for block in reader.read_buffered_blocks(io.BytesIO(data), 8)
+    ]
+    assert blocks == [b"S28800181X1K27GA00000Y000100\n", b"S28800181X1K27GA00000Y000100"]
+
+
+def test_is_mappable_rejects_streams():
+    assert not reader.is_mappable(io.BytesIO(b"data"))
+
+
+def test_read_blocks_accepts_open_streams(dataset_path):
+    with open(dataset_path, "rb") as file:
+        stream = io.BufferedReader(io.BytesIO(file.read()))
+    assert join_blocks(reader.read_blocks(stream, block_size=4096)) == dataset_path.read_bytes()
+    assert not stream.closed
+
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_read_blocks_byte_range(dataset_path, use_mmap):
+    data: bytes = dataset_path.read_bytes()
+    start: int = data.index(b"\n", 1000) + 1
+    stop: int = data.index(b"\n", 5000) + 1
+    blocks = reader.read_blocks(dataset_path, 512, use_mmap, start, stop)
+    assert join_blocks(blocks) == data[start:stop]
+
+
+def test_complete_end_skips_unfinished_record(tmp_path):
+    path: Path = Path(tmp_path, "growing")
+    path.write_bytes(b"S28800011AAK27GA0000DTS000100SH    0000619200Y\nS2880001")
+    assert reader.complete_end(path) == 47
+    assert reader.complete_end(path, 47) == 47
+    assert reader.complete_end(path, 100) == 55
+
+
+@pytest.mark.parametrize(
+    "compress, compression",
+    [(gzip.compress, "gzip"), (bz2.compress, "bz2"), (lzma.compress, "xz")],
+)
+def test_read_blocks_decompresses(dataset_path, tmp_path, compress, compression):
+    data: bytes = dataset_path.read_bytes()
+    path: Path = Path(tmp_path, "dataset.compressed")
+    path.write_bytes(compress(data))
+    assert reader.detect_compression(path) == compression
+    blocks: list[bytes] = list(reader.read_blocks(path, block_size=1000))
+    assert b"".join(blocks) == data
+    assert all(block.endswith(b"\n") for block in blocks)
+
+
+def test_read_blocks_decompresses_streams_and_members(dataset_path):
+    data: bytes = dataset_path.read_bytes()
+    middle: int = data.index(b"\n", len(data) // 2) + 1
+    # Concatenated gzip members, as written by appending to an archive.
+    members: bytes = gzip.compress(data[:middle]) + gzip.compress(data[middle:])
+    stream = io.BufferedReader(io.BytesIO(members))
+    assert reader.detect_compression(stream) == "gzip"
+    assert join_blocks(reader.read_blocks(stream, block_size=4096)) == data
+    assert reader.detect_compression(io.BytesIO(gzip.compress(data))) is None
+
+
+def test_truncated_compressed_input_raises(dataset_path):
+    compressed: bytes = gzip.compress(dataset_path.read_bytes())
+    stream = io.BufferedReader(io.BytesIO(compressed[: len(compressed) // 2]))
+    with pytest.raises(EOFError):
+        join_blocks(reader.read_blocks(stream))
+
+
+def test_stopping_early_ends_the_producer(dataset_path):
+    # Far more blocks than the queue holds, so the producer is left waiting for room.
+    compressed: bytes = gzip.compress(dataset_path.read_bytes(), compresslevel=1)
+    blocks = reader.read_blocks(io.BufferedReader(io.BytesIO(compressed)), 1000)
+    next(blocks)
+    blocks.close()
+    assert not any(thread.name == "decompress" for thread in threading.enumerate())
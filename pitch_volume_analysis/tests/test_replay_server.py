@@ -0,0 +1,41 @@
+from pitch_volume_analysis.benchmarks import replay_server
+from pitch_volume_analysis.core.analyzer import Analyzer
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def test_split_units_keeps_every_record(dataset_path):
+    data: bytes = dataset_path.read_bytes()
+    units: list[bytes] = replay_server.split_units(data, 4)
+    assert sorted(b"".join(units).splitlines()) == sorted(data.splitlines())
+    assert replay_server.split_units(data, 1) == [data]
+
+
+def test_split_units_follow_orders(dataset_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    # Computing the units one after another is the most extreme interleaving of them.
+    actual = Analyzer(dataset_path)
+    for unit in replay_server.split_units(dataset_path.read_bytes(), 4):
+        actual.compute_block(unit)
+    assert actual.symbol_book == expected.symbol_book
+
+
+def test_split_units_partition_symbols():
+    data: bytes = (
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y\n"
+        b"S28800012AAK27GA0000DUS000100SPY   0000619200Y\n"
+        b"S28800013AAK27GA0000DVS000100SH    0000619200Y\n"
+        b"S28800014EAK27GA0000DV000040000000000001\n"
+    )
+    units: list[bytes] = replay_server.split_units(data, 8)
+    unit: bytes = next(unit for unit in units if b"SH " in unit)
+    assert unit.count(b"\n") == 3
+    assert unit.endswith(b"S28800014EAK27GA0000DV000040000000000001\n")
@@ -0,0 +1,116 @@
+from pitch_volume_analysis.benchmarks import generator
+from pitch_volume_analysis.core import serve
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.client import Client
+import pytest
+import threading
+import tracemalloc
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+@pytest.fixture
+def socket_path(tmp_path) -> Path:
+    server = serve.AnalysisServer(Path(tmp_path, "pva.sock"), serve.WarmCache(1 << 30))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server.socket_path
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_warm_requests_match_analyzer(dataset_path, socket_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    with Client(socket_path) as client:
+        cold: dict = client.request(path=str(dataset_path), top=5, symbols=["spy", "NOPE"])
+        warm: dict = client.request(path=str(dataset_path), top=5, symbols=["spy", "NOPE"])
+        stats: dict = client.request(command="stats")
+    assert cold["warm"] == "miss" and warm["warm"] == "hit"
+    assert [tuple(pair) for pair in warm["top"]] == expected.symbols.top(5)
+    assert warm["volumes"] == {"SPY": expected.symbol_book["SPY"], "NOPE": 0}
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_growing_file_is_extended(dataset_path, tmp_path, socket_path):
+    data: bytes = dataset_path.read_bytes()
+    middle: int = data.rindex(b"\n", 0, len(data) // 2) + 1
+    path: Path = Path(tmp_path, "capture")
+    path.write_bytes(data[:middle])
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    with Client(socket_path) as client:
+        assert client.request(path=str(path))["warm"] == "miss"
+        with open(path, "ab") as file:
+            file.write(data[middle:])
+        reply: dict = client.request(path=str(path), top=0, symbols=list(expected.symbol_book))
+        assert client.request(path=str(path), stop=middle)["warm"] == "miss"
+    assert reply["warm"] == "extended"
+    assert reply["volumes"] == expected.symbol_book
+
+
+def test_byte_ranges(dataset_path, socket_path):
+    data: bytes = dataset_path.read_bytes()
+    middle: int = data.rindex(b"\n", 0, len(data) // 2) + 1
+    expected = Analyzer(dataset_path)
+    expected.offset = middle
+    expected.read_file()
+    with Client(socket_path) as client:
+        reply: dict = client.request(path=str(dataset_path), start=middle, top=3)
+        misaligned: dict = client.request(path=str(dataset_path), stop=middle + 1)
+    assert [tuple(pair) for pair in reply["top"]] == expected.symbols.top(3)
+    assert not misaligned["ok"] and "not the start of a record" in misaligned["error"]
+
+
+def test_errors_keep_the_connection(socket_path):
+    with Client(socket_path) as client:
+        assert "not found" in client.request(path="/no/such/file")["error"]
+        assert client.request(top=3)["error"] == "Analysis requests need a path"
+        for bad in ({"start": "5"}, {"stop": None, "start": -1}, {"stop": 1.5}, {"stop": True}):
+            reply: dict = client.request(path="/no/such/file", **bad)
+            assert reply == {"ok": False, "error": "start and stop must be byte offsets"}
+        assert not client.request(path="/no/such/file", top="3")["ok"]
+        assert not client.request(path="/no/such/file", symbols="SPY")["ok"]
+        client.sock.sendall(b"not json\n")
+        assert b"JSON objects" in client.replies.readline()
+        assert not client.request(command="stats")["entries"]
+
+
+def test_cache_evicts_least_recently_used(dataset_path):
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.read_file()
+    size: int = serve.analyzer_bytes(my_analyzer)
+    cache = serve.WarmCache(2 * size)
+    for key in ("a", "b", "c"):
+        cache.put((key, 0, 1), my_analyzer, {})
+        cache.get(("a", 0, 1))
+    assert list(cache.entries) == [("c", 0, 1), ("a", 0, 1)]
+    assert cache.used == 2 * size
+
+
+@pytest.mark.parametrize("break_rate", [0, 0.001])
+def test_analyzer_bytes_matches_traced_memory(tmp_path, break_rate):
+    path: Path = Path(tmp_path, "capture")
+    mix: dict[str, float] = {**generator.DEFAULT_MIX, "break": break_rate}
+    generator.generate(path, 50_000, mix=mix, seed=1)
+    tracemalloc.start()
+    try:
+        my_analyzer = Analyzer(path)
+        my_analyzer.read_file()
+        used: int = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert (my_analyzer.executions.positions is not None) == (break_rate > 0)
+    assert 0.8 * used < serve.analyzer_bytes(my_analyzer) < 1.2 * used
+
+
+def test_running_server_is_not_replaced(socket_path):
+    with pytest.raises(OSError, match="already running"):
+        serve.AnalysisServer(socket_path, serve.WarmCache(1 << 20))
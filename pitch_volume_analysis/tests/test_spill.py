@@ -0,0 +1,105 @@
+from pitch_volume_analysis.core import checkpoint
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.spill import (
+    POSITION_BYTES,
+    SpillingLedger,
+    parse_size,
+    resident_budget,
+)
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+@pytest.fixture
+def my_ledger(tmp_path) -> SpillingLedger:
+    ledger = SpillingLedger(4, tmp_path)
+    yield ledger
+    ledger.close()
+
+
+def test_spilled_orders_are_found(my_ledger):
+    for order_id in range(20):
+        assert my_ledger.add(order_id, 100 + order_id, order_id % 3)
+    assert my_ledger.size <= 4
+    assert my_ledger.spilled == 20 - my_ledger.size
+    assert len(my_ledger) == 20
+    assert my_ledger.get(0) == (100, 0)
+    assert my_ledger.faults == 1
+    assert sorted(my_ledger.items()) == [(i, 100 + i, i % 3) for i in range(20)]
+
+
+def test_spilled_orders_are_not_added_twice(my_ledger):
+    for order_id in range(20):
+        my_ledger.add(order_id, 100, 0)
+    assert not my_ledger.add(0, 50, 1)
+    assert my_ledger.get(0) == (100, 0)
+
+
+def test_reduce_removes_spilled_orders(my_ledger):
+    for order_id in range(20):
+        my_ledger.add(order_id, 100, 0)
+    position: int = my_ledger.find(1)
+    assert my_ledger.reduce(position, 100) == 0
+    assert my_ledger.get(1) is None
+    assert len(my_ledger) == 19
+
+
+def test_volumes_match_in_memory_ledger(dataset_path, tmp_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.spill_ledger(8, tmp_path)
+    my_analyzer.read_file()
+    storage: dict = my_analyzer.ledger.storage()
+    assert storage["spills"] > 0 and storage["faults"] > 0
+    assert storage["resident"] <= 8
+    assert list(my_analyzer.symbol_book.items()) == list(expected.symbol_book.items())
+    assert my_analyzer.ledger_view() == expected.ledger_view()
+    assert my_analyzer.metrics.snapshot()["ledger_storage"] == storage
+    assert "pva_ledger_spilled_orders" in my_analyzer.metrics.to_prometheus()
+    my_analyzer.ledger.close()
+
+
+def test_restore_keeps_spilling(dataset_path, tmp_path):
+    first = Analyzer(dataset_path)
+    data: bytes = dataset_path.read_bytes()
+    first.read_file(stop=data.rindex(b"\n", 0, len(data) // 2) + 1)
+    checkpoint_file: Path = Path(tmp_path, "run.checkpoint")
+    checkpoint.save_checkpoint(first, checkpoint_file)
+    resumed = Analyzer(dataset_path)
+    resumed.spill_ledger(8, tmp_path)
+    resumed.restore(checkpoint.load_checkpoint(checkpoint_file, dataset_path))
+    assert isinstance(resumed.ledger, SpillingLedger)
+    assert resumed.ledger_view() == first.ledger_view()
+    resumed.ledger.close()
+
+
+def test_close_removes_spill_file(tmp_path):
+    ledger = SpillingLedger(4, tmp_path)
+    assert Path(ledger.path).exists()
+    ledger.close()
+    assert not Path(ledger.path).exists()
+
+
+def test_parse_size():
+    assert parse_size("4096") == 4096
+    assert parse_size("512k") == 512 << 10
+    assert parse_size("1.5G") == 3 << 29
+    assert parse_size("64MB") == 64 << 20
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_resident_budget_fits_memory():
+    for memory in (0, 1000, 1 << 20, 3 << 30):
+        budget: int = resident_budget(memory)
+        ledger_positions: int = 1 << (2 * budget + 1).bit_length()
+        assert budget >= 1
+        assert ledger_positions * POSITION_BYTES <= max(memory, 4 * POSITION_BYTES)
@@ -7,3 +7,16 @@ from pathlib import Path
 
 def test_read_file() -> None:
     pass
+
+
+def test_instances_do_not_share_state(capsys) -> None:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    DATASET_PATH: Path = Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+    first = SymbolAnalyzer("AAPL", DATASET_PATH)
+    first.read_file()
+    second = SymbolAnalyzer("AAPL", DATASET_PATH)
+    assert second.ledger == {} and second.stock_volume == 0
+    second.read_file()
+    assert second.ledger == first.ledger
+    assert second.stock_volume == first.stock_volume
@@ -0,0 +1,61 @@
+from pitch_volume_analysis.core import symbol_index
+from pitch_volume_analysis.core.symbol_analyzer import SymbolAnalyzer
+import os
+import pytest
+import shutil
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path(tmp_path) -> Path:
+    """Copy of the example dataset, so its index is written to a temporary directory."""
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    path: Path = Path(tmp_path, "pitch_example_data")
+    shutil.copyfile(Path(PROJECT_ROOT, "data", "raw", "pitch_example_data"), path)
+    return path
+
+
+def run_symbol(symbol: str, dataset_path: Path, use_index: bool, capsys) -> tuple[str, int]:
+    symbol_analyzer = SymbolAnalyzer(symbol, dataset_path)
+    symbol_analyzer.read_file(use_index)
+    return capsys.readouterr().out, symbol_analyzer.stock_volume
+
+
+@pytest.mark.parametrize("symbol", ["AAPL", "SPY", "SH", "NOSUCH"])
+def test_indexed_run_matches_scan(dataset_path, symbol, capsys):
+    expected: tuple[str, int] = run_symbol(symbol, dataset_path, False, capsys)
+    symbol_index.build_index(dataset_path)
+    assert run_symbol(symbol, dataset_path, True, capsys) == expected
+
+
+def test_index_holds_only_the_symbols_records(dataset_path):
+    symbol_index.build_index(dataset_path)
+    offsets = symbol_index.load_offsets(dataset_path, b"AAPL")
+    records: list[bytes] = list(symbol_index.read_indexed_records(dataset_path, offsets))
+    assert 0 < len(records) < len(dataset_path.read_bytes().splitlines())
+    assert records[0].startswith(b"S") and b"AAPL" in records[0]
+    assert list(offsets) == sorted(offsets)
+    assert len(symbol_index.load_offsets(dataset_path, b"NOSUCH")) == 0
+
+
+def test_executions_follow_orders_across_symbols(tmp_path):
+    path: Path = Path(tmp_path, "reused")
+    path.write_bytes(
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y\n"
+        b"S28800012AAK27GA0000DTS000100SPY   0000619200Y\n"
+        b"S28800013EAK27GA0000DT000040000000000001\n"
+    )
+    symbol_index.build_index(path)
+    # The SPY add reuses a resting SH order id, so it is indexed for SH too.
+    assert list(symbol_index.load_offsets(path, b"SH")) == [0, 47, 94]
+    assert list(symbol_index.load_offsets(path, b"SPY")) == [47, 94]
+
+
+def test_stale_index_is_ignored(dataset_path):
+    symbol_index.build_index(dataset_path)
+    with open(dataset_path, "ab") as file:
+        file.write(b"S28800011AAK27GA0000ZZS000100SH    0000619200Y\n")
+    assert symbol_index.load_offsets(dataset_path, b"AAPL") is None
+    os.remove(symbol_index.index_path(dataset_path))
+    assert symbol_index.load_offsets(dataset_path, b"AAPL") is None
@@ -0,0 +1,30 @@
+from pitch_volume_analysis.core import symbols
+from pitch_volume_analysis.core.symbols import SymbolTable
+import pytest
+
+
+@pytest.fixture
+def my_symbols() -> SymbolTable:
+    my_symbols = SymbolTable()
+    for symbol, volume in [(b"SH", 100), (b"SPY", 300), (b"AAPL", 100), (b"DIA", 0)]:
+        my_symbols.volumes[my_symbols.intern(symbol)] += volume
+    return my_symbols
+
+
+def test_intern_returns_stable_ids(my_symbols):
+    assert my_symbols.intern(b"SPY") == 1
+    assert my_symbols.intern(b"QQQ") == 4
+    assert my_symbols.names[4] == "QQQ"
+    assert len(my_symbols) == 5
+
+
+def test_items(my_symbols):
+    assert dict(my_symbols.items()) == {"SH": 100, "SPY": 300, "AAPL": 100, "DIA": 0}
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_top_keeps_first_appearance_order_for_ties(my_symbols, monkeypatch, vectorized):
+    monkeypatch.setattr(symbols, "VECTORIZED_RANKING", 0)
+    if not vectorized:
+        monkeypatch.setattr(symbols, "numpy", None)
+    assert my_symbols.top(3) == [("SPY", 300), ("SH", 100), ("AAPL", 100)]
@@ -0,0 +1,37 @@
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.symbol_analyzer import SymbolAnalyzer
+from pitch_volume_analysis.core.tracer import SymbolTracer
+import io
+import pytest
+from pathlib import Path
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def test_tracer_matches_symbol_analyzer(dataset_path, capsys):
+    symbol_analyzer = SymbolAnalyzer("AAPL", dataset_path)
+    symbol_analyzer.read_file()
+    symbol_analyzer.print_stock_volume()
+    expected: str = capsys.readouterr().out
+
+    stream = io.StringIO()
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.tracer = SymbolTracer(my_analyzer, ["AAPL"], stream=stream)
+    my_analyzer.read_file()
+    my_analyzer.tracer.close()
+    assert stream.getvalue().strip() == expected.strip()
+
+
+def test_tracer_writes_one_file_per_symbol(dataset_path, tmp_path):
+    my_analyzer = Analyzer(dataset_path)
+    my_analyzer.tracer = SymbolTracer(my_analyzer, ["AAPL", "SPY", "NOPE"], tmp_path)
+    my_analyzer.read_file()
+    my_analyzer.tracer.close()
+    assert Path(tmp_path, "AAPL.trace").read_text().endswith("AAPL: (Total) 495\n")
+    assert Path(tmp_path, "SPY.trace").read_text().endswith("SPY: (Total) 2000\n")
+    assert Path(tmp_path, "NOPE.trace").read_text() == "NOPE: (Total) 0\n"
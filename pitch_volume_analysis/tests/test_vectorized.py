@@ -0,0 +1,155 @@
+from functools import partial
+from pitch_volume_analysis.core import analyzer, reader, vectorized
+from pitch_volume_analysis.core.analyzer import Analyzer
+from pitch_volume_analysis.core.ledger import format_order_id
+import io
+import pytest
+import random
+from pathlib import Path
+
+numpy = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def dataset_path() -> Path:
+    CURRENT_FILE_PATH: Path = Path(__file__).resolve()
+    PROJECT_ROOT: Path = CURRENT_FILE_PATH.parents[2]
+    return Path(PROJECT_ROOT, "data", "raw", "pitch_example_data")
+
+
+def random_dataset(seed: int, count: int) -> bytes:
+    """Builds messages over a small pool of order ids and share counts, so orders are re-added,
+    added twice while resting, executed to exactly zero and past it, and referenced before
+    they are added. Trade breaks reference earlier executions and trades, or none at all.
+    """
+    generator = random.Random(seed)
+    records: list[str] = []
+    for time_stamp in range(28800000, 28800000 + count):
+        order_id: str = format_order_id(generator.randrange(800) * 7919)
+        shares: int = generator.randrange(1, 5) * 100
+        symbol: str = generator.choice(["AAPL", "SPY", "QQQ", "MSFT"])
+        execution_id: str = format_order_id(time_stamp)
+        match generator.choice("AA1EEXXPB"):
+            case "A":
+                records.append(f"S{time_stamp}A{order_id}B{shares:06d}{symbol:<6}0000619200Y")
+            case "1":
+                records.append(
+                    f"S{time_stamp}1{order_id}B{shares:06d}{symbol:<8}00000619200000YCBOE "
+                )
+            case "E":
+                records.append(f"S{time_stamp}E{order_id}{shares:06d}{execution_id}")
+            case "X":
+                records.append(f"S{time_stamp}X{order_id}{shares:06d}")
+            case "P":
+                records.append(
+                    f"S{time_stamp}P{order_id}B{shares:06d}{symbol:<6}0000619200{execution_id}"
+                )
+            case "B":
+                broken: str = format_order_id(generator.randrange(28800000, time_stamp + 1))
+                records.append(f"S{time_stamp}B{broken}")
+    return "\n".join(records).encode() + b"\n"
+
+
+def assert_same_results(expected: Analyzer, actual: Analyzer) -> None:
+    assert list(actual.symbol_book.items()) == list(expected.symbol_book.items())
+    assert actual.ledger_view() == expected.ledger_view()
+    for order_id, shares, symbol_id in expected.ledger.items():
+        assert actual.ledger.get(order_id) == (shares, symbol_id)
+    assert actual.executions.ordered() == expected.executions.ordered()
+    assert actual.executions.count == expected.executions.count
+
+
+def test_matches_analyzer_on_sample(dataset_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    actual = vectorized.VectorizedAnalyzer(dataset_path)
+    actual.read_file()
+    assert_same_results(expected, actual)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_analyzer_on_random_data(seed):
+    data: bytes = random_dataset(seed, 3000)
+    expected = Analyzer(io.BytesIO(data))
+    expected.read_file()
+    actual = vectorized.VectorizedAnalyzer(io.BytesIO(data))
+    actual.read_file()
+    assert_same_results(expected, actual)
+
+
+def test_held_batches_are_computed_once_they_fill_up(monkeypatch):
+    data: bytes = random_dataset(6, 3000)
+    monkeypatch.setattr(analyzer, "read_blocks", partial(reader.read_blocks, block_size=4096))
+    monkeypatch.setattr(vectorized, "DEFERRED_MESSAGES", 500)
+    expected = Analyzer(io.BytesIO(data))
+    expected.read_file()
+    actual = vectorized.VectorizedAnalyzer(io.BytesIO(data))
+    computed: list[int] = []
+    compute_batches = actual.compute_batches
+
+    def count_batches() -> None:
+        computed.append(actual.deferred)
+        compute_batches()
+
+    actual.compute_batches = count_batches
+    actual.read_file()
+    assert_same_results(expected, actual)
+    assert len(computed) > 3
+    assert max(computed) < 500 + 4096 // 20
+
+
+def test_process_batch_computes_each_batch():
+    data: bytes = random_dataset(5, 3000)
+    middle: int = data.index(b"\n", len(data) // 2) + 1
+    expected = Analyzer(None)
+    actual = vectorized.VectorizedAnalyzer(None)
+    for batch in (data[:middle], data[middle:]):
+        expected.process_batch(batch)
+        actual.process_batch(memoryview(batch))
+        assert_same_results(expected, actual)
+
+
+def test_matches_analyzer_from_cache(dataset_path, tmp_path):
+    expected = Analyzer(dataset_path)
+    expected.read_file()
+    actual = vectorized.VectorizedAnalyzer(dataset_path)
+    actual.read_cached(tmp_path)
+    assert_same_results(expected, actual)
+
+
+def test_decode_block():
+    my_analyzer = vectorized.VectorizedAnalyzer(io.BytesIO())
+    kinds, order_ids, shares, symbol_ids, execution_ids = my_analyzer.decode_block(
+        b"S28800011AAK27GA0000DTS000100SH    0000619200Y\n"
+        b"S28800168s\n"
+        b"S28800012E1k27ga0000dt000040000000000001\n"
+        b"S288000111K27GA0000DTBB000200SPY     00000619200000YCBOE \n"
+    )
+    assert kinds.tolist() == [0, 1, 0]
+    assert order_ids.tolist() == [
+        int(order_id, 36) for order_id in ["AK27GA0000DT", "1K27GA0000DT", "K27GA0000DTB"]
+    ]
+    assert shares.tolist() == [100, 40, 200]
+    assert symbol_ids.tolist() == [0, -1, 1]
+    assert execution_ids.tolist() == [-1, 1, -1]
+    assert my_analyzer.symbols.names == ["SH", "SPY"]
+
+
+def test_decode_block_rejects_bad_digits():
+    my_analyzer = vectorized.VectorizedAnalyzer(io.BytesIO())
+    with pytest.raises(ValueError):
+        my_analyzer.decode_block(b"S28800011AAK27GA0000DTS0001X0SH    0000619200Y\n")
+
+
+def test_build_ledger():
+    order_ids = numpy.arange(0, 5000 * 1024, 1024, dtype=numpy.int64)
+    shares = numpy.arange(5000, dtype=numpy.int64)
+    symbol_ids = numpy.arange(5000, dtype=numpy.int32) % 7
+    ledger = vectorized.build_ledger(order_ids, shares, symbol_ids)
+    assert len(ledger) == 5000
+    for order_id, shares_left, symbol_id in zip(
+        order_ids.tolist(), shares.tolist(), symbol_ids.tolist()
+    ):
+        assert ledger.get(order_id) == (shares_left, symbol_id)
+    assert not ledger.add(order_ids[0].item(), 1, 0)
+    assert ledger.add(1, 1, 0)